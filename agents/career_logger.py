@@ -2,6 +2,8 @@ import json
 import datetime
 from pathlib import Path
 
+from tracing import span
+
 
 class CareerPathfinderLogger:
     """Logger for career pathfinder pipeline executions"""
@@ -36,12 +38,14 @@ class CareerPathfinderLogger:
                 "total_recommended_skills": len(result.get("missing_skills", [])) + len(result.get("nice_to_have", []))
             },
             "full_result": result,
+            "llm_usage": result.get("performance_summary", {}).get("llm_usage"),
             "execution_time_seconds": execution_time,
             "session_id": f"session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
         }
         
         self.logs.append(log_entry)
-        self._save_logs()
+        with span('logger_write', entries=len(self.logs)):
+            self._save_logs()
         return log_entry
     
     def _save_logs(self):
@@ -77,7 +81,36 @@ class CareerPathfinderLogger:
             "date_range": {
                 "first_execution": self.logs[0]["timestamp"],
                 "last_execution": self.logs[-1]["timestamp"]
-            }
+            },
+            "llm_usage": self._usage_stats()
+        }
+    
+    def _usage_stats(self):
+        """Token and cost totals over the logged executions that recorded LLM usage"""
+        usages = [log["llm_usage"] for log in self.logs if log.get("llm_usage")]
+        if not usages:
+            return {"executions": 0}
+        
+        total_tokens = sum(usage.get("total_tokens", 0) for usage in usages)
+        total_cost = sum(usage.get("cost_usd", 0) for usage in usages)
+        by_agent = {}
+        for usage in usages:
+            for agent, totals in usage.get("by_agent", {}).items():
+                agent_stats = by_agent.setdefault(agent, {"calls": 0, "failed_calls": 0, "retries": 0,
+                                                          "total_tokens": 0, "cost_usd": 0.0})
+                for key in agent_stats:
+                    agent_stats[key] += totals.get(key, 0)
+        for agent_stats in by_agent.values():
+            agent_stats["cost_usd"] = round(agent_stats["cost_usd"], 6)
+            agent_stats["share_of_tokens"] = round(agent_stats["total_tokens"] / total_tokens, 3) if total_tokens else 0
+        
+        return {
+            "executions": len(usages),
+            "total_tokens": total_tokens,
+            "total_cost_usd": round(total_cost, 6),
+            "average_tokens_per_execution": round(total_tokens / len(usages), 1),
+            "average_cost_usd_per_execution": round(total_cost / len(usages), 6),
+            "by_agent": by_agent
         }
 
 
@@ -1,14 +1,33 @@
 import os
 import json
 import time
+import queue
+import asyncio
 import hashlib
+import inspect
 import threading
+import contextvars
+from dataclasses import dataclass
+from functools import lru_cache, wraps
 from typing import TypedDict, Dict, List, Tuple, Optional, Union
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
+from llm_rate_limiter import rate_limiter, estimate_tokens
+from llm_circuit_breaker import circuit_breaker
+from llm_client_registry import get_llm, count_http_attempts, llm_clients
+from llm_usage import UsageLedger, call_usage, response_model
+from metrics import metrics
+from tracing import span
+from roadmap_engine import RoadmapEngine, ROADMAP_PHASES, load_prerequisites
+from singleflight import SingleFlight
+from role_readiness_agent import assess_role_readiness
+from roadmap_cache import ROADMAP_CACHE_CONFIG, RoadmapCache, make_cache_key
+from pipeline_checkpoints import CHECKPOINT_CONFIG, CheckpointStore, checkpoint_thread_id
+from resume_preprocessor import RESUME_PREPROCESSING_CONFIG, preprocess_resume
+from roadmap_templates import (TEMPLATE_CONFIG, RoadmapTemplate, TemplateStore, get_data_version,
+                               personalize_template)
 
 # Load environment variables from .env file
 load_dotenv("../.env")
@@ -21,6 +40,11 @@ class PerformanceProfiler:
         self.cache = {}
         self.cache_hits = 0
         self.cache_misses = 0
+        self.throttle_wait_time = 0.0
+        self.throttled_calls = 0
+        self.coalescing = {}
+        self.prompt_reduction = {}
+        self.llm_usage = UsageLedger()
         
     def start_timer(self, step_name: str):
         self.timings[step_name] = {'start': time.time()}
@@ -30,6 +54,32 @@ class PerformanceProfiler:
             self.timings[step_name]['end'] = time.time()
             self.timings[step_name]['duration'] = self.timings[step_name]['end'] - self.timings[step_name]['start']
             
+    def record_timing(self, step_name: str, duration: float):
+        """Record a step that was timed elsewhere (e.g. in a worker process)"""
+        self.timings[step_name] = {'duration': duration}
+        
+    def record_throttle_wait(self, wait_time: float):
+        """Record time an LLM call spent waiting on the shared rate limiter"""
+        self.throttle_wait_time += wait_time
+        if wait_time > 0.001:
+            self.throttled_calls += 1
+            
+    def record_coalescing(self, scope: str, shared: bool, waiters: int):
+        """Record whether a coalesced step ran here or was shared with concurrent callers"""
+        self.coalescing[scope] = {'shared': shared, 'waiters': waiters}
+            
+    def record_prompt_reduction(self, stage: str, report: dict):
+        """Record the prompt tokens a stage saved by preprocessing the resume"""
+        self.prompt_reduction[stage] = report
+    
+    def record_llm_call(self, agent: str, usage: dict):
+        """Record the tokens, retries and cost of an agent's LLM call"""
+        self.llm_usage.record(agent, usage)
+    
+    def record_llm_failure(self, agent: str, model: str, attempts: int):
+        """Record an agent's LLM call that raised"""
+        self.llm_usage.record_failure(agent, model, attempts)
+    
     def get_performance_report(self) -> dict:
         report = {
             'step_timings': {},
@@ -38,7 +88,14 @@ class PerformanceProfiler:
                 'hits': self.cache_hits,
                 'misses': self.cache_misses,
                 'hit_ratio': self.cache_hits / (self.cache_hits + self.cache_misses) if (self.cache_hits + self.cache_misses) > 0 else 0
-            }
+            },
+            'llm_throttle': {
+                'wait_time': round(self.throttle_wait_time, 3),
+                'throttled_calls': self.throttled_calls
+            },
+            'coalescing': dict(self.coalescing),
+            'resume_preprocessing': dict(self.prompt_reduction),
+            'llm_usage': self.llm_usage.report()
         }
         
         total_time = 0
@@ -50,6 +107,13 @@ class PerformanceProfiler:
         report['total_time'] = round(total_time, 3)
         return report
         
+    def record_cache_lookup(self, hit: bool):
+        """Count a lookup in a shared cache towards this request's cache stats"""
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        
     def cache_get(self, key: str):
         if key in self.cache:
             self.cache_hits += 1
@@ -60,8 +124,38 @@ class PerformanceProfiler:
     def cache_set(self, key: str, value):
         self.cache[key] = value
 
-# Global profiler instance
-profiler = PerformanceProfiler()
+# Each request (thread or greenlet) gets its own profiler through a context variable
+_current_profiler = contextvars.ContextVar('career_pathfinder_profiler', default=None)
+
+def get_profiler() -> PerformanceProfiler:
+    """Return the profiler for the current request context"""
+    current = _current_profiler.get()
+    if current is None:
+        current = PerformanceProfiler()
+        _current_profiler.set(current)
+    return current
+
+def reset_profiler() -> PerformanceProfiler:
+    """Start a fresh profiler for the current request context"""
+    current = PerformanceProfiler()
+    _current_profiler.set(current)
+    return current
+
+class _ProfilerProxy:
+    """Module-level handle that forwards to the current context's profiler"""
+    def __getattr__(self, name):
+        return getattr(get_profiler(), name)
+
+profiler = _ProfilerProxy()
+
+# Pipeline metrics served at /metrics
+AGENT_DURATION = metrics.histogram('pathfinder_agent_duration_seconds', 'Run time of each pipeline node', ('agent',))
+LLM_CALL_DURATION = metrics.histogram('pathfinder_llm_call_duration_seconds',
+                                      'LLM call latency, including the SDK\'s retries', ('agent', 'outcome'))
+LLM_TOKENS = metrics.counter('pathfinder_llm_tokens_total', 'LLM tokens by agent and kind', ('agent', 'kind'))
+LLM_RETRIES = metrics.counter('pathfinder_llm_retries_total', 'HTTP retries made by the OpenAI SDK', ('agent',))
+FALLBACKS = metrics.counter('pathfinder_fallbacks_total', 'Stages that used their local path instead of the LLM', ('stage',))
+PIPELINE_DURATION = metrics.histogram('pathfinder_pipeline_duration_seconds', 'End-to-end pipeline run time', ('topology',))
 
 # Load curated data files with caching
 def load_data_files():
@@ -94,8 +188,11 @@ def load_data_files():
     print("⚠️  Curated data files not found, using AI-only mode")
     return {}, {}
 
-# Load the curated data globally
+# Load the curated data globally; templates and cached roadmaps are stamped with the version
+# read here, so data edited on disk only takes effect (and invalidates them) after a restart
+DATA_VERSION = get_data_version()
 JOB_ROLES_DATA, COURSES_DATA = load_data_files()
+SKILL_PREREQUISITES, SKILL_ALIASES = load_prerequisites()
 
 # Read environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -110,11 +207,17 @@ if not LANGSMITH_API_KEY:
 PERFORMANCE_CONFIG = {
     'max_gaps_to_process': 8,  # Restored to original
     'max_courses_per_skill': 6,  # Restored to original
-    'max_generation_time': 30.0,  # Increased for slower, more thorough processing
+    'max_generation_time': float(os.getenv('ROADMAP_TIME_BUDGET_SECONDS', '30')),  # End-to-end deadline per request
     'llm_timeout': 30.0,  # Allow plenty of time for LLM calls
+    'llm_max_retries': 0,  # Retries would overrun the request deadline; degrade locally instead
+    'min_llm_budget': 3.0,  # Below this much remaining time, stages switch to local paths
+    'deadline_reserve': 0.5,  # Time kept back for post-processing after the last LLM call
+    'pipeline_topology': os.getenv('PIPELINE_TOPOLOGY', 'three_call'),  # 'three_call' or 'fused'
+    'roadmap_generation_mode': os.getenv('ROADMAP_GENERATION_MODE', 'single'),  # 'single', 'per_phase' or 'local'
     'enable_parallel_processing': False,  # Disabled for simplicity
-    'enable_caching': False,  # Disabled to avoid caching issues
-    'max_cache_entries': 100
+    'enable_caching': os.getenv('ROADMAP_CACHE', 'true').lower() == 'true',  # Share roadmaps between identical gap sets
+    'enable_coalescing': os.getenv('REQUEST_COALESCING', 'true').lower() == 'true',  # Share in-flight identical work
+    'max_cache_entries': int(os.getenv('ROADMAP_CACHE_SIZE', '100'))
 }
 
 # Time estimation configuration
@@ -133,6 +236,195 @@ class MyState(TypedDict, total=False):
     roadmap: list[dict]
     time_estimates: dict
     performance_data: dict
+    deadline: float  # Epoch seconds by which the whole pipeline must finish
+    degraded_stages: list[str]  # Stages that fell back to local paths
+    roadmap_mode: str  # Overrides PERFORMANCE_CONFIG['roadmap_generation_mode'] for this run
+    roadmap_source: str  # 'llm', 'cache', 'template', 'local' or 'fallback'
+    readiness: dict  # Role readiness scores, when requested alongside the roadmap
+    weekly_hours: int  # Study hours per week for time estimates (default from TIME_ESTIMATION_CONFIG)
+
+def get_remaining_budget(state) -> float:
+    """Seconds left before the request deadline (configured LLM timeout if no deadline is set)"""
+    deadline = state.get('deadline')
+    if deadline is None:
+        return PERFORMANCE_CONFIG['llm_timeout']
+    return deadline - time.time()
+
+def get_llm_budget(state) -> Optional[float]:
+    """LLM timeout for the next call, or None when too little time is left to call the LLM"""
+    budget = min(PERFORMANCE_CONFIG['llm_timeout'], get_remaining_budget(state) - PERFORMANCE_CONFIG['deadline_reserve'])
+    if budget < PERFORMANCE_CONFIG['min_llm_budget']:
+        return None
+    return budget
+
+def mark_degraded(state, stage: str, reason: str):
+    """Record that a stage used its local path instead of the LLM"""
+    print(f"⏬ {stage} degraded to local path: {reason}")
+    FALLBACKS.labels(stage).inc()
+    state['degraded_stages'] = state.get('degraded_stages', []) + [stage]
+
+def throttle_budget(llm_budget: Optional[float]) -> Optional[float]:
+    """Longest rate limiter wait that still leaves the call its minimum budget (waiting longer raises RateLimitTimeout)"""
+    if llm_budget is None:
+        return None
+    return max(0.0, llm_budget - PERFORMANCE_CONFIG['min_llm_budget'])
+
+def call_timeout(llm_budget: Optional[float], waited: float) -> float:
+    """Client timeout for a call: what the throttle wait left of the budget"""
+    return PERFORMANCE_CONFIG['llm_timeout'] if llm_budget is None else llm_budget - waited
+
+def budgeted_llm(llm_budget: Optional[float], waited: float):
+    """Shared pooled gpt-4o client whose timeout is what the throttle wait left of the budget"""
+    return get_llm(model="gpt-4o", temperature=0, timeout=call_timeout(llm_budget, waited),
+                   max_retries=PERFORMANCE_CONFIG['llm_max_retries'])
+
+def is_deadline_limited(llm_budget: Optional[float], waited: float) -> bool:
+    """Whether the request's deadline cut the call's timeout below the configured one (its timeouts are not upstream failures)"""
+    timeout = llm_clients.quantize_timeout(call_timeout(llm_budget, waited))
+    return timeout < llm_clients.quantize_timeout(PERFORMANCE_CONFIG['llm_timeout'])
+
+def invoke_llm(prompt: str, expected_completion_tokens: int = 500, llm_budget: Optional[float] = None,
+               agent: str = 'pipeline'):
+    """
+    Invoke the LLM through the shared circuit breaker and rate limiter, recording throttle wait and usage for the request.
+
+    The throttle wait and the call share llm_budget, so the call's timeout is
+    whatever the wait left over.
+    """
+    with span('llm_call', agent=agent) as call_span:
+        # Fail fast while the breaker is open so callers fall back without queueing
+        circuit_breaker.check()
+        
+        estimated_tokens = estimate_tokens(prompt) + expected_completion_tokens
+        wait_time = rate_limiter.acquire(estimated_tokens, max_wait=throttle_budget(llm_budget))
+        profiler.record_throttle_wait(wait_time)
+        llm = budgeted_llm(llm_budget, wait_time)
+        
+        attempts = count_http_attempts()
+        start = time.perf_counter()
+        try:
+            response = circuit_breaker.call(llm.invoke, [HumanMessage(content=prompt)],
+                                            deadline_limited=is_deadline_limited(llm_budget, wait_time))
+        except Exception:
+            LLM_CALL_DURATION.labels(agent, 'error').observe(time.perf_counter() - start)
+            profiler.record_llm_failure(agent, response_model(llm, None), attempts[0])
+            raise
+        LLM_CALL_DURATION.labels(agent, 'ok').observe(time.perf_counter() - start)
+        usage = record_llm_usage(llm, prompt, estimated_tokens, response, agent, attempts[0])
+        call_span.set(throttle_wait=round(wait_time, 3), **usage)
+        return response
+
+async def ainvoke_llm(prompt: str, expected_completion_tokens: int = 500, llm_budget: Optional[float] = None,
+                      agent: str = 'pipeline'):
+    """Async invoke_llm: awaits the model's ainvoke through the same breaker and limiter"""
+    with span('llm_call', agent=agent) as call_span:
+        circuit_breaker.check()
+        
+        estimated_tokens = estimate_tokens(prompt) + expected_completion_tokens
+        # Sync and async callers share the limiter's FIFO queue, so only a throttled wait moves to a worker thread
+        if rate_limiter.try_acquire(estimated_tokens):
+            wait_time = 0.0
+        else:
+            wait_time = await asyncio.to_thread(rate_limiter.acquire, estimated_tokens, throttle_budget(llm_budget))
+        profiler.record_throttle_wait(wait_time)
+        llm = budgeted_llm(llm_budget, wait_time)
+        
+        attempts = count_http_attempts()
+        start = time.perf_counter()
+        try:
+            response = await circuit_breaker.acall(llm.ainvoke, [HumanMessage(content=prompt)],
+                                                   deadline_limited=is_deadline_limited(llm_budget, wait_time))
+        except Exception:
+            LLM_CALL_DURATION.labels(agent, 'error').observe(time.perf_counter() - start)
+            profiler.record_llm_failure(agent, response_model(llm, None), attempts[0])
+            raise
+        LLM_CALL_DURATION.labels(agent, 'ok').observe(time.perf_counter() - start)
+        usage = record_llm_usage(llm, prompt, estimated_tokens, response, agent, attempts[0])
+        call_span.set(throttle_wait=round(wait_time, 3), **usage)
+        return response
+
+def record_llm_usage(llm, prompt: str, estimated_tokens: int, response, agent: str, attempts: int) -> dict:
+    """Record the call's tokens for the request and correct the token bucket when OpenAI reports real usage"""
+    usage = call_usage(prompt, response, response_model(llm, response), max(1, attempts))
+    profiler.record_llm_call(agent, usage)
+    LLM_TOKENS.labels(agent, 'prompt').inc(usage['prompt_tokens'])
+    LLM_TOKENS.labels(agent, 'completion').inc(usage['completion_tokens'])
+    if usage['retries']:
+        LLM_RETRIES.labels(agent).inc(usage['retries'])
+    if not usage['estimated']:
+        rate_limiter.record_usage(estimated_tokens, usage['total_tokens'])
+    return usage
+
+# In-flight deduplication of identical concurrent pipeline runs and agent steps
+pipeline_flights = SingleFlight('pipeline')
+agent_flights = SingleFlight('agent')
+
+def observed_node(name: str, node):
+    """Graph node (sync or async) that records its run time in the agent latency histogram and a trace span"""
+    histogram = AGENT_DURATION.labels(name)
+    
+    if inspect.iscoroutinefunction(node):
+        @wraps(node)
+        async def async_wrapper(state):
+            start = time.perf_counter()
+            try:
+                with span(f'node {name}', agent=name):
+                    return await node(state)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return async_wrapper
+    
+    @wraps(node)
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            with span(f'node {name}', agent=name):
+                return node(state)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+def coalesced_agent(name: str, key_fn, outputs: Tuple[str, ...]):
+    """Share one execution of an agent (sync or async) between concurrent runs whose key inputs match"""
+    def decorator(agent):
+        def isolated(state):
+            # Run on a copy so only the agent's own outputs are shared
+            local_state = dict(state)
+            local_state['degraded_stages'] = []
+            return local_state
+        
+        def shareable(result):
+            return {field: result[field] for field in outputs if field in result}, result.get('degraded_stages', [])
+        
+        def apply(state, outcome):
+            values, degraded_stages = outcome.result
+            state.update(values)
+            state['degraded_stages'] = state.get('degraded_stages', []) + degraded_stages
+            profiler.record_coalescing(name, outcome.shared, outcome.waiters)
+            return state
+        
+        if inspect.iscoroutinefunction(agent):
+            @wraps(agent)
+            async def async_wrapper(state):
+                if not PERFORMANCE_CONFIG['enable_coalescing']:
+                    return await agent(state)
+                
+                async def run():
+                    return shareable(await agent(isolated(state)))
+                
+                outcome = await agent_flights.ado((name,) + key_fn(state), run, timeout=max(0.0, get_remaining_budget(state)))
+                return apply(state, outcome)
+            return async_wrapper
+        
+        @wraps(agent)
+        def wrapper(state):
+            if not PERFORMANCE_CONFIG['enable_coalescing']:
+                return agent(state)
+            outcome = agent_flights.do((name,) + key_fn(state), lambda: shareable(agent(isolated(state))),
+                                       timeout=max(0.0, get_remaining_budget(state)))
+            return apply(state, outcome)
+        return wrapper
+    return decorator
 
 def get_priority_skills(missing_skills: list, nice_to_have: list, max_count: int = 8) -> Tuple[List[str], List[str]]:
     """Trim input to top priority skills"""
@@ -193,39 +485,35 @@ def get_course_candidates_parallel(skills: List[str]) -> Dict[str, List[str]]:
     profiler.end_timer('course_retrieval')
     return course_candidates
 
-def agent3_roadmap_mentor_optimized(state):
-    """Optimized learning roadmap generation with performance profiling"""
-    profiler.start_timer('roadmap_generation_total')
-    
-    missing_skills = state.get('missing_skills', [])
-    nice_to_have = state.get('nice_to_have', [])
-    target_role = state.get('target_role', '')
-    
-    print(f"🔄 Generating new roadmap")
-    
-    # Step 1: Input trimming
-    priority_missing, priority_nice = get_priority_skills(
-        missing_skills, nice_to_have, PERFORMANCE_CONFIG['max_gaps_to_process']
-    )
-    
-    all_priority_skills = priority_missing + priority_nice
-    print(f"📊 Processing {len(all_priority_skills)} priority skills out of {len(missing_skills + nice_to_have)} total")
-    
-    # Step 2: Parallel course retrieval
-    course_candidates = get_course_candidates_parallel(all_priority_skills)
-    
-    # Step 3: Prepare compact course information for LLM
-    profiler.start_timer('llm_prompt_preparation')
-    
+@dataclass
+class RoadmapPlan:
+    """What agent3 prepares before deciding how the roadmap is produced"""
+    target_role: str
+    mode: str
+    priority_missing: List[str]
+    priority_nice: List[str]
+    course_candidates: Dict[str, List[str]]
+    prompt: str
+    template_roadmap: Optional[List[dict]] = None
+    cache_key: Optional[str] = None
+    cached_roadmap: Optional[List[dict]] = None
+    
+    @property
+    def skills(self) -> List[str]:
+        return self.priority_missing + self.priority_nice
+
+def build_roadmap_prompt(priority_missing: List[str], priority_nice: List[str],
+                         course_candidates: Dict[str, List[str]]) -> str:
+    """Prompt for agent3's single-call roadmap generation"""
     curated_courses_info = ""
     if course_candidates:
         for skill, courses in course_candidates.items():
             course_list = ", ".join(courses[:3])  # Max 3 courses per skill
             curated_courses_info += f"{skill}: {course_list}\\n"
     
-    # Step 4: Enhanced LLM prompt to request time estimates
+    # Enhanced LLM prompt to request time estimates
     if curated_courses_info:
-        prompt = f"""Create JSON roadmap using these courses:
+        return f"""Create JSON roadmap using these courses:
 {curated_courses_info}
 
 Build a 3-phase plan (Foundation, Applied, Capstone) with 9-12 steps total. Each step includes skill, course, reason, and est_hours (estimated learning hours).
@@ -238,15 +526,14 @@ NICE: {priority_nice}
 
 Guidelines for est_hours:
 - Basic tools (Git, Excel): 6-8 hours
-- Web technologies (HTML, CSS): 8-10 hours  
+- Web technologies (HTML, CSS): 8-10 hours
 - Cloud platforms: 10-12 hours
 - Databases: 12-15 hours
 - Programming languages/frameworks: 15-20 hours
 - Data science/ML: 18-25 hours
 
 Return only valid JSON, max 10 words per reason."""
-    else:
-        prompt = f"""Create JSON roadmap for skills transition.
+    return f"""Create JSON roadmap for skills transition.
 
 Build a 3-phase plan (Foundation, Applied, Capstone) with 9-12 steps total. Each step includes skill, course, reason, and est_hours (estimated learning hours).
 
@@ -258,44 +545,112 @@ NICE: {priority_nice}
 
 Guidelines for est_hours:
 - Basic tools: 6-8 hours
-- Web technologies: 8-10 hours  
+- Web technologies: 8-10 hours
 - Cloud platforms: 10-12 hours
 - Databases: 12-15 hours
 - Programming languages: 15-20 hours
 - Data science/ML: 18-25 hours
 
 Return only valid JSON, max 10 words per reason."""
+
+def plan_roadmap(state) -> RoadmapPlan:
+    """Trim the gaps, look up templates and cached roadmaps, and gather courses and the prompt"""
+    missing_skills = state.get('missing_skills', [])
+    nice_to_have = state.get('nice_to_have', [])
+    target_role = state.get('target_role', '')
     
-    profiler.end_timer('llm_prompt_preparation')
+    print(f"🔄 Generating new roadmap")
     
-    # Step 5: LLM call with aggressive timeout protection
-    profiler.start_timer('llm_call')
+    # Step 1: Input trimming
+    priority_missing, priority_nice = get_priority_skills(
+        missing_skills, nice_to_have, PERFORMANCE_CONFIG['max_gaps_to_process']
+    )
     
-    try:
-        llm = ChatOpenAI(model="gpt-4o", temperature=0, timeout=PERFORMANCE_CONFIG['llm_timeout'])  # Use full gpt-4o model
-        message = HumanMessage(content=prompt)
-        
-        response = llm.invoke([message])
-        # Handle response content properly
-        content = response.content if isinstance(response.content, str) else str(response.content)
-        roadmap_result = parse_llm_response(content)
-        
-        # If parsing failed, use fallback
-        if not roadmap_result:
-            print("⚠️ LLM response parsing failed, using fallback")
-            roadmap_result = generate_fallback_roadmap(priority_missing, priority_nice)
-            
-    except Exception as e:
-        print(f"❌ LLM call failed: {e}")
-        roadmap_result = generate_fallback_roadmap(priority_missing, priority_nice)
+    all_priority_skills = priority_missing + priority_nice
+    print(f"📊 Processing {len(all_priority_skills)} priority skills out of {len(missing_skills + nice_to_have)} total")
     
-    profiler.end_timer('llm_call')
+    # Step 1b: Personalize the role's precomputed template when it fits the gaps
+    roadmap_mode = state.get('roadmap_mode') or PERFORMANCE_CONFIG['roadmap_generation_mode']
+    template_roadmap = None
+    if TEMPLATE_CONFIG['enabled'] and roadmap_mode != 'local' and all_priority_skills:
+        template_roadmap = get_template_roadmap(priority_missing, priority_nice, target_role)
+    
+    # Step 1c: Reuse a roadmap generated earlier for the same gap set
+    cache_key, cached_roadmap = None, None
+    if PERFORMANCE_CONFIG['enable_caching'] and roadmap_mode != 'local' and template_roadmap is None and all_priority_skills:
+        engine = get_roadmap_engine()
+        cache_key = make_cache_key(
+            target_role,
+            [engine.canonicalize(skill) for skill in priority_missing],
+            [engine.canonicalize(skill) for skill in priority_nice],
+            roadmap_mode, DATA_VERSION
+        )
+        with span('cache_lookup', cache='roadmap') as lookup_span:
+            cached_roadmap = roadmap_cache.get(cache_key)
+            lookup_span.set(hit=cached_roadmap is not None)
+        profiler.record_cache_lookup(cached_roadmap is not None)
     
-    # Step 6: Post-processing with time estimates
-    profiler.start_timer('post_processing')
+    # Step 2: Parallel course retrieval
+    course_candidates = get_course_candidates_parallel(all_priority_skills)
     
+    # Step 3: Compact course information and prompt for the LLM
+    profiler.start_timer('llm_prompt_preparation')
+    prompt = build_roadmap_prompt(priority_missing, priority_nice, course_candidates)
+    profiler.end_timer('llm_prompt_preparation')
+
+    return RoadmapPlan(
+        target_role=target_role,
+        mode=roadmap_mode,
+        priority_missing=priority_missing,
+        priority_nice=priority_nice,
+        course_candidates=course_candidates,
+        prompt=prompt,
+        template_roadmap=template_roadmap,
+        cache_key=cache_key,
+        cached_roadmap=cached_roadmap
+    )
+
+def fallback_roadmap(state, plan: RoadmapPlan, reason: str) -> List[dict]:
+    """Degrade agent3 to the local prerequisite-ordered roadmap"""
+    mark_degraded(state, 'agent3', reason)
+    state['roadmap_source'] = 'fallback'
+    return generate_fallback_roadmap(plan.priority_missing, plan.priority_nice, plan.target_role)
+
+def resolve_roadmap_locally(state, plan: RoadmapPlan, llm_budget: Optional[float]) -> Optional[List[dict]]:
+    """Roadmap from the local engine, a template, the cache or the deadline fallback; None when the LLM should generate it"""
+    state['roadmap_source'] = 'llm'
+    if plan.mode == 'local':
+        # Zero-LLM mode: prerequisite-ordered roadmap from curated data
+        state['roadmap_source'] = 'local'
+        return get_roadmap_engine().build_roadmap(plan.priority_missing, plan.priority_nice, plan.target_role)
+    if plan.template_roadmap is not None:
+        state['roadmap_source'] = 'template'
+        return plan.template_roadmap
+    if plan.cached_roadmap is not None:
+        state['roadmap_source'] = 'cache'
+        return plan.cached_roadmap
+    if llm_budget is None:
+        return fallback_roadmap(state, plan, 'request deadline nearly reached')
+    return None
+
+def parse_roadmap_response(state, plan: RoadmapPlan, response) -> List[dict]:
+    """Parse agent3's single-call LLM response, falling back locally when it is unusable"""
+    # Handle response content properly
+    content = response.content if isinstance(response.content, str) else str(response.content)
+    roadmap_result = parse_llm_response(content)
+
+    # If parsing failed, use fallback
+    if not roadmap_result:
+        print("⚠️ LLM response parsing failed, using fallback")
+        return fallback_roadmap(state, plan, 'unparseable LLM response')
+    return roadmap_result
+
+def finish_roadmap(state, plan: RoadmapPlan, roadmap_result: List[dict]):
+    """Add time estimates, cache clean LLM output and attach the performance report"""
+    profiler.start_timer('post_processing')
+
     # Apply time estimation to the roadmap
-    enhanced_roadmap_data = calculate_time_estimates(roadmap_result)
+    enhanced_roadmap_data = calculate_time_estimates(roadmap_result, state.get('weekly_hours'))
     
     # Update state with enhanced roadmap structure
     state['roadmap'] = enhanced_roadmap_data['phases']
@@ -306,9 +661,9 @@ Return only valid JSON, max 10 words per reason."""
         'weekly_hours': enhanced_roadmap_data['weekly_hours']
     }
     
-    # Cache the result (disabled for simplicity)
-    # if PERFORMANCE_CONFIG['enable_caching']:
-    #     profiler.cache_set(cache_key, roadmap_result)
+    # Cache only clean LLM output so degraded roadmaps are regenerated next time
+    if plan.cache_key and state['roadmap_source'] == 'llm' and 'agent3' not in state.get('degraded_stages', []):
+        roadmap_cache.put(plan.cache_key, roadmap_result)
     
     profiler.end_timer('post_processing')
     profiler.end_timer('roadmap_generation_total')
@@ -328,6 +683,177 @@ Return only valid JSON, max 10 words per reason."""
     
     return state
 
+def roadmap_flight_key(state) -> tuple:
+    """Inputs that fully determine agent3's output"""
+    return (state.get('target_role', ''), tuple(state.get('missing_skills', [])),
+            tuple(state.get('nice_to_have', [])), state.get('roadmap_mode') or '', state.get('weekly_hours'))
+
+ROADMAP_OUTPUTS = ('roadmap', 'time_estimates', 'roadmap_source', 'performance_data')
+
+@coalesced_agent('agent3', roadmap_flight_key, ROADMAP_OUTPUTS)
+def agent3_roadmap_mentor_optimized(state):
+    """Optimized learning roadmap generation with performance profiling"""
+    profiler.start_timer('roadmap_generation_total')
+    plan = plan_roadmap(state)
+    
+    # LLM call bounded by the remaining request budget
+    profiler.start_timer('llm_call')
+    llm_budget = get_llm_budget(state)
+    roadmap_result = resolve_roadmap_locally(state, plan, llm_budget)
+    if roadmap_result is None and plan.mode == 'per_phase' and plan.skills:
+        roadmap_result, failed_phases = generate_roadmap_per_phase(
+            plan.priority_missing, plan.priority_nice, plan.course_candidates, plan.target_role, llm_budget
+        )
+        if failed_phases:
+            mark_degraded(state, 'agent3', f"local steps for {', '.join(failed_phases)}")
+    elif roadmap_result is None:
+        try:
+            response = invoke_llm(plan.prompt, expected_completion_tokens=1200, llm_budget=llm_budget, agent='agent3')
+            roadmap_result = parse_roadmap_response(state, plan, response)
+        except Exception as e:
+            print(f"❌ LLM call failed: {e}")
+            roadmap_result = fallback_roadmap(state, plan, str(e))
+    profiler.end_timer('llm_call')
+    
+    return finish_roadmap(state, plan, roadmap_result)
+
+@coalesced_agent('agent3', roadmap_flight_key, ROADMAP_OUTPUTS)
+async def agent3_roadmap_mentor_async(state):
+    """Async agent3: same plan and fallbacks, with the LLM calls awaited"""
+    profiler.start_timer('roadmap_generation_total')
+    plan = plan_roadmap(state)
+    
+    profiler.start_timer('llm_call')
+    llm_budget = get_llm_budget(state)
+    roadmap_result = resolve_roadmap_locally(state, plan, llm_budget)
+    if roadmap_result is None and plan.mode == 'per_phase' and plan.skills:
+        roadmap_result, failed_phases = await generate_roadmap_per_phase_async(
+            plan.priority_missing, plan.priority_nice, plan.course_candidates, plan.target_role, llm_budget
+        )
+        if failed_phases:
+            mark_degraded(state, 'agent3', f"local steps for {', '.join(failed_phases)}")
+    elif roadmap_result is None:
+        try:
+            response = await ainvoke_llm(plan.prompt, expected_completion_tokens=1200, llm_budget=llm_budget,
+                                         agent='agent3')
+            roadmap_result = parse_roadmap_response(state, plan, response)
+        except Exception as e:
+            print(f"❌ LLM call failed: {e}")
+            roadmap_result = fallback_roadmap(state, plan, str(e))
+    profiler.end_timer('llm_call')
+    
+    return finish_roadmap(state, plan, roadmap_result)
+
+def assign_skills_to_phases(missing_skills: List[str], nice_to_have: List[str]) -> List[Tuple[str, List[str]]]:
+    """Split priority skills across Foundation, Applied and Capstone phases in prerequisite order"""
+    return get_roadmap_engine().assign_phases(missing_skills, nice_to_have)
+
+def local_phase_steps(skills: List[str]) -> List[dict]:
+    """Curated course and heuristic hours for each skill, used when a phase call fails"""
+    steps = []
+    for skill in skills:
+        _, course_list = get_courses_for_skill_optimized(skill)
+        steps.append({
+            "skill": skill,
+            "course": course_list[0] if course_list else f"Learn {skill} - Online Course",
+            "reason": f"Essential {skill} skills",
+            "est_hours": estimate_skill_hours(skill)
+        })
+    return steps
+
+def build_phase_prompt(phase: str, skills: List[str], course_candidates: Dict[str, List[str]], target_role: str) -> str:
+    """Prompt for the steps of a single roadmap phase"""
+    courses_info = "\n".join(
+        f"{skill}: {', '.join(course_candidates[skill][:3])}" for skill in skills if skill in course_candidates
+    )
+    return f"""Create JSON learning steps for {phase} of a roadmap towards {target_role}.
+One step per skill, in learning order. Each step includes skill, course, reason, and est_hours (estimated learning hours).
+
+PHASE SKILLS: {skills}
+COURSES:
+{courses_info or 'No curated courses; suggest one well-known course per skill.'}
+
+Required JSON format:
+{{"skills": [{{"skill": "Python", "course": "Python for Everybody - Coursera", "reason": "Good for beginners", "est_hours": 15}}]}}
+
+Guidelines for est_hours:
+- Basic tools (Git, Excel): 6-8 hours
+- Web technologies (HTML, CSS): 8-10 hours
+- Cloud platforms: 10-12 hours
+- Databases: 12-15 hours
+- Programming languages/frameworks: 15-20 hours
+- Data science/ML: 18-25 hours
+
+Return only valid JSON, max 10 words per reason."""
+
+def parse_phase_steps(phase: str, response) -> List[dict]:
+    """Steps from a phase call's response (raises when there are none)"""
+    steps = parse_json_response(response).get('skills', [])
+    if not isinstance(steps, list) or not steps:
+        raise ValueError(f"no steps returned for {phase}")
+    return [step for step in steps if isinstance(step, dict) and step.get('skill')]
+
+def generate_phase_steps(phase: str, skills: List[str], course_candidates: Dict[str, List[str]],
+                         target_role: str, llm_budget: float) -> List[dict]:
+    """Generate the steps of a single roadmap phase with one LLM call"""
+    prompt = build_phase_prompt(phase, skills, course_candidates, target_role)
+    response = invoke_llm(prompt, expected_completion_tokens=60 * len(skills) + 40, llm_budget=llm_budget,
+                          agent='agent3')
+    return parse_phase_steps(phase, response)
+
+async def generate_phase_steps_async(phase: str, skills: List[str], course_candidates: Dict[str, List[str]],
+                                     target_role: str, llm_budget: float) -> List[dict]:
+    """Async generate_phase_steps"""
+    prompt = build_phase_prompt(phase, skills, course_candidates, target_role)
+    response = await ainvoke_llm(prompt, expected_completion_tokens=60 * len(skills) + 40, llm_budget=llm_budget,
+                                 agent='agent3')
+    return parse_phase_steps(phase, response)
+
+def assemble_phases(phase_assignments: List[Tuple[str, List[str]]], outcomes: list) -> Tuple[List[dict], List[str]]:
+    """Pair each phase with its generated steps, using local steps for phases whose call failed"""
+    roadmap, failed_phases = [], []
+    for (phase, skills), steps in zip(phase_assignments, outcomes):
+        if isinstance(steps, BaseException):
+            print(f"❌ {phase} LLM call failed: {steps}")
+            failed_phases.append(phase)
+            steps = local_phase_steps(skills)
+        roadmap.append({"phase": phase, "skills": steps})
+    return roadmap, failed_phases
+
+def generate_roadmap_per_phase(missing_skills: List[str], nice_to_have: List[str],
+                               course_candidates: Dict[str, List[str]], target_role: str,
+                               llm_budget: float) -> Tuple[List[dict], List[str]]:
+    """Generate each phase with a concurrent LLM call; returns the roadmap and the phases that fell back locally"""
+    phase_assignments = assign_skills_to_phases(missing_skills, nice_to_have)
+    
+    with ThreadPoolExecutor(max_workers=len(phase_assignments)) as executor:
+        # Each worker runs in a copy of this context so the request profiler follows the call
+        futures = [
+            executor.submit(contextvars.copy_context().run, generate_phase_steps,
+                            phase, skills, course_candidates, target_role, llm_budget)
+            for phase, skills in phase_assignments
+        ]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+    
+    return assemble_phases(phase_assignments, outcomes)
+
+async def generate_roadmap_per_phase_async(missing_skills: List[str], nice_to_have: List[str],
+                                           course_candidates: Dict[str, List[str]], target_role: str,
+                                           llm_budget: float) -> Tuple[List[dict], List[str]]:
+    """Async generate_roadmap_per_phase: phase calls are gathered on the event loop"""
+    phase_assignments = assign_skills_to_phases(missing_skills, nice_to_have)
+    outcomes = await asyncio.gather(
+        *(generate_phase_steps_async(phase, skills, course_candidates, target_role, llm_budget)
+          for phase, skills in phase_assignments),
+        return_exceptions=True
+    )
+    return assemble_phases(phase_assignments, outcomes)
+
 def parse_llm_response(content: str) -> List[dict]:
     """Parse LLM response with error handling"""
     try:
@@ -439,43 +965,158 @@ def estimate_skill_hours(skill: str) -> int:
     else:
         return 10
 
-def generate_fallback_roadmap(missing_skills: List[str], nice_to_have: List[str]) -> List[dict]:
-    """Generate a basic roadmap when LLM fails or times out"""
-    all_skills = missing_skills + nice_to_have
-    
-    if not all_skills:
-        return []
-    
-    # Simple 3-phase distribution
-    skills_per_phase = max(1, len(all_skills) // 3)
-    
-    roadmap = []
-    phases = ["Phase 1: Foundation", "Phase 2: Intermediate", "Phase 3: Advanced"]
+@lru_cache(maxsize=1)
+def get_roadmap_engine() -> RoadmapEngine:
+    """Prerequisite-DAG roadmap engine over the curated course index (built once)"""
+    return RoadmapEngine(SKILL_PREREQUISITES, COURSES_DATA, estimate_skill_hours, SKILL_ALIASES)
+
+def generate_fallback_roadmap(missing_skills: List[str], nice_to_have: List[str], target_role: str = "") -> List[dict]:
+    """Generate a prerequisite-ordered roadmap locally when the LLM fails, times out or is not used"""
+    return get_roadmap_engine().build_roadmap(missing_skills, nice_to_have, target_role)
+
+def update_roadmap_incrementally(phases: List[dict], learned_skills: List[str], added_skills: List[str],
+                                 target_role: str = "", weekly_hours: Optional[int] = None,
+                                 use_llm: bool = False) -> dict:
+    """
+    Apply a skill delta to a stored roadmap instead of regenerating it.
+
+    Steps for learned skills are dropped; added skills get steps from the
+    course index (or one small LLM call for just those skills with use_llm),
+    placed by prerequisites, and time estimates are recomputed.
+    """
+    engine = get_roadmap_engine()
+    learned = {engine.canonicalize(skill) for skill in learned_skills}
+    
+    # (phase, step) pairs in learning order; phases keep their existing steps
+    steps = [(phase.get('phase', ''), dict(step)) for phase in phases if isinstance(phase, dict)
+             for step in phase.get('skills', []) if isinstance(step, dict)]
+    removed = [step['skill'] for _, step in steps if engine.canonicalize(step.get('skill', '')) in learned]
+    steps = [(phase, step) for phase, step in steps if engine.canonicalize(step.get('skill', '')) not in learned]
+    
+    present = {engine.canonicalize(step.get('skill', '')) for _, step in steps}
+    added = [skill for skill in dict.fromkeys(engine.canonicalize(s) for s in added_skills)
+             if skill not in present and skill not in learned]
+    
+    source = 'local'
+    new_steps = [step for phase in engine.build_roadmap(added, [], target_role) for step in phase['skills']]
+    if added and use_llm:
+        llm_budget = get_llm_budget({'deadline': time.time() + PERFORMANCE_CONFIG['llm_timeout']})
+        try:
+            llm_steps = generate_phase_steps("New skills", added, get_course_candidates_parallel(added), target_role, llm_budget)
+            # Keep the prerequisite order; skills the LLM skipped keep their local step
+            by_skill = {engine.canonicalize(step['skill']): step for step in llm_steps}
+            new_steps = [by_skill.get(engine.canonicalize(step['skill']), step) for step in new_steps]
+            source = 'llm'
+        except Exception as e:
+            print(f"❌ Incremental update LLM call failed, using course index: {e}")
+            source = 'fallback'
+    
+    for step in new_steps:
+        index = engine.insertion_index([engine.canonicalize(existing.get('skill', '')) for _, existing in steps],
+                                       engine.canonicalize(step['skill']))
+        # A new step joins the phase of its neighbour, or the first phase of an empty roadmap
+        neighbour = steps[index - 1] if index > 0 else (steps[0] if steps else (ROADMAP_PHASES[0], None))
+        steps.insert(index, (neighbour[0], step))
+    
+    updated = []
+    for phase, step in steps:
+        if not updated or updated[-1]['phase'] != phase:
+            updated.append({'phase': phase, 'skills': []})
+        updated[-1]['skills'].append(step)
+    
+    estimates = calculate_time_estimates(updated, weekly_hours)
+    return {
+        'roadmap': estimates['phases'],
+        'time_estimates': {key: estimates[key] for key in ('overall_total_hours', 'overall_buffered_hours',
+                                                             'overall_time_frame', 'weekly_hours')},
+        'removed': removed,
+        'added': [step['skill'] for step in new_steps],
+        'source': source
+    }
+
+# Per-role roadmap templates, persisted alongside the curated data
+template_store = TemplateStore(TEMPLATE_CONFIG['path'])
+
+# Roadmaps shared between requests with the same gap set
+roadmap_cache = RoadmapCache(
+    max_entries=PERFORMANCE_CONFIG['max_cache_entries'],
+    ttl_seconds=ROADMAP_CACHE_CONFIG['ttl_seconds'],
+    db_path=ROADMAP_CACHE_CONFIG['db_path']
+)
+
+# Per-session pipeline checkpoints for resuming retries (None when disabled)
+checkpoint_store = CheckpointStore(
+    db_path=CHECKPOINT_CONFIG['db_path'],
+    ttl_seconds=CHECKPOINT_CONFIG['ttl_seconds'],
+    prune_interval=CHECKPOINT_CONFIG['prune_interval']
+) if CHECKPOINT_CONFIG['enabled'] else None
+
+def pipeline_metric_samples():
+    """Counters the pipeline's caches, flights and breaker keep themselves, read when /metrics is scraped"""
+    roadmap, templates, clients = roadmap_cache.stats(), template_store.stats(), llm_clients.stats()
+    yield ('pathfinder_cache_requests_total', 'counter', 'Cache lookups by cache layer and result', [
+        ({'cache': 'roadmap', 'result': 'hit'}, roadmap['hits']),
+        ({'cache': 'roadmap', 'result': 'miss'}, roadmap['misses']),
+        ({'cache': 'template', 'result': 'hit'}, templates['hits']),
+        ({'cache': 'template', 'result': 'miss'}, templates['misses'] + templates['stale']),
+        ({'cache': 'llm_client', 'result': 'hit'}, clients['client_hits']),
+        ({'cache': 'llm_client', 'result': 'miss'}, clients['clients_created'])
+    ])
+    yield ('pathfinder_cache_entries', 'gauge', 'Entries held by each cache layer', [
+        ({'cache': 'roadmap'}, roadmap['entries']),
+        ({'cache': 'template'}, templates['templates']),
+        ({'cache': 'llm_client'}, clients['cached_clients'])
+    ])
+    flights = {'pipeline': pipeline_flights.stats(), 'agent': agent_flights.stats()}
+    yield ('pathfinder_coalesced_calls_total', 'counter', 'Callers that shared an in-flight run instead of starting one',
+           [({'scope': scope}, stats['coalesced_calls']) for scope, stats in flights.items()])
+    breaker = circuit_breaker.stats()
+    yield ('pathfinder_llm_circuit_open', 'gauge', 'Whether the LLM circuit breaker is rejecting calls (1) or not (0)',
+           [({}, 1 if breaker['state'] == 'open' else 0)])
+    yield ('pathfinder_llm_short_circuited_calls_total', 'counter', 'LLM calls rejected by the open breaker',
+           [({}, breaker['short_circuited_calls'])])
+
+metrics.register_collector(pipeline_metric_samples)
+
+def build_role_template(role: str, use_llm: bool = True) -> Optional[RoadmapTemplate]:
+    """Generate the full roadmap template for a curated role (None if it could not be built cleanly)"""
+    skills = JOB_ROLES_DATA.get(role)
+    if not skills:
+        return None
+    if not use_llm:
+        roadmap = get_roadmap_engine().build_roadmap(skills, [], role)
+        return RoadmapTemplate(role=role, version=DATA_VERSION, roadmap=roadmap, source='local', created_at=time.time())
     
-    for i, phase in enumerate(phases):
-        start_idx = i * skills_per_phase
-        end_idx = start_idx + skills_per_phase if i < 2 else len(all_skills)
-        phase_skills = all_skills[start_idx:end_idx]
-        
-        if phase_skills:
-            skills_data = []
-            for skill in phase_skills:
-                # Get course from curated data if available
-                skill_name, course_list = get_courses_for_skill_optimized(skill)
-                course_title = course_list[0] if course_list else f"Learn {skill} - Online Course"
-                
-                skills_data.append({
-                    "skill": skill,
-                    "course": course_title,
-                    "reason": f"Essential {skill} skills",
-                    "est_hours": estimate_skill_hours(skill)
-                })
-            
-            roadmap.append({
-                "phase": phase,
-                "skills": skills_data
-            })
+    course_candidates = get_course_candidates_parallel(skills)
+    roadmap, failed_phases = generate_roadmap_per_phase(
+        skills, [], course_candidates, role, PERFORMANCE_CONFIG['llm_timeout']
+    )
+    if failed_phases:
+        # Don't pin partially local output as the role's template; the next miss retries
+        print(f"⚠️ Template for {role} not stored, {len(failed_phases)} phases fell back locally")
+        return None
+    return RoadmapTemplate(role=role, version=DATA_VERSION, roadmap=roadmap, source='llm', created_at=time.time())
+
+def get_template_roadmap(missing_skills: List[str], nice_to_have: List[str], target_role: str) -> Optional[List[dict]]:
+    """Personalize the role's template, or None when the LLM is needed (no template or unusual gaps)"""
+    if target_role not in JOB_ROLES_DATA:
+        return None
     
+    profiler.start_timer('template_lookup')
+    with span('cache_lookup', cache='template') as lookup_span:
+        template = template_store.get(target_role, DATA_VERSION)
+        lookup_span.set(hit=template is not None)
+    if template is None:
+        template_store.build_in_background(target_role, build_role_template)
+        roadmap = None
+    else:
+        engine = get_roadmap_engine()
+        roadmap = personalize_template(
+            template, missing_skills, nice_to_have, engine,
+            lambda skills: [step for phase in engine.build_roadmap(skills, [], target_role) for step in phase['skills']],
+            ROADMAP_PHASES
+        )
+    profiler.end_timer('template_lookup')
     return roadmap
 
 def get_courses_for_skill_optimized(skill: str) -> Tuple[str, List[str]]:
@@ -485,11 +1126,30 @@ def get_courses_for_skill_optimized(skill: str) -> Tuple[str, List[str]]:
             return skill, COURSES_DATA[course_skill][:3]
     return skill, []
 
-def agent1_skill_extractor(state):
-    """Extract skills from user input with enhanced fallback mechanism"""
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    
-    prompt = f"""ROLE: Senior NLP engineer specializing in resume/CV skill extraction.
+def parse_json_response(response) -> dict:
+    """Parse an LLM response as JSON, stripping markdown code fences if present"""
+    content = response.content if isinstance(response.content, str) else str(response.content)
+    content = content.strip()
+    if content.startswith('```json'):
+        content = content.replace('```json', '').replace('```', '').strip()
+    elif content.startswith('```'):
+        content = content.replace('```', '').strip()
+    with span('parse_json', chars=len(content)):
+        return json.loads(content)
+
+def clean_extracted_skills(extracted_skills: list) -> List[str]:
+    """Normalize extracted skills to lowercase hyphenated names without duplicates (max 30)"""
+    cleaned_skills = []
+    for skill in extracted_skills:
+        if isinstance(skill, str) and len(skill.strip()) > 0:
+            normalized_skill = skill.strip().lower().replace(' ', '-')
+            if normalized_skill not in cleaned_skills:
+                cleaned_skills.append(normalized_skill)
+    return cleaned_skills[:30]
+
+def build_extraction_prompt(user_input: str) -> str:
+    """Prompt for agent1's skill extraction call"""
+    return f"""ROLE: Senior NLP engineer specializing in resume/CV skill extraction.
 TASK:
 1. Read the user's raw resume/CV text, project descriptions, or bullet list.
 2. Extract distinct technical skills, tools, frameworks, and technologies.
@@ -507,45 +1167,139 @@ CONSTRAINTS:
 
 Respond ONLY with valid JSON that matches the schema.
 
-USER INPUT: {state.get('input', '')}"""
-    
-    message = HumanMessage(content=prompt)
-    response = llm.invoke([message])
-    
+USER INPUT: {user_input}"""
+
+def degrade_extraction(state, reason: str):
+    """Extract skills by pattern matching instead of the LLM"""
+    mark_degraded(state, 'agent1', reason)
+    state['extracted_skills'] = extract_skills_fallback(state.get('input', ''))
+    return state
+
+def apply_extraction_response(state, response):
+    """Store the skills from agent1's LLM response, with enhanced fallback on bad JSON"""
     try:
-        # Extract JSON from markdown code blocks if present
-        content = response.content if isinstance(response.content, str) else str(response.content)
-        content = content.strip()
-        if content.startswith('```json'):
-            content = content.replace('```json', '').replace('```', '').strip()
-        elif content.startswith('```'):
-            content = content.replace('```', '').strip()
-        
-        result = json.loads(content)
-        extracted_skills = result.get('extracted_skills', [])
-        
-        # Validate and clean the extracted skills
-        cleaned_skills = []
-        for skill in extracted_skills:
-            if isinstance(skill, str) and len(skill.strip()) > 0:
-                # Normalize skill format
-                normalized_skill = skill.strip().lower().replace(' ', '-')
-                if normalized_skill not in cleaned_skills:
-                    cleaned_skills.append(normalized_skill)
-        
-        state['extracted_skills'] = cleaned_skills[:30]  # Limit to 30 skills
-        
+        result = parse_json_response(response)
+        state['extracted_skills'] = clean_extracted_skills(result.get('extracted_skills', []))
+    
     except (json.JSONDecodeError, KeyError) as e:
         print(f"Agent1 JSON parsing error: {e}")
         print(f"Response content: {response.content[:200] if isinstance(response.content, str) else str(response.content)[:200]}...")
         
         # Enhanced fallback mechanism using pattern matching
-        fallback_skills = extract_skills_fallback(state.get('input', ''))
-        state['extracted_skills'] = fallback_skills
-        print(f"Using fallback extraction: {len(fallback_skills)} skills found")
+        degrade_extraction(state, 'unparseable LLM response')
+        print(f"Using fallback extraction: {len(state['extracted_skills'])} skills found")
     
     return state
 
+def prepare_resume_chunks(user_input: str, stage: str, build_prompt, chunked: bool = True) -> List[str]:
+    """Preprocessed resume text for a stage's prompt (in chunks when chunked), recording the token savings"""
+    if not RESUME_PREPROCESSING_CONFIG['enabled'] or not user_input.strip():
+        return [user_input]
+    profiler.start_timer(f'{stage}_resume_preprocessing')
+    with span('resume_preprocessing', stage=stage) as preprocessing_span:
+        prepared = preprocess_resume(user_input)
+        preprocessing_span.set(tokens_before=prepared.original_tokens, tokens_after=prepared.tokens,
+                               chunks=len(prepared.chunks))
+    profiler.end_timer(f'{stage}_resume_preprocessing')
+    if not prepared.text:
+        # Nothing recognisable survived, so the LLM sees the original text
+        return [user_input]
+    if not chunked:
+        prepared.chunks = [prepared.text]
+    
+    report = prepared.report(build_prompt, user_input)
+    profiler.record_prompt_reduction(stage, report)
+    print(f"✂️ {stage} prompt: {report['prompt_tokens_before']} → {report['prompt_tokens_after']} tokens in {report['chunks']} chunk(s)")
+    return prepared.chunks
+
+def merge_chunk_extractions(state, chunks: List[str], outcomes: list):
+    """Merge the skills extracted from each resume chunk; chunks whose call or JSON failed use pattern matching"""
+    skills, failed_chunks = [], []
+    for index, (chunk, outcome) in enumerate(zip(chunks, outcomes), start=1):
+        try:
+            if isinstance(outcome, BaseException):
+                raise outcome
+            skills.extend(parse_json_response(outcome).get('extracted_skills', []))
+        except Exception as e:
+            print(f"❌ Agent1 chunk {index} failed: {e}")
+            failed_chunks.append(str(index))
+            skills.extend(extract_skills_fallback(chunk))
+    
+    if len(failed_chunks) == len(chunks):
+        return degrade_extraction(state, 'every resume chunk failed')
+    if failed_chunks:
+        mark_degraded(state, 'agent1', f"pattern matching for chunk {', '.join(failed_chunks)}")
+    state['extracted_skills'] = clean_extracted_skills(skills)
+    return state
+
+def extract_skills_from_chunks(state, chunks: List[str], llm_budget: float):
+    """Extract skills from each chunk of a long resume with concurrent LLM calls"""
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        # Each worker runs in a copy of this context so the request profiler follows the call
+        futures = [
+            executor.submit(contextvars.copy_context().run, invoke_llm, build_extraction_prompt(chunk),
+                            300, llm_budget, 'agent1')
+            for chunk in chunks
+        ]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+    return merge_chunk_extractions(state, chunks, outcomes)
+
+async def extract_skills_from_chunks_async(state, chunks: List[str], llm_budget: float):
+    """Async extract_skills_from_chunks: chunk calls are gathered on the event loop"""
+    outcomes = await asyncio.gather(
+        *(ainvoke_llm(build_extraction_prompt(chunk), expected_completion_tokens=300, llm_budget=llm_budget,
+                      agent='agent1')
+          for chunk in chunks),
+        return_exceptions=True
+    )
+    return merge_chunk_extractions(state, chunks, outcomes)
+
+def extraction_flight_key(state) -> tuple:
+    return (state.get('input', ''),)
+
+@coalesced_agent('agent1', extraction_flight_key, ('extracted_skills',))
+def agent1_skill_extractor(state):
+    """Extract skills from user input with enhanced fallback mechanism"""
+    llm_budget = get_llm_budget(state)
+    if llm_budget is None:
+        return degrade_extraction(state, 'request deadline nearly reached')
+    
+    chunks = prepare_resume_chunks(state.get('input', ''), 'agent1', build_extraction_prompt)
+    if len(chunks) > 1:
+        return extract_skills_from_chunks(state, chunks, llm_budget)
+    try:
+        response = invoke_llm(build_extraction_prompt(chunks[0]), expected_completion_tokens=300, llm_budget=llm_budget,
+                              agent='agent1')
+    except Exception as e:
+        print(f"❌ Agent1 LLM call failed: {e}")
+        return degrade_extraction(state, str(e))
+    
+    return apply_extraction_response(state, response)
+
+@coalesced_agent('agent1', extraction_flight_key, ('extracted_skills',))
+async def agent1_skill_extractor_async(state):
+    """Async agent1: awaits the extraction call"""
+    llm_budget = get_llm_budget(state)
+    if llm_budget is None:
+        return degrade_extraction(state, 'request deadline nearly reached')
+    
+    chunks = prepare_resume_chunks(state.get('input', ''), 'agent1', build_extraction_prompt)
+    if len(chunks) > 1:
+        return await extract_skills_from_chunks_async(state, chunks, llm_budget)
+    try:
+        response = await ainvoke_llm(build_extraction_prompt(chunks[0]), expected_completion_tokens=300,
+                                     llm_budget=llm_budget, agent='agent1')
+    except Exception as e:
+        print(f"❌ Agent1 LLM call failed: {e}")
+        return degrade_extraction(state, str(e))
+    
+    return apply_extraction_response(state, response)
+
 def extract_skills_fallback(text: str) -> list[str]:
     """Enhanced fallback skill extraction using pattern matching"""
     import re
@@ -632,19 +1386,13 @@ def extract_skills_fallback(text: str) -> list[str]:
     
     return extracted_skills[:30]  # Limit to 30 skills
 
-def agent2_gap_analyzer(state):
-    """Analyze skill gaps for target role using curated data"""
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    
-    user_skills = state.get('extracted_skills', [])
-    target_role = state.get('target_role', '')
-    
+def build_gap_prompt(user_skills: List[str], target_role: str) -> str:
+    """Prompt for agent2's gap analysis, anchored on curated role skills when available"""
     # Get required skills from curated data if available
     required_skills = JOB_ROLES_DATA.get(target_role, [])
-    curated_data_available = bool(required_skills)
     
-    if curated_data_available:
-        prompt = f"""ROLE: Career-gap analyst bot.
+    if required_skills:
+        return f"""ROLE: Career-gap analyst bot.
 TASK:
 Compare user_skills with required_skills for {target_role}; produce missing_skills, nice_to_have.
 Use the CURATED REQUIRED SKILLS as the authoritative source.
@@ -661,8 +1409,7 @@ CONSTRAINTS:
 Respond ONLY with valid JSON.
 
 USER SKILLS: {user_skills}"""
-    else:
-        prompt = f"""ROLE: Career-gap analyst bot.
+    return f"""ROLE: Career-gap analyst bot.
 TASK:
 Compare user_skills with target_role; produce missing_skills, nice_to_have.
 OUTPUT SCHEMA:
@@ -673,30 +1420,177 @@ Respond ONLY with valid JSON.
 
 USER SKILLS: {user_skills}
 TARGET ROLE: {target_role}"""
-    
-    message = HumanMessage(content=prompt)
-    response = llm.invoke([message])
-    
+
+def degrade_gap_analysis(state, reason: str):
+    """Analyze gaps against the curated role data instead of the LLM"""
+    mark_degraded(state, 'agent2', reason)
+    state.update(analyze_gaps_locally(state.get('extracted_skills', []), state.get('target_role', '')))
+    return state
+
+def apply_gap_response(state, response):
+    """Store missing and nice-to-have skills from agent2's LLM response"""
     try:
-        # Extract JSON from markdown code blocks if present
-        content = response.content if isinstance(response.content, str) else str(response.content)
-        content = content.strip()
-        if content.startswith('```json'):
-            content = content.replace('```json', '').replace('```', '').strip()
-        elif content.startswith('```'):
-            content = content.replace('```', '').strip()
-        
-        result = json.loads(content)
+        result = parse_json_response(response)
         state['missing_skills'] = result.get('missing_skills', [])
         state['nice_to_have'] = result.get('nice_to_have', [])
     except (json.JSONDecodeError, KeyError) as e:
         print(f"Agent2 JSON parsing error: {e}")
         # Fallback in case of parsing error
-        state['missing_skills'] = []
-        state['nice_to_have'] = []
+        degrade_gap_analysis(state, 'unparseable LLM response')
+    
+    return state
+
+def gap_flight_key(state) -> tuple:
+    return (state.get('target_role', ''), tuple(sorted(state.get('extracted_skills', []))))
+
+@coalesced_agent('agent2', gap_flight_key, ('missing_skills', 'nice_to_have'))
+def agent2_gap_analyzer(state):
+    """Analyze skill gaps for target role using curated data"""
+    llm_budget = get_llm_budget(state)
+    if llm_budget is None:
+        return degrade_gap_analysis(state, 'request deadline nearly reached')
+    
+    prompt = build_gap_prompt(state.get('extracted_skills', []), state.get('target_role', ''))
+    try:
+        response = invoke_llm(prompt, expected_completion_tokens=300, llm_budget=llm_budget, agent='agent2')
+    except Exception as e:
+        print(f"❌ Agent2 LLM call failed: {e}")
+        return degrade_gap_analysis(state, str(e))
+    
+    return apply_gap_response(state, response)
+
+@coalesced_agent('agent2', gap_flight_key, ('missing_skills', 'nice_to_have'))
+async def agent2_gap_analyzer_async(state):
+    """Async agent2: awaits the gap analysis call"""
+    llm_budget = get_llm_budget(state)
+    if llm_budget is None:
+        return degrade_gap_analysis(state, 'request deadline nearly reached')
+    
+    prompt = build_gap_prompt(state.get('extracted_skills', []), state.get('target_role', ''))
+    try:
+        response = await ainvoke_llm(prompt, expected_completion_tokens=300, llm_budget=llm_budget, agent='agent2')
+    except Exception as e:
+        print(f"❌ Agent2 LLM call failed: {e}")
+        return degrade_gap_analysis(state, str(e))
+    
+    return apply_gap_response(state, response)
+
+def build_fused_prompt(user_input: str, target_role: str) -> str:
+    """Prompt for the fused extraction and gap analysis call"""
+    required_skills = JOB_ROLES_DATA.get(target_role, [])
+    return f"""ROLE: Senior NLP engineer and career-gap analyst.
+TASK:
+1. Read the user's raw resume/CV text, project descriptions, or bullet list.
+2. Extract distinct technical skills, tools, frameworks, and technologies.
+3. Compare them with the CURATED REQUIRED SKILLS for {target_role}; produce missing_skills, nice_to_have.
+
+CURATED REQUIRED SKILLS FOR {target_role}: {required_skills}
+
+OUTPUT SCHEMA:
+{{"extracted_skills": ["python", "sql"], "missing_skills": [...], "nice_to_have": [...]}}
+
+CONSTRAINTS:
+- extracted_skills: max 30, lowercase, hyphenated format, no duplicates; exclude soft skills, job titles, company names
+- Normalize common variations (JavaScript/JS → "javascript", PostgreSQL/Postgres → "postgresql")
+- missing_skills: skills from CURATED REQUIRED SKILLS that the user doesn't have
+- nice_to_have: additional complementary skills (≤10 items)
+- Return alphabetical missing_skills and nice_to_have lists
+Respond ONLY with valid JSON that matches the schema.
+
+USER INPUT: {user_input}"""
+
+def degrade_fused(state, reason: str):
+    """Pattern-match skills and analyze gaps locally instead of the fused LLM call"""
+    mark_degraded(state, 'agent12', reason)
+    state['extracted_skills'] = extract_skills_fallback(state.get('input', ''))
+    state.update(analyze_gaps_locally(state['extracted_skills'], state.get('target_role', '')))
+    return state
+
+def apply_fused_response(state, response):
+    """Store skills and gaps from the fused LLM response"""
+    try:
+        result = parse_json_response(response)
+        state['extracted_skills'] = clean_extracted_skills(result.get('extracted_skills', []))
+        state['missing_skills'] = result.get('missing_skills', [])
+        state['nice_to_have'] = result.get('nice_to_have', [])
+    except (json.JSONDecodeError, KeyError, AttributeError) as e:
+        print(f"Fused extraction/gap JSON parsing error: {e}")
+        return degrade_fused(state, 'unparseable LLM response')
     
     return state
 
+def fused_flight_key(state) -> tuple:
+    return (state.get('input', ''), state.get('target_role', ''))
+
+FUSED_OUTPUTS = ('extracted_skills', 'missing_skills', 'nice_to_have')
+
+@coalesced_agent('agent12', fused_flight_key, FUSED_OUTPUTS)
+def agent12_fused_extractor_gap_analyzer(state):
+    """Extract skills and analyze gaps for a curated role in a single LLM call"""
+    llm_budget = get_llm_budget(state)
+    if llm_budget is None:
+        return degrade_fused(state, 'request deadline nearly reached')
+    
+    target_role = state.get('target_role', '')
+    # One call answers extraction and gaps, so the resume is budgeted but not chunked
+    resume_text = prepare_resume_chunks(state.get('input', ''), 'agent12',
+                                        lambda text: build_fused_prompt(text, target_role), chunked=False)[0]
+    prompt = build_fused_prompt(resume_text, target_role)
+    try:
+        response = invoke_llm(prompt, expected_completion_tokens=500, llm_budget=llm_budget, agent='agent12')
+    except Exception as e:
+        print(f"❌ Fused extraction/gap LLM call failed: {e}")
+        return degrade_fused(state, str(e))
+    
+    return apply_fused_response(state, response)
+
+@coalesced_agent('agent12', fused_flight_key, FUSED_OUTPUTS)
+async def agent12_fused_extractor_gap_analyzer_async(state):
+    """Async fused agent: awaits the combined extraction and gap call"""
+    llm_budget = get_llm_budget(state)
+    if llm_budget is None:
+        return degrade_fused(state, 'request deadline nearly reached')
+    
+    target_role = state.get('target_role', '')
+    # One call answers extraction and gaps, so the resume is budgeted but not chunked
+    resume_text = prepare_resume_chunks(state.get('input', ''), 'agent12',
+                                        lambda text: build_fused_prompt(text, target_role), chunked=False)[0]
+    prompt = build_fused_prompt(resume_text, target_role)
+    try:
+        response = await ainvoke_llm(prompt, expected_completion_tokens=500, llm_budget=llm_budget, agent='agent12')
+    except Exception as e:
+        print(f"❌ Fused extraction/gap LLM call failed: {e}")
+        return degrade_fused(state, str(e))
+    
+    return apply_fused_response(state, response)
+
+def normalize_skill_name(skill: str) -> str:
+    """Normalize a skill name for comparison ("Node.js" -> "nodejs", "machine-learning" -> "machinelearning")"""
+    return ''.join(ch for ch in skill.lower() if ch.isalnum())
+
+def skill_matches(user_skill: str, required_skill: str) -> bool:
+    """Check whether a user skill covers a required skill ("jupyter" covers "Jupyter Notebooks")"""
+    user_normalized = normalize_skill_name(user_skill)
+    if not user_normalized:
+        return False
+    if user_normalized == normalize_skill_name(required_skill):
+        return True
+    # Match on the leading word of multi-word requirements ("aws" -> "AWS Basics", "express" -> "Express.js")
+    words = required_skill.lower().replace('.', ' ').replace('/', ' ').replace('-', ' ').split()
+    return bool(words) and user_normalized == normalize_skill_name(words[0])
+
+def analyze_gaps_locally(user_skills: List[str], target_role: str) -> dict:
+    """Gap analysis against the curated role data without an LLM call"""
+    required_skills = JOB_ROLES_DATA.get(target_role, [])
+    missing_skills = [
+        required for required in required_skills
+        if not any(skill_matches(user_skill, required) for user_skill in user_skills)
+    ]
+    return {
+        'missing_skills': sorted(missing_skills),
+        'nice_to_have': []
+    }
+
 def get_available_career_paths():
     """Get list of available career paths from curated data"""
     if JOB_ROLES_DATA:
@@ -714,82 +1608,268 @@ def get_courses_for_skill(skill: str):
     _, courses = get_courses_for_skill_optimized(skill)
     return courses
 
-def extract_skills_only(input_text: str) -> dict:
-    """Fast skill extraction without full pipeline"""
+def _start_skill_extraction(input_text: str) -> dict:
+    """Fresh profiler and minimal state for a standalone extraction"""
     print(f"🔍 Extracting skills only from input")
     
     # Initialize profiler for timing
-    global profiler
-    profiler = PerformanceProfiler()
+    reset_profiler()
     profiler.start_timer('skill_extraction_only')
     
     # Create a minimal state for skill extraction
-    state = {'input': input_text}
+    return {'input': input_text, 'deadline': time.time() + PERFORMANCE_CONFIG['llm_timeout'], 'degraded_stages': []}
+
+def _skill_extraction_result(result_state) -> dict:
+    profiler.end_timer('skill_extraction_only')
+    performance_data = profiler.get_performance_report()
+    performance_data['circuit_breaker'] = circuit_breaker.stats()
+    
+    print(f"⚡ Skills extracted in {performance_data['total_time']}s")
+    
+    return {
+        'extracted_skills': result_state.get('extracted_skills', []),
+        'degraded_stages': result_state.get('degraded_stages', []),
+        'performance_summary': performance_data
+    }
+
+def _skill_extraction_failed(input_text: str, error: Exception) -> dict:
+    print(f"❌ Skill extraction failed: {error}")
+    # Fallback to pattern matching
+    fallback_skills = extract_skills_fallback(input_text)
+    return {
+        'extracted_skills': fallback_skills,
+        'performance_summary': {'total_time': 0, 'cache_stats': {'hit_ratio': 0}}
+    }
+
+def extract_skills_only(input_text: str) -> dict:
+    """Fast skill extraction without full pipeline"""
+    state = _start_skill_extraction(input_text)
     
     # Run only the skill extraction agent
     try:
-        result_state = agent1_skill_extractor(state)
-        extracted_skills = result_state.get('extracted_skills', [])
-        
-        profiler.end_timer('skill_extraction_only')
-        performance_data = profiler.get_performance_report()
-        
-        print(f"⚡ Skills extracted in {performance_data['total_time']}s")
-        
-        return {
-            'extracted_skills': extracted_skills,
-            'performance_summary': performance_data
-        }
+        return _skill_extraction_result(agent1_skill_extractor(state))
     except Exception as e:
-        print(f"❌ Skill extraction failed: {e}")
-        # Fallback to pattern matching
-        fallback_skills = extract_skills_fallback(input_text)
-        return {
-            'extracted_skills': fallback_skills,
-            'performance_summary': {'total_time': 0, 'cache_stats': {'hit_ratio': 0}}
-        }
+        return _skill_extraction_failed(input_text, e)
 
-def run_pipeline_optimized(input_text: str, target_role: str, log_execution: bool = False) -> dict:
-    """Run optimized career pathfinding pipeline with performance monitoring"""
-    
-    # Reset profiler for new run
-    global profiler
-    profiler = PerformanceProfiler()
-    
-    profiler.start_timer('pipeline_total')
-    
-    print(f"🚀 Starting optimized pipeline for role: {target_role}")
+async def extract_skills_only_async(input_text: str) -> dict:
+    """Async extract_skills_only"""
+    state = _start_skill_extraction(input_text)
+    try:
+        return _skill_extraction_result(await agent1_skill_extractor_async(state))
+    except Exception as e:
+        return _skill_extraction_failed(input_text, e)
+
+def readiness_scorer(state):
+    """Score role readiness from the extracted skills"""
+    profiler.start_timer('readiness_scoring')
+    readiness = assess_role_readiness(state.get('extracted_skills', []))
+    profiler.end_timer('readiness_scoring')
+    # Only this key is returned: the node runs alongside other nodes that write the rest of the state
+    return {'readiness': readiness}
+
+async def readiness_scorer_async(state):
+    """Async readiness_scorer: scoring is CPU work, so it runs on a worker thread beside the LLM calls"""
+    return await asyncio.to_thread(readiness_scorer, state)
+
+PIPELINE_TOPOLOGIES = ('three_call', 'fused')
+ROADMAP_MODES = ('single', 'per_phase', 'local')
+
+# Graph nodes and the pipeline stage each one completes
+PIPELINE_STAGES = {
+    'agent1': 'skill_extraction',
+    'agent2': 'gap_analysis',
+    'agent12': 'skill_extraction_and_gap_analysis',
+    'agent3': 'roadmap_generation',
+    'readiness': 'readiness_scoring'
+}
+
+# State each node contributes, sent along with its progress event
+NODE_OUTPUTS = {
+    'agent1': ('extracted_skills',),
+    'agent2': ('missing_skills', 'nice_to_have'),
+    'agent12': FUSED_OUTPUTS,
+    'agent3': ('roadmap', 'time_estimates', 'roadmap_source'),
+    'readiness': ('readiness',)
+}
+
+def pipeline_stages(topology: str, include_readiness: bool = False) -> List[str]:
+    """Graph nodes of a topology in execution order"""
+    nodes = ['agent12', 'agent3'] if topology == 'fused' else ['agent1', 'agent2', 'agent3']
+    return nodes + ['readiness'] if include_readiness else nodes
+
+@lru_cache(maxsize=None)
+def build_pipeline_graph(topology: str = 'three_call', use_async: bool = False, include_readiness: bool = False,
+                         checkpointed: bool = False):
+    """
+    Build and compile the pipeline graph (compiled once per process and variant).
+
+    use_async builds the graph from the async agents for `ainvoke`. With
+    include_readiness, readiness scoring branches off after extraction and
+    runs concurrently with gap analysis and roadmap generation. checkpointed
+    compiles the graph with the checkpoint store's saver.
+    """
+    if topology not in PIPELINE_TOPOLOGIES:
+        raise ValueError(f"Unknown pipeline topology: {topology}")
     
-    # Build the StateGraph (using optimized agent3)
     workflow = StateGraph(MyState)
+    agent3 = agent3_roadmap_mentor_async if use_async else agent3_roadmap_mentor_optimized
+    
+    def add_node(name: str, node):
+        workflow.add_node(name, observed_node(name, node))
+    
+    if topology == 'fused':
+        # One LLM call answers extraction and gap analysis together
+        add_node("agent12", agent12_fused_extractor_gap_analyzer_async if use_async else agent12_fused_extractor_gap_analyzer)
+        add_node("agent3", agent3)
+        workflow.set_entry_point("agent12")
+        workflow.add_edge("agent12", "agent3")
+        extraction_node = "agent12"
+    else:
+        add_node("agent1", agent1_skill_extractor_async if use_async else agent1_skill_extractor)
+        add_node("agent2", agent2_gap_analyzer_async if use_async else agent2_gap_analyzer)
+        add_node("agent3", agent3)
+        workflow.set_entry_point("agent1")
+        workflow.add_edge("agent1", "agent2")
+        workflow.add_edge("agent2", "agent3")
+        extraction_node = "agent1"
+    workflow.add_edge("agent3", END)
     
-    # Add nodes (agent3 is now optimized)
-    workflow.add_node("agent1", agent1_skill_extractor)
-    workflow.add_node("agent2", agent2_gap_analyzer)
-    workflow.add_node("agent3", agent3_roadmap_mentor_optimized)
+    if include_readiness:
+        add_node("readiness", readiness_scorer_async if use_async else readiness_scorer)
+        workflow.add_edge(extraction_node, "readiness")
+        workflow.add_edge("readiness", END)
     
-    # Add edges
-    workflow.set_entry_point("agent1")
-    workflow.add_edge("agent1", "agent2")
-    workflow.add_edge("agent2", "agent3")
-    workflow.add_edge("agent3", END)
+    return workflow.compile(checkpointer=checkpoint_store.saver if checkpointed else None)
+
+def select_pipeline_topology(target_role: str, topology: Optional[str] = None) -> str:
+    """Resolve the topology for a run; fused mode only applies to curated roles"""
+    topology = topology or PERFORMANCE_CONFIG['pipeline_topology']
+    if topology not in PIPELINE_TOPOLOGIES:
+        raise ValueError(f"Unknown pipeline topology: {topology}")
+    if topology == 'fused' and target_role not in JOB_ROLES_DATA:
+        return 'three_call'
+    return topology
+
+def resolve_run_options(target_role: str, time_budget: Optional[float], topology: Optional[str],
+                        roadmap_mode: Optional[str]) -> Tuple[float, str, str]:
+    """Apply configured defaults and validate the options of a pipeline run"""
+    if time_budget is None:
+        time_budget = PERFORMANCE_CONFIG['max_generation_time']
+    roadmap_mode = roadmap_mode or PERFORMANCE_CONFIG['roadmap_generation_mode']
+    if roadmap_mode not in ROADMAP_MODES:
+        raise ValueError(f"Unknown roadmap mode: {roadmap_mode}")
+    return time_budget, select_pipeline_topology(target_role, topology), roadmap_mode
+
+def pipeline_flight_key(input_text: str, *options) -> tuple:
+    """Identical concurrent requests (double clicks, retries, several tabs) share one run"""
+    return (hashlib.sha256(input_text.encode('utf-8')).hexdigest(),) + options
+
+def with_coalescing_outcome(outcome) -> dict:
+    """Copy of a pipeline result annotated with how it was coalesced (the shared result is never mutated)"""
+    result = dict(outcome.result)
+    performance_summary = dict(result.get('performance_summary', {}))
+    performance_summary['coalescing'] = {
+        **performance_summary.get('coalescing', {}),
+        'pipeline': {'shared': outcome.shared, 'waiters': outcome.waiters}
+    }
+    if outcome.shared:
+        # The leader's calls are already accounted to its own run; this caller spent nothing
+        performance_summary['llm_usage'] = UsageLedger().report()
+    result['performance_summary'] = performance_summary
+    return result
+
+def run_pipeline_optimized(input_text: str, target_role: str, log_execution: bool = False,
+                           time_budget: Optional[float] = None, topology: Optional[str] = None,
+                           roadmap_mode: Optional[str] = None, on_progress=None,
+                           session_id: Optional[str] = None) -> dict:
+    """
+    Run optimized career pathfinding pipeline with performance monitoring.
+    
+    on_progress, if given, is called with a node event (node, stage, duration,
+    elapsed, degraded and the node's outputs as data) as each graph node
+    completes; such runs never join an identical in-flight run (they still
+    share its agent steps), so every node is reported. With a session_id the
+    run is checkpointed after every node, and a repeat run for the same
+    session and role resumes after the agents that already succeeded.
+    """
+    time_budget, topology, roadmap_mode = resolve_run_options(target_role, time_budget, topology, roadmap_mode)
+    
+    def run():
+        return _run_pipeline(input_text, target_role, log_execution, time_budget, topology, roadmap_mode,
+                             on_progress, session_id)
+    
+    with span('pipeline', role=target_role, topology=topology, roadmap_mode=roadmap_mode) as pipeline_span:
+        if not PERFORMANCE_CONFIG['enable_coalescing'] or on_progress is not None:
+            return run()
+        # Checkpointed runs only merge within a session: each session needs its own checkpoint thread
+        checkpoint_scope = session_id if checkpoint_store is not None else None
+        outcome = pipeline_flights.do(
+            pipeline_flight_key(input_text, target_role, topology, roadmap_mode, checkpoint_scope),
+            run, timeout=time_budget
+        )
+        pipeline_span.set(shared=outcome.shared)
+        return with_coalescing_outcome(outcome)
+
+async def run_pipeline_async(input_text: str, target_role: str, log_execution: bool = False,
+                             time_budget: Optional[float] = None, topology: Optional[str] = None,
+                             roadmap_mode: Optional[str] = None, include_readiness: bool = False,
+                             session_id: Optional[str] = None) -> dict:
+    """
+    Async run_pipeline_optimized on the compiled graph's `ainvoke`.
+
+    LLM calls are awaited, so one event loop serves many concurrent requests
+    without gevent; include_readiness adds role readiness scores to the result.
+    With a session_id the run is checkpointed like the sync one, so retries
+    resume and rerun_roadmap works on its gap analysis.
+    """
+    time_budget, topology, roadmap_mode = resolve_run_options(target_role, time_budget, topology, roadmap_mode)
+    
+    async def run():
+        return await _run_pipeline_async(input_text, target_role, log_execution, time_budget, topology,
+                                         roadmap_mode, include_readiness, session_id)
+    
+    with span('pipeline', role=target_role, topology=topology, roadmap_mode=roadmap_mode) as pipeline_span:
+        if not PERFORMANCE_CONFIG['enable_coalescing']:
+            return await run()
+        checkpoint_scope = session_id if checkpoint_store is not None else None
+        outcome = await pipeline_flights.ado(
+            pipeline_flight_key(input_text, target_role, topology, roadmap_mode, include_readiness, checkpoint_scope),
+            run, timeout=time_budget
+        )
+        pipeline_span.set(shared=outcome.shared)
+        return with_coalescing_outcome(outcome)
+
+def _start_run(input_text: str, target_role: str, time_budget: float, topology: str, roadmap_mode: str) -> MyState:
+    """Fresh profiler and initial state carrying the end-to-end deadline every agent budgets against"""
+    # Reset profiler for new run
+    reset_profiler()
+    
+    profiler.start_timer('pipeline_total')
     
-    # Compile the graph
-    app = workflow.compile()
+    print(f"🚀 Starting optimized pipeline for role: {target_role} ({topology} topology)")
     
-    # Initialize state
-    initial_state = MyState({
+    return MyState({
         'input': input_text,
-        'target_role': target_role
+        'target_role': target_role,
+        'deadline': time.time() + time_budget,
+        'degraded_stages': [],
+        'roadmap_mode': roadmap_mode
     })
-    
-    # Run the pipeline
-    result = app.invoke(initial_state)
-    
+
+def _finish_run(result: dict, log_execution: bool, time_budget: float, topology: str, roadmap_mode: str) -> dict:
+    """Attach the final performance summary to a finished run"""
     profiler.end_timer('pipeline_total')
+    PIPELINE_DURATION.labels(topology).observe(profiler.timings['pipeline_total']['duration'])
     
     # Add final performance summary
     performance_summary = profiler.get_performance_report()
+    performance_summary['time_budget'] = round(time_budget, 3)
+    performance_summary['topology'] = topology
+    performance_summary['roadmap_mode'] = roadmap_mode
+    performance_summary['roadmap_source'] = result.get('roadmap_source', 'llm')
+    performance_summary['cache_stats']['roadmap_cache'] = roadmap_cache.stats()
+    performance_summary['degraded_stages'] = result.get('degraded_stages', [])
+    performance_summary['circuit_breaker'] = circuit_breaker.stats()
     result['performance_summary'] = performance_summary
     
     if log_execution:
@@ -798,9 +1878,193 @@ def run_pipeline_optimized(input_text: str, target_role: str, log_execution: boo
         print(f"   Cache hit ratio: {performance_summary['cache_stats']['hit_ratio']:.1%}")
         for step, duration in performance_summary['step_timings'].items():
             print(f"   {step}: {duration}s")
+        if performance_summary['degraded_stages']:
+            print(f"   Degraded stages: {', '.join(performance_summary['degraded_stages'])}")
     
     return result
 
+def node_event(node: str, update: dict, duration: float, elapsed: float, resumed: bool = False) -> dict:
+    """Progress event for a finished graph node, carrying the state it produced"""
+    return {
+        'event': 'node',
+        'node': node,
+        'stage': PIPELINE_STAGES.get(node, node),
+        'duration': round(duration, 3),
+        'elapsed': round(elapsed, 3),
+        'degraded': node in update.get('degraded_stages', []),
+        'resumed': resumed,  # Output restored from a checkpoint instead of run again
+        'data': {key: update[key] for key in NODE_OUTPUTS.get(node, ()) if key in update}
+    }
+
+def stream_pipeline_events(input_text: str, target_role: str, log_execution: bool = False,
+                           time_budget: Optional[float] = None, topology: Optional[str] = None,
+                           roadmap_mode: Optional[str] = None, session_id: Optional[str] = None,
+                           heartbeat_interval: float = 15):
+    """
+    Streaming run_pipeline_optimized: yields a node event as each agent finishes,
+    then {'event': 'result', 'result': ...} or {'event': 'error', 'error': ...}.
+
+    The pipeline runs on a worker thread; {'event': 'heartbeat'} is yielded when
+    nothing happened for heartbeat_interval seconds so idle connections stay open.
+    """
+    events = queue.Queue()
+    
+    def run():
+        try:
+            result = run_pipeline_optimized(input_text, target_role, log_execution, time_budget, topology,
+                                            roadmap_mode, on_progress=events.put, session_id=session_id)
+            events.put({'event': 'result', 'result': result})
+        except Exception as e:
+            events.put({'event': 'error', 'error': str(e)})
+    
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), name="pipeline-stream", daemon=True).start()
+    while True:
+        try:
+            event = events.get(timeout=heartbeat_interval)
+        except queue.Empty:
+            yield {'event': 'heartbeat'}
+            continue
+        yield event
+        if event['event'] in ('result', 'error'):
+            return
+
+def checkpoint_config(session_id: str, target_role: str, topology: str) -> dict:
+    return {'configurable': {'thread_id': checkpoint_thread_id(session_id, target_role, topology)}}
+
+def find_agent_checkpoint(graph, config: dict, node: str):
+    """Latest checkpoint written by the graph itself (not by update_state) just before `node` runs"""
+    for snapshot in graph.get_state_history(config):
+        if snapshot.next == (node,) and snapshot.metadata.get('source') == 'loop':
+            return snapshot
+    return None
+
+def find_resume_node(graph, config: dict, input_text: str, nodes: List[str]) -> Optional[str]:
+    """Node a repeat run restarts from: the first that degraded or never finished last time (None if unrelated)"""
+    latest = graph.get_state(config)
+    if not latest.values or latest.values.get('input') != input_text:
+        return None
+    degraded = latest.values.get('degraded_stages', [])
+    unfinished = [node for node in nodes if node in degraded or node in latest.next]
+    # Everything succeeded: only the roadmap is generated again
+    return unfinished[0] if unfinished else nodes[-1]
+
+def prepare_checkpointed_run(session_id: str, initial_state: MyState, topology: str, use_async: bool = False,
+                             include_readiness: bool = False):
+    """
+    Checkpointed graph, graph input and config for a session's run, plus the
+    reused nodes and their checkpointed state when it resumes a previous run.
+    """
+    graph = build_pipeline_graph(topology, use_async, include_readiness, checkpointed=True)
+    config = checkpoint_config(session_id, initial_state['target_role'], topology)
+    thread_id = config['configurable']['thread_id']
+    checkpoint_store.touch(thread_id)
+    
+    nodes = pipeline_stages(topology)
+    resume_node = find_resume_node(graph, config, initial_state['input'], nodes)
+    snapshot = None
+    if resume_node is not None and resume_node != nodes[0]:
+        snapshot = find_agent_checkpoint(graph, config, resume_node)
+    if snapshot is None:
+        # Nothing to reuse: a fresh run replaces the thread's checkpoints
+        checkpoint_store.reset(thread_id)
+        return graph, initial_state, config, None
+    
+    print(f"♻️ Resuming pipeline at {resume_node} from checkpoint")
+    reused = nodes[:nodes.index(resume_node)]
+    # Fresh deadline and options; the reused agents' outputs come from the checkpoint
+    overrides = {key: initial_state[key] for key in ('deadline', 'degraded_stages', 'roadmap_mode')}
+    config = graph.update_state(snapshot.config, overrides, as_node=reused[-1])
+    return graph, None, config, (reused, snapshot.values)
+
+def select_priority_gaps(gap_state: dict, priority_skills: List[str]) -> dict:
+    """Missing and nice-to-have lists focused on the chosen skills, which must come from the stored gap analysis"""
+    known = {skill.lower(): skill for skill in gap_state.get('missing_skills', []) + gap_state.get('nice_to_have', [])}
+    unknown = [skill for skill in priority_skills if skill.lower() not in known]
+    if unknown:
+        raise ValueError(f"Not in the stored gap analysis: {', '.join(unknown)}")
+    chosen = list(dict.fromkeys(known[skill.lower()] for skill in priority_skills))
+    return {
+        'missing_skills': chosen,
+        'nice_to_have': [skill for skill in gap_state.get('nice_to_have', []) if skill not in chosen]
+    }
+
+def rerun_roadmap(session_id: str, target_role: str, weekly_hours: Optional[int] = None,
+                  priority_skills: Optional[List[str]] = None, roadmap_mode: Optional[str] = None,
+                  time_budget: Optional[float] = None, topology: Optional[str] = None,
+                  log_execution: bool = False) -> dict:
+    """
+    Re-run only agent3 on the gap analysis checkpointed for a session and role.
+    
+    weekly_hours changes the time estimates; priority_skills replaces the skills
+    the roadmap focuses on. Raises LookupError when there is no stored gap
+    analysis and ValueError for priority skills outside it.
+    """
+    if checkpoint_store is None:
+        raise LookupError('Pipeline checkpoints are disabled')
+    time_budget, topology, roadmap_mode = resolve_run_options(target_role, time_budget, topology, roadmap_mode)
+    graph = build_pipeline_graph(topology, checkpointed=True)
+    config = checkpoint_config(session_id, target_role, topology)
+    snapshot = find_agent_checkpoint(graph, config, 'agent3')
+    if snapshot is None:
+        raise LookupError('No stored gap analysis for this session and role; generate a roadmap first')
+    
+    overrides = {'deadline': time.time() + time_budget, 'degraded_stages': snapshot.values.get('degraded_stages', []),
+                 'roadmap_mode': roadmap_mode, 'weekly_hours': weekly_hours}
+    if priority_skills is not None:
+        overrides.update(select_priority_gaps(snapshot.values, priority_skills))
+    checkpoint_store.touch(config['configurable']['thread_id'])
+    
+    reset_profiler()
+    profiler.start_timer('pipeline_total')
+    print(f"🔁 Re-running roadmap generation for role: {target_role} on the stored gap analysis")
+    
+    nodes = pipeline_stages(topology)
+    result = graph.invoke(None, graph.update_state(snapshot.config, overrides, as_node=nodes[-2]))
+    return _finish_run(result, log_execution, time_budget, topology, roadmap_mode)
+
+def _run_pipeline(input_text: str, target_role: str, log_execution: bool, time_budget: float,
+                  topology: str, roadmap_mode: str, on_progress=None, session_id: Optional[str] = None) -> dict:
+    """Execute the pipeline graph for one request"""
+    initial_state = _start_run(input_text, target_role, time_budget, topology, roadmap_mode)
+    graph, graph_input, config, resumed = build_pipeline_graph(topology), initial_state, None, None
+    if session_id and checkpoint_store is not None:
+        graph, graph_input, config, resumed = prepare_checkpointed_run(session_id, initial_state, topology)
+    
+    if on_progress is None:
+        result = graph.invoke(graph_input, config)
+    else:
+        # Stream node updates for progress; the last 'values' chunk is the final state
+        result = initial_state
+        started = last_finished = time.time()
+        if resumed is not None:
+            reused, values = resumed
+            for node in reused:
+                on_progress(node_event(node, values, 0, 0, resumed=True))
+        for mode, chunk in graph.stream(graph_input, config, stream_mode=['updates', 'values']):
+            if mode == 'values':
+                result = chunk
+                continue
+            now = time.time()
+            for node, update in chunk.items():
+                on_progress(node_event(node, update or {}, now - last_finished, now - started))
+            last_finished = now
+    return _finish_run(result, log_execution, time_budget, topology, roadmap_mode)
+
+async def _run_pipeline_async(input_text: str, target_role: str, log_execution: bool, time_budget: float,
+                              topology: str, roadmap_mode: str, include_readiness: bool,
+                              session_id: Optional[str] = None) -> dict:
+    """Execute the async pipeline graph for one request"""
+    initial_state = _start_run(input_text, target_role, time_budget, topology, roadmap_mode)
+    graph = build_pipeline_graph(topology, use_async=True, include_readiness=include_readiness)
+    graph_input, config = initial_state, None
+    if session_id and checkpoint_store is not None:
+        # Checkpoint lookups and update_state are sync sqlite work; keep them off the event loop
+        graph, graph_input, config, _ = await asyncio.to_thread(
+            prepare_checkpointed_run, session_id, initial_state, topology, True, include_readiness
+        )
+    result = await graph.ainvoke(graph_input, config)
+    return _finish_run(result, log_execution, time_budget, topology, roadmap_mode)
+
 # Wrapper for backwards compatibility
 def run_pipeline(input_text: str, target_role: str, log_execution: bool = False) -> dict:
     """Backwards compatible wrapper for optimized pipeline"""
@@ -0,0 +1,203 @@
+"""
+LLM Circuit Breaker
+
+Shared circuit breaker around OpenAI calls. When recent calls fail or run
+slow too often the breaker opens and every agent goes straight to its local
+fallback instead of waiting out its own timeout; after a cool-down a few
+half-open probe calls decide whether to close it again.
+
+Only upstream trouble counts as a failure: 5xx and 429 responses,
+connection errors and timeouts of calls that had the full configured
+timeout. Cancelled calls, other 4xx responses and calls that timed out on
+what was left of their request's deadline are neutral.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Optional
+
+try:
+    from openai import APIConnectionError, APITimeoutError
+except ImportError:
+    APIConnectionError = APITimeoutError = None
+
+# Circuit breaker configuration
+CIRCUIT_BREAKER_CONFIG = {
+    'window_seconds': 60.0,  # Rolling window of call outcomes
+    'min_calls': 5,  # Calls needed in the window before the breaker can trip
+    'error_rate_threshold': 0.5,  # Fraction of failed calls that opens the breaker
+    'slow_call_seconds': float(os.getenv('LLM_SLOW_CALL_SECONDS', '20')),
+    'slow_call_rate_threshold': 0.8,  # Fraction of slow calls that opens the breaker
+    'open_seconds': float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30')),  # Cool-down before probing
+    'half_open_max_calls': 1,  # Concurrent probe calls allowed while half-open
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the breaker is open"""
+
+
+def is_upstream_failure(error: BaseException, deadline_limited: bool = False) -> Optional[bool]:
+    """True for errors that count against the breaker, None for neutral outcomes"""
+    if isinstance(error, asyncio.CancelledError) or not isinstance(error, Exception):
+        return None
+    if isinstance(error, TimeoutError) or (APITimeoutError is not None and isinstance(error, APITimeoutError)):
+        # A timeout cut short by the request's own deadline says nothing about the upstream
+        return None if deadline_limited else True
+    if isinstance(error, ConnectionError) or (APIConnectionError is not None and isinstance(error, APIConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    return None
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by error and slow-call rates"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window_seconds: float, min_calls: int, error_rate_threshold: float,
+                 slow_call_seconds: float, slow_call_rate_threshold: float,
+                 open_seconds: float, half_open_max_calls: int):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, failed, slow)
+        self._failed_calls = 0  # Running counts over _outcomes, so rates are O(1) per call
+        self._slow_calls = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.transitions = {}
+        self.short_circuited_calls = 0
+
+    def _transition(self, new_state: str):
+        key = f"{self.state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        print(f"🔌 LLM circuit breaker {key}")
+        self.state = new_state
+        if new_state == self.OPEN:
+            self.opened_at = time.monotonic()
+        elif new_state == self.CLOSED:
+            self._outcomes.clear()
+            self._failed_calls = self._slow_calls = 0
+        self.probes_in_flight = 0
+
+    def _prune(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, failed, slow = self._outcomes.popleft()
+            self._failed_calls -= failed
+            self._slow_calls -= slow
+
+    def _rates(self):
+        total = len(self._outcomes)
+        if total == 0:
+            return 0.0, 0.0
+        return self._failed_calls / total, self._slow_calls / total
+
+    def check(self):
+        """Fail fast while open, without reserving a probe slot"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at < self.open_seconds:
+                self.short_circuited_calls += 1
+                raise CircuitOpenError("LLM circuit breaker is open")
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.short_circuited_calls += 1
+                    raise CircuitOpenError("LLM circuit breaker is open")
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self.probes_in_flight >= self.half_open_max_calls:
+                    self.short_circuited_calls += 1
+                    raise CircuitOpenError("LLM circuit breaker is half-open and a probe is in flight")
+                self.probes_in_flight += 1
+                return True
+            return False
+
+    def _after_call(self, is_probe: bool, succeeded: Optional[bool], latency: float):
+        """Record a call's outcome; succeeded is None for neutral outcomes, which are not counted"""
+        with self._lock:
+            if succeeded is None:
+                if is_probe and self.state == self.HALF_OPEN:
+                    # Free the probe slot; the next call probes instead
+                    self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                return
+            now = time.monotonic()
+            slow = latency >= self.slow_call_seconds
+            if is_probe:
+                if self.state == self.HALF_OPEN:
+                    self._transition(self.CLOSED if succeeded and not slow else self.OPEN)
+                return
+
+            self._outcomes.append((now, not succeeded, slow))
+            self._failed_calls += not succeeded
+            self._slow_calls += slow
+            self._prune(now)
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                error_rate, slow_rate = self._rates()
+                if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                    self._transition(self.OPEN)
+
+    def call(self, fn, *args, deadline_limited: bool = False, **kwargs):
+        """
+        Run fn through the breaker, recording its outcome and latency.
+
+        deadline_limited marks a call whose timeout was cut to the request's
+        remaining budget; its timeouts are neutral.
+        """
+        is_probe = self._before_call()
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:  # Neutral outcomes must still release a probe slot
+            self._after_call(is_probe, False if is_upstream_failure(e, deadline_limited) else None,
+                             time.monotonic() - start)
+            raise
+        self._after_call(is_probe, True, time.monotonic() - start)
+        return result
+
+    async def acall(self, fn, *args, deadline_limited: bool = False, **kwargs):
+        """Await the coroutine function fn through the breaker, recording its outcome and latency"""
+        is_probe = self._before_call()
+        start = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:  # Includes cancellation, which is neutral but must not leak a probe slot
+            self._after_call(is_probe, False if is_upstream_failure(e, deadline_limited) else None,
+                             time.monotonic() - start)
+            raise
+        self._after_call(is_probe, True, time.monotonic() - start)
+        return result
+
+    def stats(self) -> dict:
+        """Return breaker state, window rates and transition counts"""
+        with self._lock:
+            self._prune(time.monotonic())
+            error_rate, slow_rate = self._rates()
+            return {
+                'state': self.state,
+                'window_calls': len(self._outcomes),
+                'error_rate': round(error_rate, 3),
+                'slow_call_rate': round(slow_rate, 3),
+                'short_circuited_calls': self.short_circuited_calls,
+                'transitions': dict(self.transitions)
+            }
+
+
+# Shared breaker for all agents in this process
+circuit_breaker = CircuitBreaker(**CIRCUIT_BREAKER_CONFIG)
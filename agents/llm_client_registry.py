@@ -0,0 +1,238 @@
+"""
+LLM Client Registry
+
+Lazily created, shared chat clients keyed by (model, temperature, timeout).
+Every client sits on one pooled keep-alive httpx.Client, so requests reuse
+warm OpenAI connections instead of paying client construction and a new TLS
+handshake per agent call. httpx uses plain sockets and locks, which gevent
+patches, so the pool is shared safely between greenlets. Async calls
+(`ainvoke`) go through a matching pooled httpx.AsyncClient. Both clients
+count the HTTP requests sent from the calling context, so the SDK's own
+retries can be attributed to the LLM call that made them.
+"""
+
+import os
+import math
+import asyncio
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+# Client pool configuration
+CLIENT_POOL_CONFIG = {
+    'max_clients': 32,  # Distinct (model, temperature, timeout) clients kept
+    'timeout_granularity': 1.0,  # Timeouts are rounded down to this many seconds
+    'max_connections': int(os.getenv('OPENAI_MAX_CONNECTIONS', '20')),
+    'max_keepalive_connections': int(os.getenv('OPENAI_MAX_KEEPALIVE', '10')),
+    'keepalive_expiry': 30.0,  # Seconds an idle connection stays open
+}
+
+
+# HTTP requests sent for the LLM call running in this context (None when nobody is counting)
+_http_attempts = contextvars.ContextVar('llm_http_attempts', default=None)
+
+
+def count_http_attempts() -> list:
+    """Count the HTTP requests sent from this context from now on; returns the [attempts] counter"""
+    counter = [0]
+    _http_attempts.set(counter)
+    return counter
+
+
+def _count_attempt(request):
+    counter = _http_attempts.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+async def _acount_attempt(request):
+    _count_attempt(request)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LLMClientRegistry:
+    """LRU of chat clients sharing one pooled HTTP client"""
+
+    def __init__(self, max_clients: int, timeout_granularity: float, max_connections: int,
+                 max_keepalive_connections: int, keepalive_expiry: float):
+        self.max_clients = max_clients
+        self.timeout_granularity = timeout_granularity
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._lock = threading.Lock()
+        self._clients: "OrderedDict[tuple, object]" = OrderedDict()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop = None  # Event loop the async pool belongs to
+        self._factory: Optional[Callable] = None
+        self.clients_created = 0
+        self.client_hits = 0
+
+    def quantize_timeout(self, timeout: float) -> float:
+        """Round a timeout down to the registry granularity so budgets share clients"""
+        steps = math.floor(timeout / self.timeout_granularity)
+        return max(1, steps) * self.timeout_granularity
+
+    def get_http_client(self) -> httpx.Client:
+        """Return the shared keep-alive HTTP client, creating it on first use"""
+        with self._lock:
+            if self._http_client is None or self._http_client.is_closed:
+                self._http_client = httpx.Client(limits=self.limits, event_hooks={'request': [_count_attempt]})
+            return self._http_client
+
+    def get_http_async_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive async HTTP client, creating it on first use"""
+        with self._lock:
+            if self._http_async_client is None or self._http_async_client.is_closed:
+                self._http_async_client = httpx.AsyncClient(limits=self.limits,
+                                                            event_hooks={'request': [_acount_attempt]})
+            return self._http_async_client
+
+    def get(self, model: str = "gpt-4o", temperature: float = 0, timeout: float = 30,
+            max_retries: int = 0):
+        """Return a cached chat client for these settings, creating it on first use"""
+        timeout = self.quantize_timeout(timeout)
+        key = (model, temperature, timeout, max_retries)
+        loop = _running_loop()
+        with self._lock:
+            if loop is not None and loop is not self._async_loop:
+                # Async connections belong to one event loop; a new loop gets a fresh pool and clients
+                self._async_loop = loop
+                self._http_async_client = None
+                self._clients.clear()
+            client = self._clients.get(key)
+            if client is not None:
+                self.client_hits += 1
+                self._clients.move_to_end(key)
+                return client
+
+        http_client = self.get_http_client()
+        http_async_client = self.get_http_async_client()
+        factory = self._factory or ChatOpenAI
+        client = factory(model=model, temperature=temperature, timeout=timeout, max_retries=max_retries,
+                         http_client=http_client, http_async_client=http_async_client)
+
+        with self._lock:
+            # Another greenlet may have created the same client meanwhile
+            existing = self._clients.get(key)
+            if existing is not None:
+                return existing
+            self._clients[key] = client
+            self.clients_created += 1
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return client
+
+    def set_factory(self, factory: Optional[Callable]):
+        """Override how chat clients are built (e.g. with a stub); None restores ChatOpenAI"""
+        with self._lock:
+            self._factory = factory
+            self._clients.clear()
+
+    def close(self):
+        """Drop cached clients and close the shared HTTP client"""
+        with self._lock:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+            # The async client is dropped rather than awaited closed; its sockets close with the event loop
+            self._http_async_client = None
+
+    def stats(self) -> dict:
+        """Return client cache counters"""
+        with self._lock:
+            return {
+                'cached_clients': len(self._clients),
+                'clients_created': self.clients_created,
+                'client_hits': self.client_hits
+            }
+
+
+# Shared registry for all agents in this process
+llm_clients = LLMClientRegistry(**CLIENT_POOL_CONFIG)
+
+
+def get_llm(model: str = "gpt-4o", temperature: float = 0, timeout: float = 30, max_retries: int = 0):
+    """Return the shared chat client for these settings"""
+    return llm_clients.get(model=model, temperature=temperature, timeout=timeout, max_retries=max_retries)
+
+
+if __name__ == "__main__":
+    # Connection reuse check against a local stub of the chat completions API
+    import json
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from langchain_core.messages import HumanMessage
+
+    connections_opened = 0
+    connection_lock = threading.Lock()
+
+    class StubCompletionsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            global connections_opened
+            super().setup()
+            with connection_lock:
+                connections_opened += 1
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            body = json.dumps({
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "{\"extracted_skills\": []}"}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletionsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    messages = [HumanMessage(content="ping")]
+    n_requests = 50
+
+    def run(label: str, make_client: Callable):
+        global connections_opened
+        connections_opened = 0
+        start = time.perf_counter()
+        for i in range(n_requests):
+            make_client(i).invoke(messages)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {n_requests} requests, {connections_opened} connections opened, "
+              f"{elapsed / n_requests * 1000:.1f}ms per request")
+        return connections_opened
+
+    # Agents pass the remaining request budget as timeout, so it differs on every call
+    budgets = [25 + i * 0.037 for i in range(n_requests)]
+    per_call = run("New ChatOpenAI per call",
+                   lambda i: ChatOpenAI(model="gpt-4o", temperature=0, timeout=budgets[i], max_retries=0))
+    pooled = run("Shared client registry",
+                 lambda i: get_llm(timeout=budgets[i]))
+
+    print(f"Registry stats: {llm_clients.stats()}")
+    assert pooled == 1, f"expected one pooled connection, got {pooled}"
+    server.shutdown()
@@ -0,0 +1,180 @@
+"""
+LLM Rate Limiter
+
+Process-wide client-side limiter shared by every OpenAI call. Two token
+buckets track requests per minute and tokens per minute; callers are served
+in FIFO order so bursts from concurrent greenlets queue fairly for a short
+while instead of tripping OpenAI 429s.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+# Rate limit configuration (defaults sit below a typical gpt-4o tier)
+RATE_LIMIT_CONFIG = {
+    'requests_per_minute': int(os.getenv('OPENAI_RPM_LIMIT', '500')),
+    'tokens_per_minute': int(os.getenv('OPENAI_TPM_LIMIT', '30000')),
+    'max_wait_seconds': float(os.getenv('OPENAI_MAX_THROTTLE_SECONDS', '10')),
+}
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call cannot be admitted by the limiter within its wait budget"""
+
+
+@lru_cache(maxsize=4)
+def _get_encoding(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Estimate the token count of a prompt, using tiktoken when available"""
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        try:
+            return len(encoding.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of capacity"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return (or, if negative, charge) tokens after the real usage is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter with FIFO waiting"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_wait_seconds: float):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_wait_seconds = max_wait_seconds
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self.total_calls = 0
+        self.throttled_calls = 0
+        self.timed_out_calls = 0
+        self.total_wait_time = 0.0
+
+    def acquire(self, estimated_tokens: int, max_wait: Optional[float] = None) -> float:
+        """
+        Block until one request and `estimated_tokens` tokens are available.
+
+        Returns the seconds spent waiting. Raises RateLimitTimeout when the
+        call cannot be admitted within max_wait seconds.
+        """
+        if max_wait is None:
+            max_wait = self.max_wait_seconds
+        start = time.monotonic()
+        deadline = start + max_wait
+        ticket = object()
+
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] is ticket:
+                        wait = max(self.request_bucket.time_until_available(1),
+                                   self.token_bucket.time_until_available(estimated_tokens))
+                        if wait <= 0:
+                            self.request_bucket.consume(1)
+                            self.token_bucket.consume(estimated_tokens)
+                            break
+                        if now + wait > deadline:
+                            self.timed_out_calls += 1
+                            raise RateLimitTimeout(f"LLM rate limit wait of {wait:.1f}s exceeds budget of {deadline - now:.1f}s")
+                        self._condition.wait(timeout=wait)
+                    else:
+                        if now >= deadline:
+                            self.timed_out_calls += 1
+                            raise RateLimitTimeout(f"LLM rate limit queue wait exceeded {max_wait:.1f}s")
+                        self._condition.wait(timeout=deadline - now)
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+
+            waited = time.monotonic() - start
+            self.total_calls += 1
+            self.total_wait_time += waited
+            if waited > 0.001:
+                self.throttled_calls += 1
+            return waited
+
+    def try_acquire(self, estimated_tokens: int) -> bool:
+        """Admit a call only if it needs no wait and nobody is queued ahead; never blocks"""
+        with self._condition:
+            if self._queue or max(self.request_bucket.time_until_available(1),
+                                  self.token_bucket.time_until_available(estimated_tokens)) > 0:
+                return False
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(estimated_tokens)
+            self.total_calls += 1
+            return True
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real token usage of a call is known"""
+        with self._condition:
+            self.token_bucket.refund(estimated_tokens - actual_tokens)
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Return limiter counters and current bucket levels"""
+        with self._condition:
+            return {
+                'total_calls': self.total_calls,
+                'throttled_calls': self.throttled_calls,
+                'timed_out_calls': self.timed_out_calls,
+                'total_wait_time': round(self.total_wait_time, 3),
+                'queue_depth': len(self._queue),
+                'available_requests': int(self.request_bucket.tokens),
+                'available_tokens': int(self.token_bucket.tokens)
+            }
+
+
+# Shared limiter for all agents in this process
+rate_limiter = RateLimiter(
+    RATE_LIMIT_CONFIG['requests_per_minute'],
+    RATE_LIMIT_CONFIG['tokens_per_minute'],
+    RATE_LIMIT_CONFIG['max_wait_seconds']
+)
@@ -0,0 +1,115 @@
+"""
+LLM Usage Accounting
+
+Token and cost bookkeeping for LLM calls. Token counts come from the
+response's usage metadata (OpenAI reports it on every completion) or, when
+it is missing, from the local tokenizer estimate. Calls are priced per model
+and rolled up per agent for a request's performance report.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from llm_rate_limiter import estimate_tokens
+
+# USD per 1M (prompt, completion) tokens; dated snapshots match by prefix (gpt-4o-2024-08-06 -> gpt-4o)
+LLM_PRICING = {
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4.1': (2.00, 8.00),
+    'gpt-4.1-mini': (0.40, 1.60),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+
+USAGE_COUNTERS = ('calls', 'failed_calls', 'retries', 'estimated_calls',
+                  'prompt_tokens', 'completion_tokens', 'total_tokens')
+
+
+def model_price(model: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Per-1M token prices for a model (longest matching name), or None when unknown"""
+    matches = [name for name in LLM_PRICING if model and model.startswith(name)]
+    return LLM_PRICING[max(matches, key=len)] if matches else None
+
+
+def call_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one call; 0 for models without a price"""
+    price = model_price(model)
+    if price is None:
+        return 0.0
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def response_model(llm, response) -> str:
+    """Model that served the call: as reported by the API, else as configured on the client"""
+    metadata = getattr(response, 'response_metadata', None) or {}
+    return metadata.get('model_name') or getattr(llm, 'model_name', None) or 'unknown'
+
+
+def call_usage(prompt: str, response, model: str, attempts: int = 1) -> dict:
+    """Token counts and cost of one completed call"""
+    usage = getattr(response, 'usage_metadata', None) or {}
+    if usage.get('total_tokens'):
+        prompt_tokens = usage.get('input_tokens', 0)
+        completion_tokens = usage.get('output_tokens', 0)
+        estimated = False
+    else:
+        content = getattr(response, 'content', '')
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content if isinstance(content, str) else str(content))
+        estimated = True
+    return {
+        'model': model,
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+        'retries': max(0, attempts - 1),
+        'estimated': estimated,
+        'cost_usd': call_cost(model, prompt_tokens, completion_tokens)
+    }
+
+
+def _empty_totals() -> dict:
+    totals = {counter: 0 for counter in USAGE_COUNTERS}
+    totals['cost_usd'] = 0.0
+    return totals
+
+
+class UsageLedger:
+    """Per-agent totals of the LLM calls made for one request"""
+
+    def __init__(self):
+        self.agents: Dict[str, dict] = {}
+
+    def _agent(self, agent: str, model: str) -> dict:
+        totals = self.agents.setdefault(agent, {**_empty_totals(), 'models': []})
+        if model not in totals['models']:
+            totals['models'].append(model)
+        return totals
+
+    def record(self, agent: str, usage: dict):
+        """Add a completed call's usage (see call_usage) to its agent"""
+        totals = self._agent(agent, usage['model'])
+        totals['calls'] += 1
+        totals['retries'] += usage['retries']
+        totals['estimated_calls'] += usage['estimated']
+        for counter in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+            totals[counter] += usage[counter]
+        totals['cost_usd'] += usage['cost_usd']
+
+    def record_failure(self, agent: str, model: str, attempts: int = 1):
+        """Count a call that raised; its tokens are unknown but its retries still happened"""
+        totals = self._agent(agent, model)
+        totals['failed_calls'] += 1
+        totals['retries'] += max(0, attempts - 1)
+
+    def report(self) -> dict:
+        """Pipeline totals with the per-agent breakdown"""
+        report = _empty_totals()
+        by_agent = {}
+        for agent, totals in self.agents.items():
+            for counter in USAGE_COUNTERS:
+                report[counter] += totals[counter]
+            report['cost_usd'] += totals['cost_usd']
+            by_agent[agent] = {**totals, 'models': list(totals['models']), 'cost_usd': round(totals['cost_usd'], 6)}
+        report['cost_usd'] = round(report['cost_usd'], 6)
+        report['by_agent'] = by_agent
+        return report
@@ -0,0 +1,289 @@
+"""
+Metrics
+
+In-process metrics registry rendered in the Prometheus text exposition
+format (served at /metrics, no external service). Counters, gauges and
+histograms keep one small child per label combination; an observation is a
+dict lookup, a bisect and a few additions under the child's lock, cheap
+enough to leave on in the hot path (threading locks become greenlet-aware
+once gevent has patched them). Components that already count their own
+work (caches, breakers, queues) are exported through collectors that are
+only read when /metrics is scraped.
+
+Metrics are per process: with several gunicorn workers each one reports
+its own series.
+"""
+
+import os
+import math
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Metrics configuration
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+# Seconds; spans cache hits (ms) to LLM calls that run into their timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bytes; 16 KB to the upload limit's order of magnitude
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 2 * 1024 * 1024, 5 * 1024 * 1024, 10 * 1024 * 1024)
+
+# A collected sample family: (name, type, help, [(labels, value)])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[tuple, object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child series for these label values (keep a reference to skip the lookup in tight loops)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _series(self):
+        with self._lock:
+            items = list(self._children.items())
+        for values, child in items:
+            yield dict(zip(self.labelnames, values)), child
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}" for labels, child in self._series()]
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, child in self._series():
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                bucket_labels = {**labels, 'le': _format_value(bound)}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics and scrape-time collectors rendered as Prometheus text"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                # Modules reloaded in the same process get the metric they created before
+                if type(existing) is not metric_class:
+                    raise ValueError(f"Metric {name} is already registered as a {existing.type_name}")
+                return existing
+            metric = metric_class(name, *args, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Add a function returning (name, type, help, [(labels, value)]) families at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+
+        # Several collectors may add samples to one family (e.g. one cache layer each)
+        families: Dict[str, list] = {}
+        for collector in collectors:
+            try:
+                for name, type_name, documentation, samples in collector():
+                    family = families.setdefault(name, [type_name, documentation, []])
+                    family[2].extend(samples)
+            except Exception as e:
+                # One failing component must not take the whole scrape down
+                print(f"Metrics collector error: {e}")
+        for name, (type_name, documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_name}")
+            lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+# Shared registry for this process
+metrics = MetricsRegistry()
+
+
+if __name__ == "__main__":
+    # Per-observation overhead: python metrics.py [--gevent]
+    import sys
+    import time
+
+    if '--gevent' in sys.argv:
+        from gevent import monkey
+        monkey.patch_all()
+        # Locks created before patching stay native; the benchmark builds its own registry below
+
+    registry = MetricsRegistry()
+    counter = registry.counter('bench_total', 'Benchmark counter', ('agent',))
+    histogram = registry.histogram('bench_seconds', 'Benchmark histogram', ('agent',))
+    n = 200_000
+
+    def timed(label: str, fn, baseline: float = 0.0) -> float:
+        start = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        per_call = (time.perf_counter() - start) / n
+        print(f"{label:<42} {(per_call - baseline) * 1e9:8.0f} ns")
+        return per_call
+
+    child_counter = counter.labels('agent1')
+    child_histogram = histogram.labels('agent1')
+    print(f"{n} observations each ({'gevent' if '--gevent' in sys.argv else 'threading'} locks), overhead per call:")
+    baseline = timed('empty loop (baseline, absolute)', lambda i: None)
+    timed('counter.labels(...).inc()', lambda i: counter.labels('agent1').inc(), baseline)
+    timed('cached child counter.inc()', lambda i: child_counter.inc(), baseline)
+    timed('histogram.labels(...).observe()', lambda i: histogram.labels('agent1').observe(i * 1e-5), baseline)
+    timed('cached child histogram.observe()', lambda i: child_histogram.observe(i * 1e-5), baseline)
+
+    for agent in range(20):
+        for status in range(5):
+            histogram.labels(f'agent{agent}-{status}').observe(0.1)
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"render of {text.count(chr(10))} lines: {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,272 @@
+"""
+Pipeline Benchmark
+
+Compares pipeline topologies end to end, single-call against per-phase
+roadmap generation in agent3, and the sync pipeline on worker threads
+against the async pipeline on one event loop under concurrent users, using
+a stub LLM that injects latency proportional to the tokens it generates.
+Runs are repeatable and need no OpenAI key. Reports latency, throughput,
+LLM calls and token usage.
+"""
+
+import ast
+import re
+import json
+import time
+import asyncio
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage
+
+import career_pathfinder_optimized as pipeline
+from llm_client_registry import llm_clients
+from llm_rate_limiter import RateLimiter, estimate_tokens
+
+# Benchmark configuration (latencies roughly a tenth of gpt-4o's so runs stay short)
+BENCHMARK_CONFIG = {
+    'base_latency': 0.05,  # Seconds per call before the first token
+    'per_token_latency': 0.001,  # Seconds per generated token
+    'runs_per_topology': 5,
+    'concurrent_users': (50, 200),  # Simulated users for the sync vs async throughput comparison
+}
+
+
+class LatencyStubLLM:
+    """Chat model stand-in that answers pipeline prompts locally and sleeps like an LLM"""
+
+    base_latency = BENCHMARK_CONFIG['base_latency']
+    per_token_latency = BENCHMARK_CONFIG['per_token_latency']
+    calls: List[dict] = []
+    _lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.calls = []
+
+    @staticmethod
+    def _list_after(label: str, prompt: str) -> list:
+        match = re.search(rf"^{label}: (\[.*\])$", prompt, re.MULTILINE)
+        return ast.literal_eval(match.group(1)) if match else []
+
+    def _answer(self, prompt: str) -> dict:
+        user_input = prompt.split("USER INPUT:", 1)[1] if "USER INPUT:" in prompt else ""
+        role_match = re.search(r"FOR (.+?):", prompt)
+        role = role_match.group(1) if role_match else ""
+
+        if "PHASE SKILLS:" in prompt:
+            return {'skills': pipeline.local_phase_steps(self._list_after("PHASE SKILLS", prompt))}
+        if '"roadmap"' in prompt:
+            missing = self._list_after("MISSING", prompt)
+            nice = self._list_after("NICE", prompt)
+            return {'roadmap': pipeline.generate_fallback_roadmap(missing, nice)}
+        if '"extracted_skills"' in prompt and '"missing_skills"' in prompt:
+            skills = pipeline.extract_skills_fallback(user_input)
+            return {'extracted_skills': skills, **pipeline.analyze_gaps_locally(skills, role)}
+        if '"extracted_skills"' in prompt:
+            return {'extracted_skills': pipeline.extract_skills_fallback(user_input)}
+        user_skills = self._list_after("USER SKILLS", prompt)
+        return pipeline.analyze_gaps_locally(user_skills, role)
+
+    def _respond(self, messages):
+        prompt = messages[-1].content
+        content = json.dumps(self._answer(prompt))
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(content)
+        latency = self.base_latency + output_tokens * self.per_token_latency
+
+        with self._lock:
+            self.calls.append({'input_tokens': input_tokens, 'output_tokens': output_tokens})
+        return latency, AIMessage(content=content, usage_metadata={
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': input_tokens + output_tokens
+        }, response_metadata={'model_name': self.kwargs.get('model', 'stub')})
+
+    def invoke(self, messages, **kwargs):
+        latency, message = self._respond(messages)
+        time.sleep(latency)
+        return message
+
+    async def ainvoke(self, messages, **kwargs):
+        latency, message = self._respond(messages)
+        await asyncio.sleep(latency)
+        return message
+
+
+def benchmark_topology(topology: str, input_text: str, target_role: str, runs: int) -> Dict:
+    """Run the pipeline repeatedly with one topology and summarize latency and token usage"""
+    latencies = []
+    LatencyStubLLM.reset()
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = pipeline.run_pipeline_optimized(input_text, target_role, topology=topology)
+        latencies.append(time.perf_counter() - start)
+        if result.get('degraded_stages'):
+            raise RuntimeError(f"{topology} run degraded: {result['degraded_stages']}")
+
+    calls = LatencyStubLLM.calls
+    return {
+        'topology': topology,
+        'mean_latency': statistics.mean(latencies),
+        'p95_latency': sorted(latencies)[max(0, int(round(0.95 * len(latencies))) - 1)],
+        'llm_calls_per_run': len(calls) / runs,
+        'input_tokens_per_run': sum(c['input_tokens'] for c in calls) / runs,
+        'output_tokens_per_run': sum(c['output_tokens'] for c in calls) / runs,
+        'missing_skills': result.get('missing_skills', [])
+    }
+
+
+def benchmark_roadmap_mode(mode: str, missing_skills: List[str], nice_to_have: List[str],
+                           target_role: str, runs: int) -> Dict:
+    """Time agent3 alone in one roadmap generation mode"""
+    latencies = []
+    previous_mode = pipeline.PERFORMANCE_CONFIG['roadmap_generation_mode']
+    pipeline.PERFORMANCE_CONFIG['roadmap_generation_mode'] = mode
+    LatencyStubLLM.reset()
+    try:
+        for _ in range(runs):
+            pipeline.reset_profiler()
+            state = {'missing_skills': missing_skills, 'nice_to_have': nice_to_have,
+                     'target_role': target_role, 'degraded_stages': []}
+            start = time.perf_counter()
+            result = pipeline.agent3_roadmap_mentor_optimized(state)
+            latencies.append(time.perf_counter() - start)
+            if result.get('degraded_stages'):
+                raise RuntimeError(f"{mode} run degraded: {result['degraded_stages']}")
+    finally:
+        pipeline.PERFORMANCE_CONFIG['roadmap_generation_mode'] = previous_mode
+
+    calls = LatencyStubLLM.calls
+    return {
+        'mode': mode,
+        'mean_latency': statistics.mean(latencies),
+        'llm_calls_per_run': len(calls) / runs,
+        'max_output_tokens_per_call': max(c['output_tokens'] for c in calls),
+        'output_tokens_per_run': sum(c['output_tokens'] for c in calls) / runs,
+        'steps': sum(len(phase['skills']) for phase in result['roadmap'])
+    }
+
+
+def benchmark_concurrency(users: int, use_async: bool, target_role: str) -> Dict:
+    """Serve `users` simultaneous pipeline requests with distinct resumes, sync on threads or async on one loop"""
+    inputs = [f"Skills: Python, Git, SQL, Excel. Resume #{i}" for i in range(users)]
+    latencies = []
+
+    def timed_sync(text):
+        start = time.perf_counter()
+        pipeline.run_pipeline_optimized(text, target_role)
+        latencies.append(time.perf_counter() - start)
+
+    async def timed_async(text):
+        start = time.perf_counter()
+        await pipeline.run_pipeline_async(text, target_role)
+        latencies.append(time.perf_counter() - start)
+
+    async def run_all():
+        await asyncio.gather(*(timed_async(text) for text in inputs))
+
+    LatencyStubLLM.reset()
+    start = time.perf_counter()
+    if use_async:
+        asyncio.run(run_all())
+    else:
+        # One thread per user stands in for gevent's greenlet per request
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(timed_sync, inputs))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'mode': 'async' if use_async else 'sync',
+        'users': users,
+        'elapsed': elapsed,
+        'throughput': users / elapsed,
+        'p50_latency': latencies[len(latencies) // 2],
+        'p95_latency': latencies[max(0, int(round(0.95 * len(latencies))) - 1)],
+        'llm_calls': len(LatencyStubLLM.calls)
+    }
+
+
+if __name__ == "__main__":
+    sample_input = """
+    Software Engineer with 3 years experience
+    Skills: Python, JavaScript, React, Node.js, MongoDB, Git, SQL
+    Experience: Built web applications, REST APIs, worked with databases
+    Education: Computer Science degree
+    """
+    sample_target_role = "Data Scientist"
+
+    # Every run should reach the (stub) LLM, so shared roadmap caching stays off here
+    pipeline.PERFORMANCE_CONFIG['enable_caching'] = False
+    llm_clients.set_factory(LatencyStubLLM)
+    try:
+        results = [
+            benchmark_topology(topology, sample_input, sample_target_role, BENCHMARK_CONFIG['runs_per_topology'])
+            for topology in pipeline.PIPELINE_TOPOLOGIES
+        ]
+    finally:
+        llm_clients.set_factory(None)
+
+    print("\n📈 Topology comparison:")
+    print(f"   {'topology':<12}{'mean s':>9}{'p95 s':>9}{'calls':>7}{'in tok':>9}{'out tok':>9}")
+    for r in results:
+        print(f"   {r['topology']:<12}{r['mean_latency']:>9.3f}{r['p95_latency']:>9.3f}"
+              f"{r['llm_calls_per_run']:>7.0f}{r['input_tokens_per_run']:>9.0f}{r['output_tokens_per_run']:>9.0f}")
+
+    baseline, fused = results[0], results[1]
+    print(f"   fused saves {1 - fused['mean_latency'] / baseline['mean_latency']:.0%} latency, "
+          f"{1 - (fused['input_tokens_per_run'] + fused['output_tokens_per_run']) / (baseline['input_tokens_per_run'] + baseline['output_tokens_per_run']):.0%} tokens")
+    print(f"   same gap result: {baseline['missing_skills'] == fused['missing_skills']}")
+
+    # agent3 alone: one long completion vs concurrent per-phase completions
+    missing = pipeline.JOB_ROLES_DATA.get(sample_target_role, [])[:6]
+    nice = ["Tableau", "Docker"]
+    llm_clients.set_factory(LatencyStubLLM)
+    try:
+        mode_results = [
+            benchmark_roadmap_mode(mode, missing, nice, sample_target_role, BENCHMARK_CONFIG['runs_per_topology'])
+            for mode in ('single', 'per_phase')
+        ]
+    finally:
+        llm_clients.set_factory(None)
+
+    print("\n📈 Roadmap generation modes (agent3 only):")
+    print(f"   {'mode':<12}{'mean s':>9}{'calls':>7}{'out tok':>9}{'max/call':>10}{'steps':>7}")
+    for r in mode_results:
+        print(f"   {r['mode']:<12}{r['mean_latency']:>9.3f}{r['llm_calls_per_run']:>7.0f}"
+              f"{r['output_tokens_per_run']:>9.0f}{r['max_output_tokens_per_call']:>10}{r['steps']:>7}")
+    single, per_phase = mode_results
+    print(f"   per_phase is {single['mean_latency'] / per_phase['mean_latency']:.1f}x faster; slowest phase call "
+          f"≈ {BENCHMARK_CONFIG['base_latency'] + per_phase['max_output_tokens_per_call'] * BENCHMARK_CONFIG['per_token_latency']:.3f}s")
+
+    # Concurrent users: sync pipeline on worker threads vs async pipeline on one event loop
+    previous_limiter = pipeline.rate_limiter
+    pipeline.rate_limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_wait_seconds=10)
+    previous_coalescing = pipeline.PERFORMANCE_CONFIG['enable_coalescing']
+    pipeline.PERFORMANCE_CONFIG['enable_coalescing'] = False
+    llm_clients.set_factory(LatencyStubLLM)
+    try:
+        benchmark_concurrency(10, False, sample_target_role)  # Warm-up: tokenizer, graphs, clients
+        benchmark_concurrency(10, True, sample_target_role)
+        concurrency_results = [
+            benchmark_concurrency(users, use_async, sample_target_role)
+            for users in BENCHMARK_CONFIG['concurrent_users']
+            for use_async in (False, True)
+        ]
+    finally:
+        llm_clients.set_factory(None)
+        pipeline.rate_limiter = previous_limiter
+        pipeline.PERFORMANCE_CONFIG['enable_coalescing'] = previous_coalescing
+
+    print("\n📈 Concurrent users (three_call topology, limiter and coalescing off):")
+    print(f"   {'mode':<8}{'users':>7}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}{'calls':>7}")
+    for r in concurrency_results:
+        print(f"   {r['mode']:<8}{r['users']:>7}{r['throughput']:>9.1f}{r['p50_latency']:>9.3f}"
+              f"{r['p95_latency']:>9.3f}{r['llm_calls']:>7}")
@@ -0,0 +1,132 @@
+"""
+Pipeline Checkpoints
+
+Per-session LangGraph checkpoints of the pipeline state after every node,
+stored with the sqlite saver (langgraph-checkpoint-sqlite) or in memory when
+it is not installed; the sync and async (`ainvoke`) pipelines share the
+same store. A retry resumes from the last cleanly completed agent
+instead of repeating LLM calls that already succeeded, and the roadmap agent
+can be re-run on top of a stored gap analysis.
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:
+    SqliteSaver = None
+
+# Checkpoint configuration
+CHECKPOINT_CONFIG = {
+    'enabled': os.getenv('PIPELINE_CHECKPOINTS', 'true').lower() in ('1', 'true', 'yes'),
+    'db_path': os.getenv('CHECKPOINT_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline_checkpoints.db')),
+    'ttl_seconds': float(os.getenv('CHECKPOINT_TTL_HOURS', '24')) * 3600,
+    'prune_interval': 3600
+}
+
+
+def checkpoint_thread_id(session_id: str, target_role: str, topology: str) -> str:
+    """Checkpoint thread for one session's pipeline runs towards a role"""
+    role_digest = hashlib.sha256(target_role.encode('utf-8')).hexdigest()[:16]
+    return f"{session_id}:{role_digest}:{topology}"
+
+
+if SqliteSaver is not None:
+    class ThreadedSqliteSaver(SqliteSaver):
+        """SqliteSaver whose async methods run the sync ones on a worker thread, so `ainvoke` graphs can use it too"""
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for checkpoint_tuple in tuples:
+                yield checkpoint_tuple
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=''):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+class CheckpointStore:
+    """Owns the LangGraph checkpointer and expires threads that have not been used for the TTL"""
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = 24 * 3600, prune_interval: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.pruned_threads = 0
+
+        if db_path and SqliteSaver is not None:
+            self.saver = ThreadedSqliteSaver(sqlite3.connect(db_path, check_same_thread=False))
+            self.saver.setup()
+            # The saver commits on its own connection under its own lock; bookkeeping gets a separate
+            # connection so its commits never land inside one of the saver's transactions
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        else:
+            if db_path:
+                print("⚠️ langgraph-checkpoint-sqlite is not installed; pipeline checkpoints are kept in memory")
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            self.saver = InMemorySaver()
+
+        # Last use of each thread, so stale checkpoints can be deleted
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_threads (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def touch(self, thread_id: str):
+        """Mark a thread as used now; occasionally prunes expired threads"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, time.time())
+            )
+            self._conn.commit()
+        if time.time() - self._last_prune > self.prune_interval:
+            self.prune_expired()
+
+    def reset(self, thread_id: str):
+        """Drop a thread's checkpoints before a fresh run replaces them"""
+        self.saver.delete_thread(thread_id)
+
+    def prune_expired(self) -> int:
+        """Delete checkpoints of threads unused for longer than the TTL; returns threads removed"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._last_prune = time.time()
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?", (cutoff,)
+            ).fetchall()]
+            for thread_id in expired:
+                self.saver.delete_thread(thread_id)
+            self._conn.execute("DELETE FROM checkpoint_threads WHERE updated_at < ?", (cutoff,))
+            self._conn.commit()
+            self.pruned_threads += len(expired)
+        if expired:
+            print(f"🧹 Pruned checkpoints of {len(expired)} idle pipeline threads")
+        return len(expired)
+
+    def stats(self) -> dict:
+        """Return the backend and thread counts"""
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(*) FROM checkpoint_threads").fetchone()[0]
+        return {
+            'backend': type(self.saver).__name__,
+            'threads': threads,
+            'pruned_threads': self.pruned_threads
+        }
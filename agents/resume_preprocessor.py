@@ -0,0 +1,221 @@
+"""
+Resume Preprocessor
+
+Shrinks raw resume text before it goes into the skill extraction prompt:
+fixes PDF whitespace and hyphenation, splits the text into sections,
+drops boilerplate and contact/PII blocks, keeps the most skill-dense
+sections (Skills, Projects, Experience) within a token budget and splits
+what is kept into chunks that can be extracted in parallel.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+
+from llm_rate_limiter import estimate_tokens
+
+# Preprocessing configuration
+RESUME_PREPROCESSING_CONFIG = {
+    'enabled': os.getenv('RESUME_PREPROCESSING', 'true').lower() in ('1', 'true', 'yes'),
+    'token_budget': int(os.getenv('RESUME_TOKEN_BUDGET', '4000')),  # Resume tokens kept across all chunks
+    'chunk_tokens': int(os.getenv('RESUME_CHUNK_TOKENS', '1500')),  # Resume tokens per extraction call
+    'max_chunks': 4,
+}
+
+# Section headings, in order of how much skill evidence the section usually carries
+SECTION_PRIORITIES = [
+    ('skills', r'(technical\s+|key\s+|core\s+|professional\s+)?(skills|competencies|technologies|tech\s+stack|tools)'),
+    ('projects', r'(academic\s+|personal\s+|key\s+)?projects?'),
+    ('experience', r'(work\s+|professional\s+|relevant\s+)?(experience|employment(\s+history)?|internships?|work\s+history)'),
+    ('certifications', r'(certifications?|licenses?|courses|training|achievements|awards)'),
+    ('summary', r'(professional\s+)?(summary|profile|objective|about(\s+me)?)'),
+    ('education', r'(education|academic\s+background|qualifications)'),
+    ('publications', r'(publications|research)'),
+]
+
+# Sections that never carry technical skills
+BOILERPLATE_SECTIONS = [
+    ('references', r'references?(\s+available\s+upon\s+request)?'),
+    ('personal', r'(personal\s+(details|information|data)|contact(\s+(details|information))?)'),
+    ('interests', r'(hobbies|interests|extra[\s-]?curricular(\s+activities)?)'),
+    ('declaration', r'declaration'),
+    ('languages', r'(spoken\s+)?languages\s+known'),
+]
+
+HEADING_PATTERNS = [
+    (name, re.compile(r'^\s*' + pattern + r'\s*:?\s*$', re.IGNORECASE))
+    for name, pattern in SECTION_PRIORITIES + BOILERPLATE_SECTIONS
+]
+SECTION_RANK = {name: rank for rank, (name, _) in enumerate(SECTION_PRIORITIES)}
+BOILERPLATE = {name for name, _ in BOILERPLATE_SECTIONS}
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+(\.[\w-]+)+')
+PHONE_PATTERN = re.compile(r'(\+?\d[\d\s().-]{7,}\d)')
+URL_PATTERN = re.compile(r'(https?://\S+|www\.\S+|\b(linkedin|github)\.com/\S*)', re.IGNORECASE)
+BULLET_PATTERN = re.compile(r'^\s*[•●▪■◦‣∙·*]\s*')
+
+
+@dataclass
+class PreprocessedResume:
+    text: str
+    chunks: List[str] = field(default_factory=list)
+    original_tokens: int = 0
+    tokens: int = 0
+    sections_kept: List[str] = field(default_factory=list)
+    sections_dropped: List[str] = field(default_factory=list)
+    truncated: bool = False
+
+    def report(self, build_prompt: Callable[[str], str], raw_text: str) -> dict:
+        """Prompt tokens before and after preprocessing, for the request's performance report"""
+        prompt_tokens_before = estimate_tokens(build_prompt(raw_text))
+        prompt_tokens_after = sum(estimate_tokens(build_prompt(chunk)) for chunk in self.chunks)
+        return {
+            'resume_tokens_before': self.original_tokens,
+            'resume_tokens_after': self.tokens,
+            'prompt_tokens_before': prompt_tokens_before,
+            'prompt_tokens_after': prompt_tokens_after,
+            'saved_ratio': round(1 - prompt_tokens_after / prompt_tokens_before, 3) if prompt_tokens_before else 0,
+            'chunks': len(self.chunks),
+            'sections_kept': self.sections_kept,
+            'sections_dropped': self.sections_dropped,
+            'truncated': self.truncated
+        }
+
+
+def normalize_whitespace(text: str) -> str:
+    """Undo PDF line-break hyphenation, unify bullets and collapse runs of spaces and blank lines"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\u00a0', ' ').replace('\u00ad', '')
+    # "devel-\nopment" -> "development" (lowercase continuation only, so "Front-\nEnd" stays hyphenated)
+    text = re.sub(r'(\w)-\n\s*([a-z])', r'\1\2', text)
+    lines = []
+    for line in text.split('\n'):
+        line = BULLET_PATTERN.sub('- ', line)
+        line = re.sub(r'[ \t\f\v]+', ' ', line).strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+def strip_pii(line: str) -> str:
+    """Remove e-mail addresses, phone numbers and profile URLs from a line"""
+    line = EMAIL_PATTERN.sub('', line)
+    line = URL_PATTERN.sub('', line)
+    line = PHONE_PATTERN.sub('', line)
+    return re.sub(r'\s*[|,;]\s*([|,;]\s*)*$', '', re.sub(r'^\s*[|,;]\s*', '', line)).strip()
+
+
+def split_sections(text: str) -> List[Tuple[str, List[str]]]:
+    """Split normalized text into (section name, lines); text before the first heading is the 'header'"""
+    sections = [('header', [])]
+    for line in text.split('\n'):
+        # Headings are short lines; long lines that merely start with "Skills" are content
+        heading = next((name for name, pattern in HEADING_PATTERNS if len(line) <= 60 and pattern.match(line)), None)
+        if heading is not None:
+            sections.append((heading, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, lines) for name, lines in sections if any(lines)]
+
+
+def _take_lines(lines: List[str], budget: int) -> Tuple[List[str], int]:
+    """Leading lines of a section that fit in the token budget"""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept, used
+
+
+def _chunk_lines(lines: List[str], chunk_tokens: int) -> List[str]:
+    """Pack lines into chunks of at most chunk_tokens, breaking only between lines"""
+    chunks, current, used = [], [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > chunk_tokens:
+            chunks.append('\n'.join(current))
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def preprocess_resume(raw_text: str, token_budget: int = None, chunk_tokens: int = None,
+                      max_chunks: int = None) -> PreprocessedResume:
+    """Clean, prioritize and budget resume text for the extraction prompt"""
+    token_budget = token_budget or RESUME_PREPROCESSING_CONFIG['token_budget']
+    chunk_tokens = chunk_tokens or RESUME_PREPROCESSING_CONFIG['chunk_tokens']
+    max_chunks = max_chunks or RESUME_PREPROCESSING_CONFIG['max_chunks']
+    token_budget = min(token_budget, chunk_tokens * max_chunks)
+    original_tokens = estimate_tokens(raw_text) if raw_text else 0
+
+    sections, dropped = [], []
+    for name, lines in split_sections(normalize_whitespace(raw_text)):
+        if name in BOILERPLATE:
+            dropped.append(name)
+            continue
+        lines = [strip_pii(line) if name == 'header' else line for line in lines]
+        lines = [line for line in lines if line]
+        if lines:
+            sections.append((name, lines))
+
+    # Skill-dense sections claim the budget first; unknown headings rank with the header, last
+    ranked = sorted(sections, key=lambda section: SECTION_RANK.get(section[0], len(SECTION_RANK)))
+    kept_lines, kept_names, used, truncated = [], [], 0, False
+    for name, lines in ranked:
+        taken, cost = _take_lines(lines, token_budget - used)
+        if len(taken) < len(lines):
+            truncated = True
+            if not taken:
+                dropped.append(name)
+                continue
+        if name != 'header':
+            kept_lines.append(f"{name.upper()}:")
+        kept_lines.extend(taken)
+        kept_names.append(name)
+        used += cost
+
+    text = '\n'.join(kept_lines)
+    chunks = _chunk_lines(kept_lines, chunk_tokens) if used > chunk_tokens else [text]
+    return PreprocessedResume(
+        text=text,
+        chunks=chunks or [''],
+        original_tokens=original_tokens,
+        tokens=estimate_tokens(text) if text else 0,
+        sections_kept=kept_names,
+        sections_dropped=dropped,
+        truncated=truncated
+    )
+
+
+if __name__ == "__main__":
+    # Token savings on a synthetic PDF-style resume: python resume_preprocessor.py [resume.txt]
+    import sys
+    import time
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            sample = f.read()
+    else:
+        sample = "\n".join([
+            "Jane Doe", "jane.doe@example.com  |  +1 (555) 123-4567  |  linkedin.com/in/janedoe",
+            "PROFESSIONAL SUMMARY", "Data   engineer with 6 years of experience building pipe-", "lines.",
+            "TECHNICAL SKILLS", "• Python, SQL, Spark, Airflow, dbt", "• AWS (S3, Glue, Redshift), Docker, Kubernetes",
+            "EXPERIENCE",
+        ] + [f"● Built ingestion job {i} with Python and Airflow, cutting   latency by {i}%" for i in range(400)] + [
+            "EDUCATION", "B.Sc. Computer Science", "HOBBIES", "Chess, hiking", "REFERENCES", "Available upon request"
+        ])
+
+    preprocess_resume(sample)  # Warm-up: regex compilation and tokenizer loading
+    start = time.perf_counter()
+    result = preprocess_resume(sample)
+    elapsed = time.perf_counter() - start
+    report = result.report(lambda text: f"Extract skills from: {text}", sample)
+    print(f"Preprocessed in {elapsed * 1000:.1f} ms")
+    for key, value in report.items():
+        print(f"  {key}: {value}")
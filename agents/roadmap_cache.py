@@ -0,0 +1,129 @@
+"""
+Roadmap Cache
+
+Generated roadmaps keyed on the canonical gap set they were built from:
+target role, sorted priority missing / nice-to-have skills, generation mode
+and curated data version. Resumes that reduce to the same gaps share one
+LLM-generated roadmap. Entries live in an in-memory LRU, optionally backed
+by sqlite so they survive restarts.
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+# Roadmap cache configuration
+ROADMAP_CACHE_CONFIG = {
+    'ttl_seconds': float(os.getenv('ROADMAP_CACHE_TTL_HOURS', '168')) * 3600,
+    'db_path': os.getenv('ROADMAP_CACHE_PATH') or None,  # None keeps the cache in memory only
+}
+
+
+def make_cache_key(target_role: str, missing_skills: List[str], nice_to_have: List[str],
+                   mode: str, data_version: str) -> str:
+    """Stable key for a gap set: order and case of the skill lists do not matter"""
+    def canonical_set(skills):
+        return sorted({skill.strip().lower() for skill in skills if skill and skill.strip()})
+
+    payload = json.dumps([target_role.strip().lower(), canonical_set(missing_skills),
+                          canonical_set(nice_to_have), mode, data_version])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RoadmapCache:
+    """LRU of generated roadmaps with optional sqlite persistence"""
+
+    def __init__(self, max_entries: int = 100, ttl_seconds: float = 7 * 24 * 3600, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, roadmap)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS roadmap_cache ("
+                "cache_key TEXT PRIMARY KEY, roadmap TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """Return a copy of the cached roadmap, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created_at, roadmap FROM roadmap_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+                    self._insert(key, entry)
+
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: str, roadmap: List[dict]):
+        """Cache a roadmap under its gap-set key"""
+        entry = (time.time(), copy.deepcopy(roadmap))
+        with self._lock:
+            self._insert(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO roadmap_cache (cache_key, roadmap, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry[1]), entry[0])
+                )
+                self._conn.commit()
+
+    def clear(self):
+        """Drop every cached roadmap"""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM roadmap_cache")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return cache size and hit counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total > 0 else 0,
+                'persistent': self._conn is not None
+            }
+
+    def _insert(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM roadmap_cache WHERE cache_key = ?", (evicted_key,))
+                self._conn.commit()
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM roadmap_cache WHERE cache_key = ?", (key,))
+            self._conn.commit()
@@ -0,0 +1,242 @@
+"""
+Roadmap Templates
+
+One full roadmap per curated role, generated once (offline or on first use)
+and stored with the version of the curated data it was built from. A user's
+roadmap is the template minus the skills they already have, rebalanced
+across phases locally, so the LLM is only needed when there is no template
+or the user's gaps do not fit it. Templates are invalidated once a process
+has loaded changed job_roles.json, courses.json or skill_prerequisites.json.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+from roadmap_engine import RoadmapEngine
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+# Template configuration
+TEMPLATE_CONFIG = {
+    'enabled': os.getenv('ROADMAP_TEMPLATES', 'false').lower() == 'true',
+    'path': os.getenv('ROADMAP_TEMPLATE_PATH', os.path.join(DATA_DIR, 'roadmap_templates.json')),
+    'max_uncovered_skills': 2,  # Gaps outside the template that can still be filled locally
+    'max_uncovered_ratio': 0.25,  # Above this share of uncovered gaps the remainder is "unusual"
+}
+
+DATA_FILES = ('job_roles.json', 'courses.json', 'skill_prerequisites.json')
+
+
+class DataVersion:
+    """Content hash of the curated data files, recomputed only when a file changes on disk"""
+
+    def __init__(self, paths: List[str]):
+        self.paths = paths
+        self._lock = threading.Lock()
+        self._signature = None
+        self._version = ""
+
+    def _stat_signature(self) -> tuple:
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def current(self) -> str:
+        """Return the current data version"""
+        signature = self._stat_signature()
+        with self._lock:
+            if signature != self._signature:
+                digest = hashlib.sha256()
+                for path in self.paths:
+                    try:
+                        with open(path, 'rb') as f:
+                            digest.update(f.read())
+                    except OSError:
+                        digest.update(b'missing:' + os.path.basename(path).encode())
+                self._signature = signature
+                self._version = digest.hexdigest()[:16]
+            return self._version
+
+
+data_version = DataVersion([os.path.join(DATA_DIR, name) for name in DATA_FILES])
+
+
+def get_data_version() -> str:
+    """Version of the curated data that roadmaps are built from"""
+    return data_version.current()
+
+
+@dataclass
+class RoadmapTemplate:
+    role: str
+    version: str
+    roadmap: List[dict]  # Phases covering every curated skill of the role
+    source: str = "llm"
+    created_at: float = 0.0
+
+
+class TemplateStore:
+    """Versioned per-role templates persisted to a JSON file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._templates: Dict[str, RoadmapTemplate] = {}
+        self._building = set()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.builds = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._templates = {role: RoadmapTemplate(**template) for role, template in data.get('templates', {}).items()}
+            print(f"✅ Loaded {len(self._templates)} roadmap templates from {self.path}")
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️  Could not load roadmap templates: {e}")
+
+    def _persist(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'templates': {role: asdict(t) for role, t in self._templates.items()}}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, role: str, version: str) -> Optional[RoadmapTemplate]:
+        """Return the role's template if it was built from this data version (the one the caller loaded)"""
+        with self._lock:
+            template = self._templates.get(role)
+            if template is None:
+                self.misses += 1
+                return None
+            if template.version != version:
+                self.stale += 1
+                del self._templates[role]
+                return None
+            self.hits += 1
+            return template
+
+    def put(self, template: RoadmapTemplate):
+        """Store a template and persist the store"""
+        with self._lock:
+            self._templates[template.role] = template
+            self.builds += 1
+            try:
+                self._persist()
+            except OSError as e:
+                print(f"⚠️  Could not persist roadmap templates: {e}")
+
+    def build_in_background(self, role: str, builder: Callable[[str], Optional[RoadmapTemplate]]):
+        """Build a missing template on a background thread (at most one build per role at a time)"""
+        with self._lock:
+            if role in self._building:
+                return
+            self._building.add(role)
+
+        def build():
+            try:
+                template = builder(role)
+                if template is not None:
+                    self.put(template)
+                    print(f"🧩 Roadmap template ready for {role}")
+            except Exception as e:
+                print(f"⚠️  Roadmap template build failed for {role}: {e}")
+            finally:
+                with self._lock:
+                    self._building.discard(role)
+
+        threading.Thread(target=build, name=f"template-{role}", daemon=True).start()
+
+    def stats(self) -> dict:
+        """Return template counters"""
+        with self._lock:
+            total = self.hits + self.misses + self.stale
+            return {
+                'templates': len(self._templates),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'builds': self.builds,
+                'hit_ratio': self.hits / total if total > 0 else 0
+            }
+
+
+def rebalance_phases(steps: List[dict], phase_names: List[str]) -> List[dict]:
+    """Split ordered steps into contiguous phases holding roughly equal learning hours"""
+    if not steps:
+        return []
+    phase_count = min(len(phase_names), len(steps))
+    total_hours = sum(max(1, step.get('est_hours', 10)) for step in steps)
+    phases = [[] for _ in range(phase_count)]
+    cumulative = 0
+    for index, step in enumerate(steps):
+        phase_index = min(phase_count - 1, int(cumulative * phase_count / total_hours))
+        # Leave at least one step for each later phase
+        phase_index = max(phase_index, phase_count - (len(steps) - index))
+        phases[phase_index].append(step)
+        cumulative += max(1, step.get('est_hours', 10))
+    return [{"phase": name, "skills": skills} for name, skills in zip(phase_names, phases) if skills]
+
+
+def personalize_template(template: RoadmapTemplate, missing_skills: List[str], nice_to_have: List[str],
+                         engine: RoadmapEngine, build_steps: Callable[[List[str]], List[dict]],
+                         phase_names: List[str]) -> Optional[List[dict]]:
+    """
+    Keep only the template steps the user still needs and rebalance them.
+
+    Gaps the template does not cover are filled by build_steps and placed by
+    the engine's prerequisite DAG; returns None when there are too many of
+    them for the template to be a good fit.
+    """
+    canonicalize = engine.canonicalize
+    wanted = {canonicalize(skill) for skill in missing_skills + nice_to_have}
+    template_steps = [step for phase in template.roadmap for step in phase.get('skills', [])]
+    covered = {canonicalize(step.get('skill', '')) for step in template_steps}
+
+    uncovered = [skill for skill in dict.fromkeys(canonicalize(s) for s in missing_skills + nice_to_have) if skill not in covered]
+    if wanted and (len(uncovered) > TEMPLATE_CONFIG['max_uncovered_skills']
+                   or len(uncovered) / len(wanted) > TEMPLATE_CONFIG['max_uncovered_ratio']):
+        return None
+
+    steps = [dict(step) for step in template_steps if canonicalize(step.get('skill', '')) in wanted]
+    for step in build_steps(uncovered) if uncovered else []:
+        index = engine.insertion_index([canonicalize(existing.get('skill', '')) for existing in steps],
+                                       canonicalize(step['skill']))
+        steps.insert(index, step)
+    return rebalance_phases(steps, phase_names)
+
+
+if __name__ == "__main__":
+    # Offline build: python roadmap_templates.py [--local] [role ...]
+    import sys
+    import career_pathfinder_optimized as pipeline
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    use_llm = '--local' not in sys.argv
+    roles = args or list(pipeline.JOB_ROLES_DATA.keys())
+
+    for role in roles:
+        start = time.time()
+        template = pipeline.build_role_template(role, use_llm=use_llm)
+        if template is None:
+            print(f"❌ {role}: template build failed")
+            continue
+        pipeline.template_store.put(template)
+        steps = sum(len(phase['skills']) for phase in template.roadmap)
+        print(f"🧩 {role}: {steps} steps from {template.source} in {time.time() - start:.2f}s (version {template.version})")
@@ -0,0 +1,137 @@
+"""
+Singleflight
+
+Coalesces identical concurrent work: the first caller for a key runs the
+function, callers arriving while it is in flight wait for that execution and
+receive a copy of its result. Built on threading primitives, so it works
+across threads and, once gevent has patched them, across greenlets. `ado`
+does the same for coroutines on an asyncio event loop.
+"""
+
+import copy
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+@dataclass
+class FlightOutcome:
+    result: Any
+    shared: bool  # True when this caller waited on another caller's execution
+    waiters: int  # Callers that joined the flight besides the one that ran it
+
+
+class _Flight:
+    def __init__(self, done):
+        self.done = done  # threading.Event or asyncio.Event
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-key in-flight deduplication with waiter accounting"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._async_flights = {}  # (event loop, key) -> _Flight
+        self.flights = 0
+        self.coalesced_calls = 0
+        self.max_waiters = 0
+        self.recent_waiters = deque(maxlen=100)  # Waiters per completed flight
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> FlightOutcome:
+        """
+        Run fn once per key among concurrent callers.
+
+        A waiter that is still waiting after `timeout` seconds stops waiting
+        and runs fn itself.
+        """
+        flight, is_leader = self._join(self._flights, key, threading.Event)
+
+        if is_leader:
+            try:
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                self._land(self._flights, key, flight)
+            return FlightOutcome(flight.result, False, flight.waiters)
+
+        if not flight.done.wait(timeout):
+            return FlightOutcome(fn(), False, 0)
+        if flight.error is not None:
+            raise flight.error
+        return FlightOutcome(copy.deepcopy(flight.result), True, flight.waiters)
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                  timeout: Optional[float] = None) -> FlightOutcome:
+        """
+        Await fn() once per key among concurrent coroutines on the running loop.
+
+        Async flights are tracked apart from threaded ones, so a sync and an
+        async caller with the same key do not share work.
+        """
+        flights_key = (asyncio.get_running_loop(), key)
+        flight, is_leader = self._join(self._async_flights, flights_key, asyncio.Event)
+
+        if is_leader:
+            try:
+                flight.result = await fn()
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                self._land(self._async_flights, flights_key, flight)
+            return FlightOutcome(flight.result, False, flight.waiters)
+
+        try:
+            await asyncio.wait_for(flight.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return FlightOutcome(await fn(), False, 0)
+        if isinstance(flight.error, asyncio.CancelledError):
+            # The leader was cancelled, not this caller: do the work here instead
+            return FlightOutcome(await fn(), False, 0)
+        if flight.error is not None:
+            raise flight.error
+        return FlightOutcome(copy.deepcopy(flight.result), True, flight.waiters)
+
+    def _join(self, flights: dict, key: Hashable, make_event) -> tuple:
+        """Join the in-flight execution for key, or register a new one led by the caller"""
+        with self._lock:
+            flight = flights.get(key)
+            if flight is None:
+                flight = _Flight(make_event())
+                flights[key] = flight
+                self.flights += 1
+                return flight, True
+            flight.waiters += 1
+            self.coalesced_calls += 1
+            return flight, False
+
+    def _land(self, flights: dict, key: Hashable, flight: _Flight):
+        """Retire a finished flight and release its waiters"""
+        with self._lock:
+            del flights[key]
+            self.recent_waiters.append(flight.waiters)
+            self.max_waiters = max(self.max_waiters, flight.waiters)
+        flight.done.set()
+        if flight.waiters:
+            print(f"🤝 {self.name} flight shared with {flight.waiters} waiting callers")
+
+    def stats(self) -> dict:
+        """Return flight and waiter counters"""
+        with self._lock:
+            recent = list(self.recent_waiters)
+            return {
+                'flights': self.flights,
+                'coalesced_calls': self.coalesced_calls,
+                'in_flight': len(self._flights) + len(self._async_flights),
+                'max_waiters': self.max_waiters,
+                'avg_waiters_recent': round(sum(recent) / len(recent), 3) if recent else 0
+            }
@@ -0,0 +1,269 @@
+"""
+Tracing
+
+Lightweight per-request span trees. A request opens a trace; code on its
+path opens nested spans (pipeline nodes, LLM calls, cache lookups, JSON
+parsing, session and log writes) with attributes. The current span lives
+in a context variable, so it follows the request into greenlets, asyncio
+tasks and worker threads started with `contextvars.copy_context().run`.
+
+Every request gets a trace ID; only a TRACE_SAMPLE_RATE share of them
+records spans, and unsampled spans are a shared no-op object. Finished
+traces are appended to a local file, either as JSONL (one span per line)
+or in the Chrome trace-event format, which chrome://tracing and
+https://ui.perfetto.dev open directly.
+"""
+
+import os
+import json
+import time
+import random
+import secrets
+import asyncio
+import threading
+import contextvars
+from typing import Dict, List, Optional
+
+# Tracing configuration
+TRACING_CONFIG = {
+    'sample_rate': float(os.getenv('TRACE_SAMPLE_RATE', '0')),  # Share of requests whose spans are recorded
+    'format': os.getenv('TRACE_FORMAT', 'chrome'),  # 'chrome' (trace-event JSON) or 'jsonl'
+    'path': os.getenv('TRACE_EXPORT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces.json')),
+    'max_file_bytes': int(float(os.getenv('TRACE_MAX_FILE_MB', '50')) * 1024 * 1024),  # Rotated to <path>.1 beyond this
+}
+TRACE_FORMATS = ('chrome', 'jsonl')
+
+_current_span = contextvars.ContextVar('trace_span', default=None)
+# Set for sampled and unsampled requests alike, so responses can always report their trace ID
+_current_trace_id = contextvars.ContextVar('trace_id', default=None)
+
+
+def _lane() -> int:
+    """Thread or asyncio task the span runs on; overlapping work gets separate rows in the viewer"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start', 'duration', 'lane', '_token',
+                 '_id_token')
+
+    def __init__(self, trace: 'Trace', name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+        self.lane = 0
+        self._token = None
+        self._id_token = None
+
+    def set(self, **attributes):
+        """Add attributes to the span"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.time()
+        self.lane = _lane()
+        self._token = _current_span.set(self)
+        if self.parent_id is None:
+            self._id_token = _current_trace_id.set(self.trace.trace_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.time() - self.start
+        if exc is not None:
+            self.attributes['error'] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        if self._id_token is not None:
+            _current_trace_id.reset(self._id_token)
+        self.trace.finish_span(self)
+        return False
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def sampled(self) -> bool:
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Stand-in for spans of unsampled requests (and code running outside any request)"""
+    __slots__ = ('trace_id', '_id_token')
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self._id_token = None
+
+    @property
+    def sampled(self) -> bool:
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        if self.trace_id is not None:
+            self._id_token = _current_trace_id.set(self.trace_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._id_token is not None:
+            _current_trace_id.reset(self._id_token)
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """Spans recorded for one request; exported when the root span ends"""
+
+    def __init__(self, trace_id: str, exporter: 'TraceExporter'):
+        self.trace_id = trace_id
+        self.exporter = exporter
+        self.root: Optional[Span] = None
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def finish_span(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+        if span is self.root:
+            self.exporter.export(self)
+
+
+class TraceExporter:
+    """Appends finished traces to a local JSONL or Chrome trace-event file"""
+
+    def __init__(self, path: str, trace_format: str = 'chrome', max_file_bytes: int = 50 * 1024 * 1024):
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format}")
+        self.path = path
+        self.trace_format = trace_format
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._lanes: Dict[int, int] = {}
+        self.exported_traces = 0
+
+    def _chrome_events(self, trace: Trace) -> List[dict]:
+        """Complete ('X') events, one viewer row per thread or asyncio task"""
+        pid = os.getpid()
+        events = []
+        for span in sorted(trace.spans, key=lambda s: s.start):
+            if span.lane not in self._lanes:
+                self._lanes[span.lane] = len(self._lanes) + 1
+            tid = self._lanes[span.lane]
+            events.append({
+                'name': span.name, 'cat': 'pathfinder', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round(span.start * 1e6), 'dur': max(1, round(span.duration * 1e6)),
+                'args': {'trace_id': trace.trace_id, 'span_id': span.span_id, 'parent_id': span.parent_id,
+                         **span.attributes}
+            })
+        return events
+
+    def export(self, trace: Trace):
+        try:
+            with self._lock:
+                if self.trace_format == 'chrome':
+                    lines = [json.dumps(event, default=str) for event in self._chrome_events(trace)]
+                else:
+                    lines = [json.dumps(span.to_dict(), default=str) for span in sorted(trace.spans, key=lambda s: s.start)]
+                self._rotate()
+                new_file = not os.path.exists(self.path)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    if new_file and self.trace_format == 'chrome':
+                        # The trace-event array may be left unterminated, so traces can be appended
+                        f.write('[\n')
+                    suffix = ',\n' if self.trace_format == 'chrome' else '\n'
+                    f.write(''.join(line + suffix for line in lines))
+                self.exported_traces += 1
+        except OSError as e:
+            print(f"Trace export error: {e}")
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) > self.max_file_bytes:
+                os.replace(self.path, self.path + '.1')
+                self._lanes.clear()
+        except OSError:
+            pass
+
+
+class Tracer:
+    """Starts sampled traces and hands out spans under the current one"""
+
+    def __init__(self, exporter: TraceExporter, sample_rate: float = 0.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.started_traces = 0
+        self.sampled_traces = 0
+
+    def start_trace(self, name: str, sampled: Optional[bool] = None, trace_id: Optional[str] = None, **attributes):
+        """
+        Root span of a request (a no-op span carrying only the trace ID when not sampled).
+
+        Passing the trace_id and sampled flag of an earlier root continues that
+        trace, e.g. for a streamed response body produced after the view returned.
+        """
+        trace_id = trace_id or secrets.token_hex(16)
+        self.started_traces += 1
+        if sampled is None:
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled:
+            return _NoopSpan(trace_id)
+        self.sampled_traces += 1
+        trace = Trace(trace_id, self.exporter)
+        trace.root = Span(trace, name, None, attributes)
+        return trace.root
+
+    def span(self, name: str, **attributes):
+        """Child of the current span, or a no-op when this request is not being traced"""
+        parent = _current_span.get()
+        if parent is None:
+            return _NOOP
+        return Span(parent.trace, name, parent.span_id, attributes)
+
+    def stats(self) -> dict:
+        return {
+            'sample_rate': self.sample_rate,
+            'format': self.exporter.trace_format,
+            'started_traces': self.started_traces,
+            'sampled_traces': self.sampled_traces,
+            'exported_traces': self.exporter.exported_traces
+        }
+
+
+# Shared tracer for this process
+tracer = Tracer(
+    TraceExporter(TRACING_CONFIG['path'], TRACING_CONFIG['format'], TRACING_CONFIG['max_file_bytes']),
+    sample_rate=TRACING_CONFIG['sample_rate']
+)
+
+
+def span(name: str, **attributes):
+    """Open a span under the current request's trace: `with span('llm_call', agent='agent1') as s: ...`"""
+    return tracer.span(name, **attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the request running in this context, sampled or not (None outside a request)"""
+    return _current_trace_id.get()
@@ -1,16 +1,30 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, g
 import os
 from pathlib import Path
-import PyPDF2
-from docx import Document
 from dotenv import load_dotenv
+from werkzeug.utils import secure_filename
+from werkzeug.serving import is_running_from_reloader
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agents'))
-from career_pathfinder_optimized import run_pipeline, run_pipeline_optimized, extract_skills_only
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from career_pathfinder_optimized import run_pipeline, run_pipeline_optimized, rerun_roadmap, calculate_time_estimates, update_roadmap_incrementally, extract_skills_only, PerformanceProfiler, PERFORMANCE_CONFIG, ROADMAP_MODES, PIPELINE_STAGES, pipeline_stages, select_pipeline_topology, stream_pipeline_events, template_store, roadmap_cache, checkpoint_store, pipeline_flights, agent_flights
 from career_logger import CareerPathfinderLogger
+from llm_rate_limiter import rate_limiter
+from llm_circuit_breaker import circuit_breaker
+from llm_client_registry import llm_clients
+from metrics import metrics, METRICS_CONFIG, SIZE_BUCKETS
+from tracing import tracer, span, current_trace_id
 from role_readiness_agent import assess_role_readiness
+from session_store import SessionStore
+from job_queue import JobQueue, JobQueueFull
+from resume_parser import extract_text_from_pdf, extract_text_from_docx
 import time
+import json
+import math
+import threading
+from contextlib import contextmanager
+from functools import wraps
 
 # Configure Flask app with proper template and static folders
 app = Flask(__name__, 
@@ -29,9 +43,240 @@ if not OPENAI_API_KEY or not LANGSMITH_API_KEY:
 # Initialize logger
 logger = CareerPathfinderLogger()
 
-# Ensure uploads directory exists
+# Upload handling configuration
+UPLOAD_CONFIG = {
+    'max_upload_bytes': int(float(os.getenv('MAX_UPLOAD_MB', '5')) * 1024 * 1024),
+    'retain_uploads': os.getenv('RETAIN_UPLOADS', 'false').lower() in ('1', 'true', 'yes'),
+}
+
+# Reject oversized requests before the body is read (small allowance for multipart overhead)
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_CONFIG['max_upload_bytes'] + 64 * 1024
+
+# Uploaded files only hit the disk when retention is enabled
 UPLOADS_DIR = "uploads"
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+if UPLOAD_CONFIG['retain_uploads']:
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+
+# Session artifacts: in-memory LRU backed by sqlite, expired by a background sweeper
+session_store = SessionStore(
+    db_path=os.getenv('SESSION_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions.db')),
+    ttl_seconds=float(os.getenv('SESSION_TTL_HOURS', '24')) * 3600
+)
+
+# Background roadmap jobs: sqlite queue, local worker pool, results kept for a TTL
+JOB_CONFIG = {
+    'db_path': os.getenv('JOB_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db')),
+    'workers': int(os.getenv('JOB_WORKERS', '2')),
+    'ttl_seconds': float(os.getenv('JOB_TTL_HOURS', '24')) * 3600,
+    'max_queued': int(os.getenv('JOB_MAX_QUEUED', '500')),
+    'time_budget': float(os.getenv('JOB_TIME_BUDGET_SECONDS', str(PERFORMANCE_CONFIG['max_generation_time'])))
+}
+
+# A job whose worker stops renewing its lease for this long is requeued
+job_queue = JobQueue(
+    db_path=JOB_CONFIG['db_path'],
+    workers=JOB_CONFIG['workers'],
+    ttl_seconds=JOB_CONFIG['ttl_seconds'],
+    lease_seconds=max(60.0, 4 * JOB_CONFIG['time_budget']),
+    max_queued=JOB_CONFIG['max_queued']
+)
+
+# Admission control for LLM-backed endpoints: concurrent slots, bounded wait queue, max wait
+ADMISSION_CONFIG = {
+    'roadmap': {
+        'max_concurrent': int(os.getenv('ROADMAP_MAX_CONCURRENT', '4')),
+        'max_queue': int(os.getenv('ROADMAP_MAX_QUEUE', '16')),
+        'max_wait_seconds': float(os.getenv('ROADMAP_MAX_WAIT_SECONDS', '10'))
+    },
+    'skills': {
+        'max_concurrent': int(os.getenv('SKILLS_MAX_CONCURRENT', '8')),
+        'max_queue': int(os.getenv('SKILLS_MAX_QUEUE', '32')),
+        'max_wait_seconds': float(os.getenv('SKILLS_MAX_WAIT_SECONDS', '5'))
+    }
+}
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status and Retry-After"""
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+class AdmissionController:
+    """Per-endpoint concurrency limit with a bounded, deadline-limited wait queue"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_wait_timeout = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.avg_service_time = 0.0  # Exponentially weighted
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a slot frees up for a new arrival"""
+        service_time = self.avg_service_time or self.max_wait_seconds
+        backlog = (self.queue_depth + 1) / self.max_concurrent
+        return max(1, math.ceil(service_time * backlog))
+
+    @contextmanager
+    def admit(self):
+        """Hold a concurrency slot for the duration of the block, waiting in the queue if needed"""
+        wait_start = time.time()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queue_depth >= self.max_queue:
+                    self.rejected_queue_full += 1
+                    raise AdmissionRejected(429, self.retry_after(), f'{self.name} queue is full')
+                self.queue_depth += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.max_wait_seconds)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+            if not acquired:
+                with self._lock:
+                    self.rejected_wait_timeout += 1
+                raise AdmissionRejected(503, self.retry_after(), f'{self.name} queue wait exceeded {self.max_wait_seconds}s')
+
+        wait_time = time.time() - wait_start
+        with self._lock:
+            self.admitted += 1
+            self.in_flight += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        service_start = time.time()
+        try:
+            yield wait_time
+        finally:
+            service_time = time.time() - service_start
+            with self._lock:
+                self.in_flight -= 1
+                self.avg_service_time = service_time if not self.avg_service_time else 0.8 * self.avg_service_time + 0.2 * service_time
+            self._slots.release()
+
+    def snapshot(self) -> dict:
+        """Return current queue depth, wait times and rejection counts"""
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queue_depth,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_wait_timeout': self.rejected_wait_timeout,
+                'avg_wait_time': round(self.total_wait_time / self.admitted, 3) if self.admitted else 0,
+                'max_wait_time': round(self.max_wait_time, 3),
+                'avg_service_time': round(self.avg_service_time, 3)
+            }
+
+ADMISSION_CONTROLLERS = {name: AdmissionController(name, **config) for name, config in ADMISSION_CONFIG.items()}
+
+def admission_controlled(controller_name):
+    """Route decorator that admits requests through the named AdmissionController"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = ADMISSION_CONTROLLERS[controller_name]
+            try:
+                with controller.admit() as wait_time:
+                    # Queue wait counts against the request's time budget
+                    g.admission_wait = wait_time
+                    return view(*args, **kwargs)
+            except AdmissionRejected as e:
+                print(f"🚦 Rejected {request.path}: {e.reason}")
+                response = jsonify({'success': False, 'error': 'Server is busy, please retry shortly', 'retry_after': e.retry_after})
+                response.status_code = e.status_code
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+        return wrapper
+    return decorator
+
+# Request metrics served at /metrics
+REQUEST_DURATION = metrics.histogram('pathfinder_http_request_duration_seconds', 'Flask request latency by endpoint',
+                                     ('endpoint', 'method', 'status'))
+REQUESTS_IN_FLIGHT = metrics.gauge('pathfinder_http_requests_in_flight', 'Requests being handled by this worker')
+UPLOAD_SIZE = metrics.histogram('pathfinder_upload_size_bytes', 'Size of uploaded resumes', ('type',), buckets=SIZE_BUCKETS)
+TEXT_EXTRACTION_DURATION = metrics.histogram('pathfinder_text_extraction_duration_seconds',
+                                             'Time to extract text from an uploaded resume', ('type',))
+
+if METRICS_CONFIG['enabled']:
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+    
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+    
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        REQUESTS_IN_FLIGHT.dec()
+        # Route templates (/jobs/<job_id>) keep the label set bounded; unmatched paths share one series
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = str(g.pop('metrics_status', 500))
+        REQUEST_DURATION.labels(endpoint, request.method, status).observe(time.perf_counter() - start)
+
+# Every request gets a trace ID (X-Trace-Id); TRACE_SAMPLE_RATE of them record a span tree
+@app.before_request
+def start_request_trace():
+    endpoint = request.url_rule.rule if request.url_rule is not None else request.path
+    root = tracer.start_trace(f"{request.method} {endpoint}", method=request.method, path=request.path)
+    g.trace_span = root.__enter__()
+
+@app.after_request
+def add_trace_header(response):
+    root = g.get('trace_span')
+    if root is not None:
+        root.set(status=response.status_code)
+        response.headers['X-Trace-Id'] = root.trace_id
+    return response
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    root = g.pop('trace_span', None)
+    if root is not None:
+        root.__exit__(type(error) if error else None, error, None)
+
+def service_metric_samples():
+    """Counters the session store, admission controllers and job queue keep themselves, read at scrape time"""
+    sessions = session_store.stats()
+    yield ('pathfinder_cache_requests_total', 'counter', 'Cache lookups by cache layer and result', [
+        ({'cache': 'session', 'result': 'hit'}, sessions['cache_hits']),
+        ({'cache': 'session', 'result': 'miss'}, sessions['cache_misses'])
+    ])
+    yield ('pathfinder_cache_entries', 'gauge', 'Entries held by each cache layer',
+           [({'cache': 'session'}, sessions['cached_sessions'])])
+    admission = {name: controller.snapshot() for name, controller in ADMISSION_CONTROLLERS.items()}
+    yield ('pathfinder_admission_in_flight', 'gauge', 'Requests holding an admission slot',
+           [({'controller': name}, stats['in_flight']) for name, stats in admission.items()])
+    yield ('pathfinder_admission_queue_depth', 'gauge', 'Requests waiting for an admission slot',
+           [({'controller': name}, stats['queue_depth']) for name, stats in admission.items()])
+    yield ('pathfinder_admission_rejected_total', 'counter', 'Requests turned away by admission control', [
+        ({'controller': name, 'reason': reason}, stats[f'rejected_{reason}'])
+        for name, stats in admission.items() for reason in ('queue_full', 'wait_timeout')
+    ])
+    jobs = job_queue.stats()
+    yield ('pathfinder_jobs', 'gauge', 'Background jobs by status',
+           [({'status': status}, count) for status, count in jobs['jobs'].items()])
+
+metrics.register_collector(service_metric_samples)
 
 # Check for data files (use absolute path)
 import os.path
@@ -424,34 +669,24 @@ def generate_course_url(title, platform):
     # Default fallback with better search
     return f'https://www.google.com/search?q="{title}"+"online+course"'
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF file"""
-    try:
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-            return text
-    except Exception as e:
-        print(f"Error extracting PDF: {e}")
-        return ""
-
-def extract_text_from_docx(file_path):
-    """Extract text from DOCX file"""
-    try:
-        doc = Document(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs])
-        return text
-    except Exception as e:
-        print(f"Error extracting DOCX: {e}")
-        return ""
+def get_stream_size(stream):
+    """Return the byte size of a seekable stream, leaving it rewound"""
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
 
 @app.route('/')
 def index():
     """Serve the main page"""
     return render_template('index.html')
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    """Return a JSON error when an upload exceeds MAX_CONTENT_LENGTH"""
+    max_mb = UPLOAD_CONFIG['max_upload_bytes'] / (1024 * 1024)
+    return jsonify({'success': False, 'error': f'File too large (max {max_mb:g} MB)'}), 413
+
 @app.route('/upload-resume', methods=['POST'])
 def upload_resume():
     if 'resume' not in request.files:
@@ -464,45 +699,70 @@ def upload_resume():
     if not file.filename.lower().endswith(('.pdf', '.docx')):
         return jsonify({'success': False, 'error': 'Unsupported file type'}), 400
 
-    # Save file
-    file_path = os.path.join(UPLOADS_DIR, file.filename)
-    file.save(file_path)
+    # Parse straight from the request stream; werkzeug keeps small uploads in memory
+    # and spools larger ones to a temp file that is released when the file is closed
+    try:
+        upload_size = get_stream_size(file.stream)
+        if upload_size > UPLOAD_CONFIG['max_upload_bytes']:
+            max_mb = UPLOAD_CONFIG['max_upload_bytes'] / (1024 * 1024)
+            return jsonify({'success': False, 'error': f'File too large (max {max_mb:g} MB)'}), 413
 
-    # Extract text based on file type
-    if file.filename.lower().endswith('.pdf'):
-        resume_text = extract_text_from_pdf(file_path)
-    else:
-        resume_text = extract_text_from_docx(file_path)
+        file_type = 'pdf' if file.filename.lower().endswith('.pdf') else 'docx'
+        UPLOAD_SIZE.labels(file_type).observe(upload_size)
+        
+        # Extract text based on file type
+        upload_profiler = PerformanceProfiler()
+        upload_profiler.start_timer('text_extraction')
+        with span('text_extraction', file_type=file_type, size_bytes=upload_size) as extraction_span:
+            if file_type == 'pdf':
+                resume_text = extract_text_from_pdf(file.stream, profiler=upload_profiler)
+            else:
+                resume_text = extract_text_from_docx(file.stream)
+            extraction_span.set(chars=len(resume_text))
+        upload_profiler.end_timer('text_extraction')
+        TEXT_EXTRACTION_DURATION.labels(file_type).observe(upload_profiler.timings['text_extraction']['duration'])
 
-    if not resume_text.strip():
-        return jsonify({'success': False, 'error': 'Could not extract text from resume'}), 500
+        if not resume_text.strip():
+            return jsonify({'success': False, 'error': 'Could not extract text from resume'}), 500
 
-    # Store resume text in session file
-    session_id = f"session_{int(time.time())}"
-    session_file = os.path.join(UPLOADS_DIR, f"{session_id}.txt")
-    with open(session_file, 'w', encoding='utf-8') as f:
-        f.write(resume_text)
+        # Store resume text in a new session
+        with span('session_save'):
+            session_id = session_store.create(resume_text)
 
-    return jsonify({'success': True, 'session_id': session_id})
+        if UPLOAD_CONFIG['retain_uploads']:
+            file.stream.seek(0)
+            file.save(os.path.join(UPLOADS_DIR, f"{session_id}_{secure_filename(file.filename)}"))
+    finally:
+        file.close()
+
+    performance = upload_profiler.get_performance_report()
+    return jsonify({
+        'success': True,
+        'session_id': session_id,
+        'performance': {
+            'extraction_time': performance['step_timings'].get('text_extraction', 0),
+            'step_timings': performance['step_timings']
+        }
+    })
 
 @app.route('/extract-skills', methods=['POST'])
+@admission_controlled('skills')
 def extract_skills():
     session_id = request.json.get('session_id') if request.is_json else None
     if not session_id:
         return jsonify({'success': False, 'error': 'No session ID provided'}), 400
 
-    session_file = os.path.join(UPLOADS_DIR, f"{session_id}.txt")
-    if not os.path.exists(session_file):
-        return jsonify({'success': False, 'error': 'Session file not found'}), 404
-
-    with open(session_file, 'r', encoding='utf-8') as f:
-        resume_text = f.read()
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    resume_text = session.resume_text
 
     try:
         start_time = time.time()
         # Use fast skill extraction instead of full pipeline
         result = extract_skills_only(resume_text)
         execution_time = time.time() - start_time
+        session_store.update(session_id, extracted_skills=result.get('extracted_skills', []))
         logger.log_execution(resume_text, "Skill Extraction", result, execution_time)
         return jsonify({'success': True, 'skills': result.get('extracted_skills', [])})
     except Exception as e:
@@ -525,11 +785,8 @@ def create_manual_session():
     # Create a dummy resume text with the manual skills
     resume_text = f"Manual skills entry:\nSkills: {', '.join(skills_list)}\nExperience: User provided skills manually."
     
-    # Create session file
-    session_id = f"manual_session_{int(time.time())}"
-    session_file = os.path.join(UPLOADS_DIR, f"{session_id}.txt")
-    with open(session_file, 'w', encoding='utf-8') as f:
-        f.write(resume_text)
+    # Create session
+    session_id = session_store.create(resume_text, prefix="manual_session", extracted_skills=skills_list)
     
     return jsonify({
         'success': True, 
@@ -1077,8 +1334,11 @@ def select_target_role():
     if not session_id:
         return jsonify({'success': False, 'error': 'No session ID provided'}), 400
     
-    # Store the selected role in the session or return success
+    # Store the selected role in the session
     # This endpoint can be used to trigger a new roadmap generation
+    if session_store.update(session_id, selected_role=selected_role) is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+
     return jsonify({
         'success': True,
         'selected_role': selected_role,
@@ -1194,30 +1454,203 @@ def evaluate_industry_readiness():
         print(f"Industry readiness assessment error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/generate-roadmap', methods=['POST'])
-def generate_roadmap():
-    data = request.get_json()
-    skills = data.get('skills', [])
+def validate_roadmap_request(data):
+    """Check a /generate-roadmap body; returns (session, None) or (None, (error message, HTTP status))"""
     role = data.get('role', '')
     session_id = data.get('session_id', '')
+    roadmap_mode = data.get('roadmap_mode')  # 'local' serves a zero-LLM roadmap
 
     if not role:
-        return jsonify({'success': False, 'error': 'No role selected'}), 400
+        return None, ('No role selected', 400)
     if not session_id:
-        return jsonify({'success': False, 'error': 'No session ID provided'}), 400
+        return None, ('No session ID provided', 400)
+    if roadmap_mode is not None and roadmap_mode not in ROADMAP_MODES:
+        return None, (f"roadmap_mode must be one of {', '.join(ROADMAP_MODES)}", 400)
 
-    session_file = os.path.join(UPLOADS_DIR, f"{session_id}.txt")
-    if not os.path.exists(session_file):
-        return jsonify({'success': False, 'error': 'Session file not found'}), 404
+    with span('session_load', session_id=session_id):
+        session = session_store.get(session_id)
+    if session is None:
+        return None, ('Session not found', 404)
+    return session, None
 
-    with open(session_file, 'r', encoding='utf-8') as f:
-        resume_text = f.read()
+def store_roadmap_artifacts(session_id, role, result):
+    """Keep pipeline artifacts with the session for later lookups"""
+    with span('session_save', session_id=session_id):
+        session_store.update(
+            session_id,
+            selected_role=role,
+            extracted_skills=result.get('extracted_skills', []),
+            gap_analysis={
+                'missing_skills': result.get('missing_skills', []),
+                'nice_to_have': result.get('nice_to_have', [])
+            },
+            roadmap={
+                'phases': result.get('roadmap', []),
+                'time_estimates': result.get('time_estimates', {})
+            }
+        )
+
+def format_roadmap_phases(roadmap_data):
+    """Format pipeline roadmap phases for the frontend with better error handling"""
+    roadmap = []
+    
+    # Debug: Print the roadmap structure
+    print(f"Debug: roadmap type: {type(roadmap_data)}")
+    print(f"Debug: roadmap length: {len(roadmap_data) if isinstance(roadmap_data, list) else 'N/A'}")
+    
+    if isinstance(roadmap_data, list):
+        for i, phase in enumerate(roadmap_data):
+            print(f"Debug: phase {i} type: {type(phase)}")
+            
+            # Handle case where phase might be a string instead of dict
+            if isinstance(phase, str):
+                phase_data = {
+                    'phase': f'Phase {i+1}',
+                    'skills': [{'skill': phase, 'course': {'title': 'N/A', 'platform': 'N/A', 'duration': 'N/A', 'url': '', 'reason': 'N/A'}, 'est_hours': 10}],
+                    'phase_total_hours': 10,
+                    'phase_time_frame': 'Estimated time: 10 hours (~1.25 weeks at 8 hrs/week)'
+                }
+            elif isinstance(phase, dict):
+                phase_data = {
+                    'phase': phase.get('phase', f'Phase {i+1}'),
+                    'skills': [],
+                    'phase_total_hours': phase.get('phase_total_hours', 0),
+                    'phase_time_frame': phase.get('phase_time_frame', 'Time estimates not available')
+                }
+                
+                skills_data = phase.get('skills', phase.get('items', []))
+                for j, item in enumerate(skills_data):
+                    print(f"Debug: skill item {j} type: {type(item)}")
+                    
+                    if isinstance(item, str):
+                        # Handle case where item is just a skill string
+                        phase_data['skills'].append({
+                            'skill': item,
+                            'course': {
+                                'title': 'N/A',
+                                'platform': 'N/A', 
+                                'duration': 'N/A',
+                                'url': '',
+                                'reason': 'N/A'
+                            },
+                            'est_hours': 10
+                        })
+                    elif isinstance(item, dict):
+                        # Handle normal case where item is a dict
+                        course = item.get('course', {})
+                        
+                        # Handle case where course might be a string
+                        if isinstance(course, str):
+                            parsed_course = parse_course_info(course)
+                            course_info = {
+                                'title': parsed_course['title'],
+                                'platform': parsed_course['platform'],
+                                'duration': parsed_course['duration'],
+                                'url': parsed_course['url'],
+                                'reason': item.get('reason', 'N/A')
+                            }
+                        elif isinstance(course, dict):
+                            # If it's already a dict, parse the title for better platform/duration info
+                            title = course.get('title', 'N/A')
+                            parsed_course = parse_course_info(title)
+                            course_info = {
+                                'title': parsed_course['title'],
+                                'platform': course.get('platform', parsed_course['platform']),
+                                'duration': course.get('duration', parsed_course['duration']),
+                                'url': course.get('url', ''),
+                                'reason': course.get('why', item.get('reason', 'N/A'))
+                            }
+                        else:
+                            parsed_course = parse_course_info(str(course) if course else 'N/A')
+                            course_info = {
+                                'title': parsed_course['title'],
+                                'platform': parsed_course['platform'],
+                                'duration': parsed_course['duration'],
+                                'url': '',
+                                'reason': item.get('reason', 'N/A')
+                            }
+                        
+                        phase_data['skills'].append({
+                            'skill': item.get('skill', f'Skill {j+1}'),
+                            'course': course_info,
+                            'est_hours': item.get('est_hours', 10)  # Include estimated hours
+                        })
+            else:
+                # Fallback for unexpected phase type
+                phase_data = {
+                    'phase': f'Phase {i+1}',
+                    'skills': [{'skill': str(phase), 'course': {'title': 'N/A', 'platform': 'N/A', 'duration': 'N/A', 'url': '', 'reason': 'N/A'}, 'est_hours': 10}],
+                    'phase_total_hours': 10,
+                    'phase_time_frame': 'Estimated time: 10 hours (~1.25 weeks at 8 hrs/week)'
+                }
+            
+            roadmap.append(phase_data)
+    else:
+        print(f"Debug: Unexpected roadmap type, using fallback")
+        roadmap = [{
+            'phase': 'Phase 1',
+            'skills': [{'skill': 'Please try again', 'course': {'title': 'N/A', 'platform': 'N/A', 'duration': 'N/A', 'url': '', 'reason': 'Error processing roadmap'}, 'est_hours': 10}],
+            'phase_total_hours': 10,
+            'phase_time_frame': 'Estimated time: 10 hours (~1.25 weeks at 8 hrs/week)'
+        }]
+    
+    return roadmap
+
+def build_roadmap_response(result, execution_time):
+    """JSON body for a successful /generate-roadmap request"""
+    with span('format_roadmap', phases=len(result.get('roadmap', []))):
+        roadmap = format_roadmap_phases(result.get('roadmap', []))
+    
+    # Include performance data in response
+    performance_summary = result.get('performance_summary', {})
+    time_estimates = result.get('time_estimates', {})
+    
+    response = {
+        'success': True,
+        'roadmap': roadmap,
+        'resources': 'Personalized course recommendations based on your skill gaps and target role.',
+        'time_estimates': {
+            'overall_total_hours': time_estimates.get('overall_total_hours', 0),
+            'overall_buffered_hours': time_estimates.get('overall_buffered_hours', 0),
+            'overall_time_frame': time_estimates.get('overall_time_frame', 'Time estimates not available'),
+            'weekly_hours': time_estimates.get('weekly_hours', 8)
+        },
+        'performance': {
+            'generation_time': round(performance_summary.get('total_time', execution_time), 2),
+            'cache_hit_ratio': performance_summary.get('cache_stats', {}).get('hit_ratio', 0),
+            'throttle_wait_time': performance_summary.get('llm_throttle', {}).get('wait_time', 0),
+            'degraded_stages': performance_summary.get('degraded_stages', []),
+            'roadmap_source': performance_summary.get('roadmap_source', 'llm'),
+            'coalescing': performance_summary.get('coalescing', {}),
+            'resume_preprocessing': performance_summary.get('resume_preprocessing', {}),
+            'llm_usage': performance_summary.get('llm_usage', {}),
+            'trace_id': current_trace_id(),
+            'circuit_breaker': performance_summary.get('circuit_breaker', circuit_breaker.stats()),
+            'step_timings': performance_summary.get('step_timings', {})
+        }
+    }
+    if 'readiness' in result:
+        response['role_readiness'] = result['readiness']
+    return response
+
+@app.route('/generate-roadmap', methods=['POST'])
+@admission_controlled('roadmap')
+def generate_roadmap():
+    data = request.get_json()
+    session, error = validate_roadmap_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error[0]}), error[1]
+    role = data['role']
+    resume_text = session.resume_text
 
     try:
         start_time = time.time()
         
-        # Use pipeline without force refresh functionality
-        result = run_pipeline_optimized(resume_text, role, log_execution=True)
+        # Time spent queued for admission comes out of the end-to-end budget
+        time_budget = PERFORMANCE_CONFIG['max_generation_time'] - g.get('admission_wait', 0)
+        # Checkpointed per session, so a retry resumes after the agents that already succeeded
+        result = run_pipeline_optimized(resume_text, role, log_execution=True, time_budget=time_budget,
+                                        roadmap_mode=data.get('roadmap_mode'), session_id=data['session_id'])
         execution_time = time.time() - start_time
         
         # Debug: Check what we got from run_pipeline
@@ -1232,137 +1665,345 @@ def generate_roadmap():
         if not isinstance(result, dict):
             return jsonify({'success': False, 'error': f'Unexpected result type: {type(result)}'}), 500
 
-        # Format roadmap for frontend with better error handling
-        roadmap = []
-        roadmap_data = result.get('roadmap', [])
-        
-        # Debug: Print the roadmap structure
-        print(f"Debug: roadmap type: {type(roadmap_data)}")
-        print(f"Debug: roadmap length: {len(roadmap_data) if isinstance(roadmap_data, list) else 'N/A'}")
-        
-        if isinstance(roadmap_data, list):
-            for i, phase in enumerate(roadmap_data):
-                print(f"Debug: phase {i} type: {type(phase)}")
-                
-                # Handle case where phase might be a string instead of dict
-                if isinstance(phase, str):
-                    phase_data = {
-                        'phase': f'Phase {i+1}',
-                        'skills': [{'skill': phase, 'course': {'title': 'N/A', 'platform': 'N/A', 'duration': 'N/A', 'url': '', 'reason': 'N/A'}, 'est_hours': 10}],
-                        'phase_total_hours': 10,
-                        'phase_time_frame': 'Estimated time: 10 hours (~1.25 weeks at 8 hrs/week)'
-                    }
-                elif isinstance(phase, dict):
-                    phase_data = {
-                        'phase': phase.get('phase', f'Phase {i+1}'),
-                        'skills': [],
-                        'phase_total_hours': phase.get('phase_total_hours', 0),
-                        'phase_time_frame': phase.get('phase_time_frame', 'Time estimates not available')
-                    }
-                    
-                    skills_data = phase.get('skills', phase.get('items', []))
-                    for j, item in enumerate(skills_data):
-                        print(f"Debug: skill item {j} type: {type(item)}")
-                        
-                        if isinstance(item, str):
-                            # Handle case where item is just a skill string
-                            phase_data['skills'].append({
-                                'skill': item,
-                                'course': {
-                                    'title': 'N/A',
-                                    'platform': 'N/A', 
-                                    'duration': 'N/A',
-                                    'url': '',
-                                    'reason': 'N/A'
-                                },
-                                'est_hours': 10
-                            })
-                        elif isinstance(item, dict):
-                            # Handle normal case where item is a dict
-                            course = item.get('course', {})
-                            
-                            # Handle case where course might be a string
-                            if isinstance(course, str):
-                                parsed_course = parse_course_info(course)
-                                course_info = {
-                                    'title': parsed_course['title'],
-                                    'platform': parsed_course['platform'],
-                                    'duration': parsed_course['duration'],
-                                    'url': parsed_course['url'],
-                                    'reason': item.get('reason', 'N/A')
-                                }
-                            elif isinstance(course, dict):
-                                # If it's already a dict, parse the title for better platform/duration info
-                                title = course.get('title', 'N/A')
-                                parsed_course = parse_course_info(title)
-                                course_info = {
-                                    'title': parsed_course['title'],
-                                    'platform': course.get('platform', parsed_course['platform']),
-                                    'duration': course.get('duration', parsed_course['duration']),
-                                    'url': course.get('url', ''),
-                                    'reason': course.get('why', item.get('reason', 'N/A'))
-                                }
-                            else:
-                                parsed_course = parse_course_info(str(course) if course else 'N/A')
-                                course_info = {
-                                    'title': parsed_course['title'],
-                                    'platform': parsed_course['platform'],
-                                    'duration': parsed_course['duration'],
-                                    'url': '',
-                                    'reason': item.get('reason', 'N/A')
-                                }
-                            
-                            phase_data['skills'].append({
-                                'skill': item.get('skill', f'Skill {j+1}'),
-                                'course': course_info,
-                                'est_hours': item.get('est_hours', 10)  # Include estimated hours
-                            })
-                else:
-                    # Fallback for unexpected phase type
-                    phase_data = {
-                        'phase': f'Phase {i+1}',
-                        'skills': [{'skill': str(phase), 'course': {'title': 'N/A', 'platform': 'N/A', 'duration': 'N/A', 'url': '', 'reason': 'N/A'}, 'est_hours': 10}],
-                        'phase_total_hours': 10,
-                        'phase_time_frame': 'Estimated time: 10 hours (~1.25 weeks at 8 hrs/week)'
-                    }
-                
-                roadmap.append(phase_data)
-        else:
-            print(f"Debug: Unexpected roadmap type, using fallback")
-            roadmap = [{
-                'phase': 'Phase 1',
-                'skills': [{'skill': 'Please try again', 'course': {'title': 'N/A', 'platform': 'N/A', 'duration': 'N/A', 'url': '', 'reason': 'Error processing roadmap'}, 'est_hours': 10}],
-                'phase_total_hours': 10,
-                'phase_time_frame': 'Estimated time: 10 hours (~1.25 weeks at 8 hrs/week)'
-            }]
-
-        # Include performance data in response
-        performance_summary = result.get('performance_summary', {})
-        time_estimates = result.get('time_estimates', {})
-        
-        response = {
-            'success': True,
-            'roadmap': roadmap,
-            'resources': 'Personalized course recommendations based on your skill gaps and target role.',
-            'time_estimates': {
-                'overall_total_hours': time_estimates.get('overall_total_hours', 0),
-                'overall_buffered_hours': time_estimates.get('overall_buffered_hours', 0),
-                'overall_time_frame': time_estimates.get('overall_time_frame', 'Time estimates not available'),
-                'weekly_hours': time_estimates.get('weekly_hours', 8)
-            },
-            'performance': {
-                'generation_time': round(performance_summary.get('total_time', execution_time), 2),
-                'cache_hit_ratio': performance_summary.get('cache_stats', {}).get('hit_ratio', 0),
-                'step_timings': performance_summary.get('step_timings', {})
+        store_roadmap_artifacts(data['session_id'], role, result)
+        return jsonify(build_roadmap_response(result, execution_time))
+    except Exception as e:
+        print(f"Roadmap generation error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Accepted study capacity for what-if time estimates
+WEEKLY_HOURS_RANGE = (1, 80)
+WEEKLY_HOURS_ERROR = f'weekly_hours must be an integer between {WEEKLY_HOURS_RANGE[0]} and {WEEKLY_HOURS_RANGE[1]}'
+MAX_ESTIMATE_VALUES = 50
+
+def valid_weekly_hours(value):
+    return isinstance(value, int) and not isinstance(value, bool) and WEEKLY_HOURS_RANGE[0] <= value <= WEEKLY_HOURS_RANGE[1]
+
+def summarize_estimates(phases, weekly_hours):
+    """Time estimates of stored roadmap phases at a given weekly study capacity"""
+    estimates = calculate_time_estimates(phases, weekly_hours)
+    return {
+        'weekly_hours': estimates['weekly_hours'],
+        'overall_total_hours': estimates['overall_total_hours'],
+        'overall_buffered_hours': estimates['overall_buffered_hours'],
+        'overall_time_frame': estimates['overall_time_frame'],
+        'phases': [
+            {
+                'phase': phase.get('phase', ''),
+                'phase_total_hours': phase['phase_total_hours'],
+                'phase_time_frame': phase['phase_time_frame']
             }
+            for phase in estimates['phases']
+        ]
+    }
+
+@app.route('/roadmap/<session_id>/estimates', methods=['GET'])
+def roadmap_estimates(session_id):
+    """
+    Recompute time estimates for the session's stored roadmap without calling the LLM.
+
+    ?weekly_hours=15 returns one set of estimates; several values
+    (?weekly_hours=5,10,15 or repeated parameters) return one per value.
+    """
+    start_time = time.time()
+    raw_values = [value for param in request.args.getlist('weekly_hours') for value in param.split(',') if value.strip()]
+    if not raw_values:
+        return jsonify({'success': False, 'error': 'weekly_hours is required'}), 400
+    if len(raw_values) > MAX_ESTIMATE_VALUES:
+        return jsonify({'success': False, 'error': f'At most {MAX_ESTIMATE_VALUES} weekly_hours values per request'}), 400
+    try:
+        values = [int(value) for value in raw_values]
+    except ValueError:
+        return jsonify({'success': False, 'error': WEEKLY_HOURS_ERROR}), 400
+    if not all(valid_weekly_hours(value) for value in values):
+        return jsonify({'success': False, 'error': WEEKLY_HOURS_ERROR}), 400
+    
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    phases = session.roadmap.get('phases', [])
+    if not phases:
+        return jsonify({'success': False, 'error': 'No roadmap stored for this session'}), 404
+    
+    estimates = [summarize_estimates(phases, value) for value in dict.fromkeys(values)]
+    response = {'success': True, 'compute_time_ms': round((time.time() - start_time) * 1000, 3)}
+    if len(raw_values) == 1:
+        response['time_estimates'] = estimates[0]
+    else:
+        response['estimates'] = estimates
+    return jsonify(response)
+
+def valid_skill_list(value):
+    return isinstance(value, list) and all(isinstance(skill, str) and skill.strip() for skill in value)
+
+@app.route('/roadmap/<session_id>/update', methods=['POST'])
+def update_roadmap(session_id):
+    """
+    Apply a skill delta to the session's stored roadmap: steps for learned_skills
+    are removed and added_skills get new steps, without re-running the pipeline.
+    """
+    data = request.get_json(silent=True) or {}
+    learned_skills = data.get('learned_skills', [])
+    added_skills = data.get('added_skills', [])
+    if not valid_skill_list(learned_skills) or not valid_skill_list(added_skills):
+        return jsonify({'success': False, 'error': 'learned_skills and added_skills must be lists of skill names'}), 400
+    if not learned_skills and not added_skills:
+        return jsonify({'success': False, 'error': 'No skill changes provided'}), 400
+    weekly_hours = data.get('weekly_hours')
+    if weekly_hours is not None and not valid_weekly_hours(weekly_hours):
+        return jsonify({'success': False, 'error': WEEKLY_HOURS_ERROR}), 400
+    
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    phases = session.roadmap.get('phases', [])
+    if not phases:
+        return jsonify({'success': False, 'error': 'No roadmap stored for this session'}), 404
+    
+    start_time = time.time()
+    if weekly_hours is None:
+        weekly_hours = session.roadmap.get('time_estimates', {}).get('weekly_hours')
+    try:
+        update = update_roadmap_incrementally(phases, learned_skills, added_skills, session.selected_role,
+                                              weekly_hours=weekly_hours, use_llm=bool(data.get('use_llm')))
+    except Exception as e:
+        print(f"Roadmap update error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    # Keep the skill profile in line with the delta
+    learned = {skill.lower() for skill in learned_skills}
+    added = {skill.lower() for skill in update['added']}
+    gap_analysis = session.gap_analysis or {}
+    missing_skills = [skill for skill in gap_analysis.get('missing_skills', []) if skill.lower() not in learned]
+    missing_skills += [skill for skill in update['added'] if skill.lower() not in {s.lower() for s in missing_skills}]
+    session_store.update(
+        session_id,
+        extracted_skills=list(dict.fromkeys(session.extracted_skills + learned_skills)),
+        gap_analysis={
+            'missing_skills': missing_skills,
+            'nice_to_have': [skill for skill in gap_analysis.get('nice_to_have', [])
+                             if skill.lower() not in learned and skill.lower() not in added]
+        },
+        roadmap={'phases': update['roadmap'], 'time_estimates': update['time_estimates']}
+    )
+    
+    return jsonify({
+        'success': True,
+        'roadmap': format_roadmap_phases(update['roadmap']),
+        'time_estimates': update['time_estimates'],
+        'changes': {'removed': update['removed'], 'added': update['added']},
+        'performance': {
+            'update_time_ms': round((time.time() - start_time) * 1000, 3),
+            'roadmap_source': update['source']
         }
-        return jsonify(response)
+    })
+
+@app.route('/regenerate-roadmap', methods=['POST'])
+@admission_controlled('roadmap')
+def regenerate_roadmap():
+    """Re-run only roadmap generation on the session's stored gap analysis with new weekly_hours or priority_skills"""
+    data = request.get_json(silent=True) or {}
+    session_id = data.get('session_id', '')
+    if not session_id:
+        return jsonify({'success': False, 'error': 'No session ID provided'}), 400
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    role = data.get('role') or session.selected_role
+    if not role:
+        return jsonify({'success': False, 'error': 'No role selected'}), 400
+    
+    weekly_hours = data.get('weekly_hours')
+    if weekly_hours is not None and not valid_weekly_hours(weekly_hours):
+        return jsonify({'success': False, 'error': WEEKLY_HOURS_ERROR}), 400
+    priority_skills = data.get('priority_skills')
+    if priority_skills is not None and (not isinstance(priority_skills, list) or not priority_skills
+                                        or not all(isinstance(skill, str) for skill in priority_skills)):
+        return jsonify({'success': False, 'error': 'priority_skills must be a non-empty list of skill names'}), 400
+    roadmap_mode = data.get('roadmap_mode')
+    if roadmap_mode is not None and roadmap_mode not in ROADMAP_MODES:
+        return jsonify({'success': False, 'error': f"roadmap_mode must be one of {', '.join(ROADMAP_MODES)}"}), 400
+    
+    try:
+        start_time = time.time()
+        time_budget = PERFORMANCE_CONFIG['max_generation_time'] - g.get('admission_wait', 0)
+        result = rerun_roadmap(session_id, role, weekly_hours=weekly_hours, priority_skills=priority_skills,
+                               roadmap_mode=roadmap_mode, time_budget=time_budget, log_execution=True)
+        execution_time = time.time() - start_time
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        print(f"Roadmap generation error: {e}")
+        print(f"Roadmap regeneration error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
+    
+    # The stored gap analysis stays as it was; only the roadmap is replaced
+    session_store.update(session_id, selected_role=role, roadmap={
+        'phases': result.get('roadmap', []),
+        'time_estimates': result.get('time_estimates', {})
+    })
+    return jsonify(build_roadmap_response(result, execution_time))
+
+def sse_message(event):
+    """Format a pipeline event as a server-sent event (heartbeats become comments)"""
+    if event['event'] == 'heartbeat':
+        return ': keep-alive\n\n'
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+@app.route('/generate-roadmap/events', methods=['GET', 'POST'])
+def generate_roadmap_events():
+    """
+    /generate-roadmap as server-sent events: one 'node' event per finished agent
+    (with its partial results), then a 'result' event carrying the usual
+    response body, or an 'error' event. Accepts a JSON body or query parameters
+    so it also works with EventSource.
+    """
+    data = request.get_json(silent=True) or request.args.to_dict()
+    session, error = validate_roadmap_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error[0]}), error[1]
+    role = data['role']
+    session_id = data['session_id']
+    roadmap_mode = data.get('roadmap_mode')
+    controller = ADMISSION_CONTROLLERS['roadmap']
+    # The body is produced after the request trace ends, so the stream continues it under its own root
+    request_trace = g.trace_span
+    
+    def generate():
+        try:
+            # The slot is held while the stream runs, not just while the view returns
+            with tracer.start_trace('stream /generate-roadmap/events', sampled=request_trace.sampled,
+                                    trace_id=request_trace.trace_id), controller.admit() as wait_time:
+                start_time = time.time()
+                time_budget = PERFORMANCE_CONFIG['max_generation_time'] - wait_time
+                for event in stream_pipeline_events(session.resume_text, role, log_execution=True,
+                                                    time_budget=time_budget, roadmap_mode=roadmap_mode,
+                                                    session_id=session_id):
+                    if event['event'] == 'result':
+                        result = event['result']
+                        store_roadmap_artifacts(session_id, role, result)
+                        event = {'event': 'result', 'result': build_roadmap_response(result, time.time() - start_time)}
+                    yield sse_message(event)
+        except AdmissionRejected as e:
+            print(f"🚦 Rejected /generate-roadmap/events: {e.reason}")
+            yield sse_message({'event': 'error', 'error': 'Server is busy, please retry shortly', 'retry_after': e.retry_after})
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def run_roadmap_job(payload, report_progress):
+    """Job handler: run the pipeline for a queued roadmap request, reporting each finished stage"""
+    # Workers have no request, so each job is traced on its own
+    with tracer.start_trace('job roadmap', session_id=payload['session_id'], role=payload['role']):
+        session = session_store.get(payload['session_id'])
+        if session is None:
+            raise ValueError('Session not found')
+        role = payload['role']
+        
+        nodes = pipeline_stages(select_pipeline_topology(role))
+        stages = {PIPELINE_STAGES[node]: 'pending' for node in nodes}
+        stages[PIPELINE_STAGES[nodes[0]]] = 'running'
+        report_progress({'stages': stages, 'completed': 0, 'total': len(nodes)})
+        
+        def on_progress(event):
+            stages[event['stage']] = 'done'
+            completed = sum(1 for status in stages.values() if status == 'done')
+            if completed < len(nodes):
+                stages[PIPELINE_STAGES[nodes[completed]]] = 'running'
+            report_progress({'stages': dict(stages), 'completed': completed, 'total': len(nodes)})
+        
+        start_time = time.time()
+        result = run_pipeline_optimized(session.resume_text, role, log_execution=True, time_budget=JOB_CONFIG['time_budget'],
+                                        roadmap_mode=payload.get('roadmap_mode'), on_progress=on_progress,
+                                        session_id=payload['session_id'])
+        execution_time = time.time() - start_time
+        
+        store_roadmap_artifacts(payload['session_id'], role, result)
+        report_progress({'stages': {stage: 'done' for stage in stages}, 'completed': len(nodes), 'total': len(nodes)})
+        return build_roadmap_response(result, execution_time)
+
+job_queue.register('roadmap', run_roadmap_job)
+
+@app.route('/jobs/roadmap', methods=['POST'])
+def submit_roadmap_job():
+    """Queue a roadmap generation and return its job ID right away"""
+    data = request.get_json(silent=True) or {}
+    session, error = validate_roadmap_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error[0]}), error[1]
+    
+    try:
+        job_id = job_queue.submit('roadmap', {
+            'session_id': data['session_id'],
+            'role': data['role'],
+            'roadmap_mode': data.get('roadmap_mode')
+        })
+    except JobQueueFull as e:
+        print(f"🚦 Rejected roadmap job: {e}")
+        response = jsonify({'success': False, 'error': 'Server is busy, please retry shortly', 'retry_after': 30})
+        response.status_code = 429
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, per-stage progress and (once finished) the result of a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    response = {'success': True, **job.to_dict()}
+    if job.status == 'queued':
+        response['queue_position'] = job_queue.queue_position(job_id)
+    return jsonify(response)
+
+@app.route('/runtime-stats', methods=['GET'])
+def runtime_stats():
+    """Expose admission queue, LLM, roadmap cache/template, request coalescing, job queue, checkpoint, session store and tracing statistics"""
+    return jsonify({
+        'admission': {name: controller.snapshot() for name, controller in ADMISSION_CONTROLLERS.items()},
+        'llm_rate_limiter': rate_limiter.stats(),
+        'llm_circuit_breaker': circuit_breaker.stats(),
+        'llm_clients': llm_clients.stats(),
+        'roadmap_cache': roadmap_cache.stats(),
+        'roadmap_templates': template_store.stats(),
+        'coalescing': {'pipeline': pipeline_flights.stats(), 'agents': agent_flights.stats()},
+        'jobs': job_queue.stats(),
+        'checkpoints': checkpoint_store.stats() if checkpoint_store is not None else {'enabled': False},
+        'sessions': session_store.stats(),
+        'tracing': tracer.stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Expose this worker's metrics in the Prometheus text format"""
+    if not METRICS_CONFIG['enabled']:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def start_background_services():
+    """Start the session sweeper and the roadmap job workers in the serving process"""
+    # Not at import time: spawned workers and tools that import this module must not claim jobs
+    session_store.start_sweeper()
+    job_queue.start()
+
+def create_app():
+    """App factory for WSGI servers: gunicorn 'backend.app:create_app()'"""
+    start_background_services()
+    return app
 
 if __name__ == '__main__':
+    debug = True
+    # With the reloader on, this process only watches files; the server runs in a child that re-runs this script
+    if not debug or is_running_from_reloader():
+        start_background_services()
     # Bind to 0.0.0.0 for containerized development and port forwarding
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=debug)
 
 
@@ -0,0 +1,146 @@
+"""
+ASGI entry point serving the LLM-backed endpoints on the async pipeline.
+
+/generate-roadmap and /extract-skills await the LLM calls on one event loop
+instead of holding a worker per request; every other path is handed to the
+Flask app through asgiref. Run with:
+
+    uvicorn backend.asgi:application --workers 2
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app import (app as flask_app, session_store, logger, validate_roadmap_request, store_roadmap_artifacts,
+                 build_roadmap_response, start_background_services, ADMISSION_CONFIG, PERFORMANCE_CONFIG)
+from career_pathfinder_optimized import run_pipeline_async, extract_skills_only_async
+from tracing import tracer
+from asgiref.wsgi import WsgiToAsgi
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+# Concurrent pipeline runs per worker; waiting longer than max_wait_seconds returns 503
+ASGI_CONFIG = {
+    'max_concurrent': int(os.getenv('ASGI_MAX_CONCURRENT', '64')),
+    'max_wait_seconds': ADMISSION_CONFIG['roadmap']['max_wait_seconds']
+}
+
+_slots = None
+
+def get_slots() -> asyncio.Semaphore:
+    """Semaphore bounding concurrent pipeline runs (created on the serving loop)"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(1, ASGI_CONFIG['max_concurrent']))
+    return _slots
+
+async def read_json(receive):
+    """Request body parsed as JSON (None when it is empty or invalid)"""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+async def send_json(send, payload, status=200, headers=None):
+    body = json.dumps(payload).encode('utf-8')
+    response_headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    for name, value in (headers or {}).items():
+        response_headers.append((name.lower().encode(), str(value).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def generate_roadmap(data):
+    """Async /generate-roadmap; returns (payload, status, headers)"""
+    session, error = await asyncio.to_thread(validate_roadmap_request, data)
+    if error:
+        return {'success': False, 'error': error[0]}, error[1], None
+    role = data['role']
+
+    queued_at = time.time()
+    try:
+        await asyncio.wait_for(get_slots().acquire(), ASGI_CONFIG['max_wait_seconds'])
+    except asyncio.TimeoutError:
+        retry_after = max(1, int(ASGI_CONFIG['max_wait_seconds']))
+        return {'success': False, 'error': 'Server busy, please retry shortly'}, 503, {'Retry-After': retry_after}
+
+    try:
+        start_time = time.time()
+        # Time spent waiting for a slot comes out of the end-to-end budget
+        time_budget = PERFORMANCE_CONFIG['max_generation_time'] - (start_time - queued_at)
+        result = await run_pipeline_async(session.resume_text, role, log_execution=True, time_budget=time_budget,
+                                          roadmap_mode=data.get('roadmap_mode'),
+                                          include_readiness=bool(data.get('include_readiness')),
+                                          session_id=data['session_id'])
+        execution_time = time.time() - start_time
+
+        await asyncio.to_thread(store_roadmap_artifacts, data['session_id'], role, result)
+        return build_roadmap_response(result, execution_time), 200, None
+    except Exception as e:
+        print(f"Roadmap generation error: {e}")
+        return {'success': False, 'error': str(e)}, 500, None
+    finally:
+        get_slots().release()
+
+async def extract_skills(data):
+    """Async /extract-skills; returns (payload, status, headers)"""
+    session_id = data.get('session_id')
+    if not session_id:
+        return {'success': False, 'error': 'No session ID provided'}, 400, None
+
+    session = await asyncio.to_thread(session_store.get, session_id)
+    if session is None:
+        return {'success': False, 'error': 'Session not found'}, 404, None
+    resume_text = session.resume_text
+
+    try:
+        start_time = time.time()
+        result = await extract_skills_only_async(resume_text)
+        execution_time = time.time() - start_time
+        await asyncio.to_thread(session_store.update, session_id, extracted_skills=result.get('extracted_skills', []))
+        await asyncio.to_thread(logger.log_execution, resume_text, "Skill Extraction", result, execution_time)
+        return {'success': True, 'skills': result.get('extracted_skills', [])}, 200, None
+    except Exception as e:
+        print(f"Skill extraction error: {e}")
+        return {'success': False, 'error': str(e)}, 500, None
+
+ASYNC_ROUTES = {
+    '/generate-roadmap': generate_roadmap,
+    '/extract-skills': extract_skills
+}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Session sweeper and job workers run once per server worker process
+            start_background_services()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI callable"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    handler = ASYNC_ROUTES.get(scope.get('path', ''))
+    if scope['type'] == 'http' and handler is not None and scope.get('method') == 'POST':
+        data = await read_json(receive)
+        if not isinstance(data, dict):
+            return await send_json(send, {'success': False, 'error': 'Request body must be a JSON object'}, 400)
+        with tracer.start_trace(f"POST {scope['path']}", method='POST', path=scope['path']) as root:
+            payload, status, headers = await handler(data)
+            root.set(status=status)
+        return await send_json(send, payload, status, {**(headers or {}), 'X-Trace-Id': root.trace_id})
+
+    return await flask_asgi(scope, receive, send)
@@ -0,0 +1,290 @@
+"""
+Job Queue
+
+Runs long requests (roadmap generation) in the background: jobs are queued
+in sqlite, picked up by a local pool of worker threads, report per-stage
+progress while running and keep their result until a TTL expires. Running
+jobs hold a lease that progress updates renew; jobs whose worker died are
+requeued when the lease runs out, so a restart does not lose them.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    status: str = 'queued'
+    payload: Dict = field(default_factory=dict)
+    progress: Dict = field(default_factory=dict)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        """Public view of the job (the payload stays internal)"""
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """sqlite-backed job queue with a local worker pool, leases and TTL expiry"""
+
+    def __init__(self, db_path: str = ":memory:", workers: int = 2, ttl_seconds: float = 24 * 3600,
+                 lease_seconds: float = 120, max_attempts: int = 3, max_queued: int = 500,
+                 poll_interval: float = 1.0, sweep_interval: float = 300):
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(threading.Lock())
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._handlers: Dict[str, Callable] = {}
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.requeued = 0
+        self.rejected = 0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+            "payload TEXT NOT NULL, progress TEXT NOT NULL, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, lease_expires_at REAL, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def register(self, kind: str, handler: Callable):
+        """Set the handler for a job kind: handler(payload, report_progress) -> result dict"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, payload: Dict) -> str:
+        """Queue a job and return its ID"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        job_id = f"job_{secrets.token_urlsafe(16)}"
+        with self._lock:
+            if self._count('queued') >= self.max_queued:
+                self.rejected += 1
+                raise JobQueueFull(f"{self.max_queued} jobs already queued")
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, payload, progress, created_at) VALUES (?, ?, 'queued', ?, '{}', ?)",
+                (job_id, kind, json.dumps(payload), time.time())
+            )
+            self._conn.commit()
+            self.submitted += 1
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job, or None if unknown or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, status, payload, progress, result, error, attempts, "
+                "created_at, started_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = Job(
+            job_id=row[0], kind=row[1], status=row[2], payload=json.loads(row[3]), progress=json.loads(row[4]),
+            result=json.loads(row[5]) if row[5] else None, error=row[6], attempts=row[7],
+            created_at=row[8], started_at=row[9], finished_at=row[10]
+        )
+        if job.finished_at is not None and time.time() - job.finished_at > self.ttl_seconds:
+            return None
+        return job
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Number of queued jobs ahead of this one (None unless it is queued)"""
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM jobs WHERE job_id = ? AND status = 'queued'", (job_id,)).fetchone()
+            if row is None:
+                return None
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (row[0],)
+            ).fetchone()[0]
+
+    def update_progress(self, job_id: str, attempt: int, progress: Dict):
+        """Store a running attempt's progress and renew its lease"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, lease_expires_at = ? WHERE job_id = ? AND status = 'running' AND attempts = ?",
+                (json.dumps(progress), time.time() + self.lease_seconds, job_id, attempt)
+            )
+            self._conn.commit()
+
+    def requeue_stale(self) -> int:
+        """Requeue running jobs whose lease expired (their worker died); fail those out of attempts"""
+        now = time.time()
+        with self._lock:
+            failed = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker lost', finished_at = ? "
+                "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            ).rowcount
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = '{}', lease_expires_at = NULL "
+                "WHERE status = 'running' AND lease_expires_at < ?", (now,)
+            ).rowcount
+            self._conn.commit()
+            self.failed += failed
+            self.requeued += requeued
+        if requeued:
+            with self._wakeup:
+                self._wakeup.notify_all()
+        return requeued
+
+    def sweep_expired(self) -> int:
+        """Delete finished jobs older than the TTL; returns rows removed"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def start(self):
+        """Requeue jobs left behind by a previous worker and start the worker pool and sweeper"""
+        if self._threads:
+            return
+        self._stop_event.clear()
+        requeued = self.requeue_stale()
+        if requeued:
+            print(f"♻️ Requeued {requeued} interrupted jobs")
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work_loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        sweeper = threading.Thread(target=self._sweep_loop, name="job-sweeper", daemon=True)
+        sweeper.start()
+        self._threads.append(sweeper)
+
+    def stop(self):
+        """Stop the workers after their current job"""
+        self._stop_event.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        self._threads = []
+
+    def stats(self) -> dict:
+        """Return job counts by status and lifetime counters"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            'workers': self.workers,
+            'jobs': {status: counts.get(status, 0) for status in JOB_STATUSES},
+            'submitted': self.submitted,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'requeued': self.requeued,
+            'rejected': self.rejected
+        }
+
+    def _work_loop(self):
+        while not self._stop_event.is_set():
+            job = self._claim()
+            if job is None:
+                # Poll as well as wait: other processes may queue jobs in the same database
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _sweep_loop(self):
+        # Stale leases are checked at least once per lease so orphaned jobs restart promptly
+        while not self._stop_event.wait(min(self.sweep_interval, self.lease_seconds)):
+            try:
+                self.requeue_stale()
+                removed = self.sweep_expired()
+                if removed:
+                    print(f"🧹 Job sweeper removed {removed} expired jobs")
+            except Exception as e:
+                print(f"Job sweeper error: {e}")
+
+    def _claim(self) -> Optional[Job]:
+        """Atomically move the oldest queued job to running under a fresh lease"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            # The status check keeps two processes from claiming the same job
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, lease_expires_at = ? "
+                "WHERE job_id = ? AND status = 'queued'", (now, now + self.lease_seconds, row[0])
+            ).rowcount
+            self._conn.commit()
+        return self.get(row[0]) if claimed else None
+
+    def _run(self, job: Job):
+        handler = self._handlers.get(job.kind)
+        print(f"🛠️ Running {job.kind} job {job.job_id} (attempt {job.attempts})")
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind: {job.kind}")
+            result = handler(job.payload, lambda progress: self.update_progress(job.job_id, job.attempts, progress))
+            self._finish(job, 'succeeded', result=result)
+        except Exception as e:
+            print(f"❌ Job {job.job_id} failed: {e}")
+            self._finish(job, 'failed', error=str(e))
+
+    def _finish(self, job: Job, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        with self._lock:
+            # The attempt number is the lease token: once the lease ran out and the job was
+            # requeued (and maybe claimed again), this run's outcome is discarded
+            finished = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE job_id = ? AND status = 'running' AND attempts = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(),
+                 job.job_id, job.attempts)
+            ).rowcount
+            self._conn.commit()
+            if not finished:
+                print(f"⚠️ Discarded the outcome of job {job.job_id} attempt {job.attempts}: its lease expired")
+            elif status == 'succeeded':
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def _count(self, status: str) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
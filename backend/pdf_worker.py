@@ -0,0 +1,73 @@
+"""
+PDF Worker
+
+Host process for the PDF page-extraction pool, started by resume_parser as
+`python pdf_worker.py <workers>`. The pool's spawn workers re-import only
+this small script, never the web app that asked for the extraction.
+Requests arrive on stdin and results leave on stdout, one pickled tuple
+each: (request_id, pdf_bytes, start, end) in, (request_id, error, pages) out.
+"""
+
+import io
+import os
+import sys
+import time
+import pickle
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import PyPDF2
+
+
+def extract_page_range(pdf_bytes: bytes, start: int, end: int) -> List[Tuple[str, float]]:
+    """Worker task: extract pages [start, end) and time each one"""
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for page_number in range(start, end):
+        page_start = time.perf_counter()
+        text = reader.pages[page_number].extract_text() or ""
+        pages.append((text, time.perf_counter() - page_start))
+    return pages
+
+
+def exit_with_host(host_pid: int):
+    """Pool worker initializer: exit once the host is gone, even if it was killed before shutting the pool down"""
+    def watch():
+        while os.getppid() == host_pid:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=watch, name="host-watch", daemon=True).start()
+
+
+def serve(workers: int):
+    """Answer extraction requests from stdin until the parent closes it"""
+    requests = sys.stdin.buffer
+    # Results own the original stdout; anything printed here or in the pool goes to stderr
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    write_lock = threading.Lock()
+
+    def reply(request_id: int, future):
+        error = future.exception()
+        message = (request_id, f"{type(error).__name__}: {error}" if error else None,
+                   None if error else future.result())
+        with write_lock:
+            pickle.dump(message, responses)
+            responses.flush()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=exit_with_host, initargs=(os.getpid(),)) as executor:
+        while True:
+            try:
+                request_id, pdf_bytes, start, end = pickle.load(requests)
+            except EOFError:
+                break
+            future = executor.submit(extract_page_range, pdf_bytes, start, end)
+            future.add_done_callback(lambda f, request_id=request_id: reply(request_id, f))
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]) if len(sys.argv) > 1 else 2)
@@ -0,0 +1,250 @@
+"""
+Session Store
+
+Keeps per-session artifacts (resume text, extracted skills, selected role,
+gap analysis and roadmap) in an in-memory LRU backed by sqlite, with
+TTL-based expiry and an optional background sweeper.
+
+Several worker processes may share one database: sqlite is the source of
+truth, a cached copy is only used while its updated_at still matches the
+row, and updates re-read the row inside a write transaction.
+"""
+
+import copy
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+# Artifacts that can be attached to a session
+ARTIFACT_FIELDS = ('resume_text', 'extracted_skills', 'selected_role', 'gap_analysis', 'roadmap')
+
+
+@dataclass
+class SessionArtifacts:
+    session_id: str
+    resume_text: str = ""
+    extracted_skills: List[str] = field(default_factory=list)
+    selected_role: str = ""
+    gap_analysis: Dict = field(default_factory=dict)  # {"missing_skills": [...], "nice_to_have": [...]}
+    roadmap: Dict = field(default_factory=dict)  # {"phases": [...], "time_estimates": {...}}
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    def artifacts(self) -> Dict:
+        """Return only the artifact fields, suitable for persistence"""
+        data = asdict(self)
+        return {name: data[name] for name in ARTIFACT_FIELDS}
+
+
+class SessionStore:
+    """Session artifacts with random IDs, an LRU front and sqlite persistence"""
+
+    def __init__(self, db_path: str = ":memory:", ttl_seconds: float = 24 * 3600,
+                 max_cached: int = 256, max_sessions: int = 5000, sweep_interval: float = 300):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_cached = max_cached
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, SessionArtifacts]" = OrderedDict()
+        self._sweeper = None
+        self._stop_event = threading.Event()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.evicted_sessions = 0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def new_session_id(prefix: str = "session") -> str:
+        """Generate a collision-free session ID"""
+        return f"{prefix}_{secrets.token_urlsafe(16)}"
+
+    def create(self, resume_text: str, prefix: str = "session", **artifacts) -> str:
+        """Create a session holding the resume text and any initial artifacts"""
+        self._validate_fields(artifacts)
+        now = time.time()
+        session = SessionArtifacts(
+            session_id=self.new_session_id(prefix),
+            resume_text=resume_text,
+            created_at=now,
+            updated_at=now,
+            **artifacts
+        )
+        with self._lock:
+            self._persist(session)
+            self._cache_put(session)
+        return session.session_id
+
+    def get(self, session_id: str) -> Optional[SessionArtifacts]:
+        """Return a copy of the session artifacts, or None if unknown or expired"""
+        with self._lock:
+            session = self._current(session_id)
+            if session is None:
+                return None
+            if self._is_expired(session):
+                self._delete_expired(session_id)
+                return None
+            return copy.deepcopy(session)
+
+    def update(self, session_id: str, **artifacts) -> Optional[SessionArtifacts]:
+        """Set artifacts on an existing session; returns None if the session is gone"""
+        self._validate_fields(artifacts)
+        with self._lock:
+            # Another process may have changed the row since it was cached: read it under the write lock
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                session = self._load(session_id)
+                if session is None or self._is_expired(session):
+                    self._conn.rollback()
+                    return None
+                for name, value in artifacts.items():
+                    setattr(session, name, copy.deepcopy(value))
+                session.updated_at = time.time()
+                self._persist(session)
+            except Exception:
+                self._conn.rollback()
+                raise
+            self._cache_put(session)
+            return copy.deepcopy(session)
+
+    def delete(self, session_id: str):
+        """Remove a session"""
+        with self._lock:
+            self._delete(session_id)
+
+    def sweep_expired(self) -> int:
+        """Delete expired sessions and trim the store to max_sessions; returns rows removed"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+            overflow = self._count() - self.max_sessions
+            if overflow > 0:
+                removed += self._conn.execute(
+                    "DELETE FROM sessions WHERE session_id IN "
+                    "(SELECT session_id FROM sessions ORDER BY updated_at ASC LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+            self._conn.commit()
+
+            # Drop cached entries whose rows are gone
+            for session_id in list(self._cache.keys()):
+                if self._is_expired(self._cache[session_id]) or self._load(session_id) is None:
+                    del self._cache[session_id]
+
+            self.evicted_sessions += removed
+        return removed
+
+    def start_sweeper(self):
+        """Start a daemon thread that sweeps expired sessions periodically"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        def sweep_loop():
+            while not self._stop_event.wait(self.sweep_interval):
+                try:
+                    removed = self.sweep_expired()
+                    if removed:
+                        print(f"🧹 Session sweeper removed {removed} expired sessions")
+                except Exception as e:
+                    print(f"Session sweeper error: {e}")
+
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper"""
+        self._stop_event.set()
+
+    def stats(self) -> dict:
+        """Return store size and cache statistics"""
+        with self._lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                'sessions': self._count(),
+                'cached_sessions': len(self._cache),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'hit_ratio': self.cache_hits / total if total > 0 else 0,
+                'evicted_sessions': self.evicted_sessions
+            }
+
+    def _validate_fields(self, artifacts: dict):
+        unknown = set(artifacts) - set(ARTIFACT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown session artifacts: {sorted(unknown)}")
+
+    def _is_expired(self, session: SessionArtifacts) -> bool:
+        return time.time() - session.updated_at > self.ttl_seconds
+
+    def _cache_put(self, session: SessionArtifacts):
+        self._cache[session.session_id] = session
+        self._cache.move_to_end(session.session_id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def _current(self, session_id: str) -> Optional[SessionArtifacts]:
+        """Cached copy while it matches the row's updated_at, else the row itself"""
+        row = self._conn.execute("SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            self._cache.pop(session_id, None)
+            return None
+        session = self._cache.get(session_id)
+        if session is not None and session.updated_at == row[0]:
+            self.cache_hits += 1
+            self._cache.move_to_end(session_id)
+            return session
+        self.cache_misses += 1
+        session = self._load(session_id)
+        if session is None:
+            self._cache.pop(session_id, None)
+            return None
+        self._cache_put(session)
+        return session
+
+    def _persist(self, session: SessionArtifacts):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (session.session_id, json.dumps(session.artifacts()), session.created_at, session.updated_at)
+        )
+        self._conn.commit()
+
+    def _load(self, session_id: str) -> Optional[SessionArtifacts]:
+        row = self._conn.execute(
+            "SELECT data, created_at, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        data, created_at, updated_at = row
+        return SessionArtifacts(session_id=session_id, created_at=created_at, updated_at=updated_at, **json.loads(data))
+
+    def _delete(self, session_id: str):
+        self._cache.pop(session_id, None)
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._conn.commit()
+
+    def _delete_expired(self, session_id: str):
+        # Only if the row is still expired; another process may have just touched it
+        self._cache.pop(session_id, None)
+        self._conn.execute(
+            "DELETE FROM sessions WHERE session_id = ? AND updated_at < ?", (session_id, time.time() - self.ttl_seconds)
+        )
+        self._conn.commit()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]